@@ -0,0 +1,151 @@
+"""
+This module provides seeded generators of synthetic Spotify and Grammy data with
+the same columns as data/spotify_dataset.csv and data/the_grammy_awards.csv.
+
+It defines the following functions:
+- generate_spotify: Builds a Spotify tracks frame of any size.
+- generate_grammy: Builds a Grammy nominations frame overlapping a Spotify frame.
+
+Usage:
+    Text columns are sampled from vocabularies sized like the real datasets
+    (about one artist per 4 tracks, 114 genres, repeated track names), so string
+    cardinalities and duplication stay realistic from 10k up to 10M rows. The
+    same seed always produces the same frames.
+"""
+import numpy as np
+import pandas as pd
+
+SYLLABLES = np.array([
+    'la', 'mo', 'ri', 'ka', 'zen', 'tor', 'vi', 'na', 'shi', 'el', 'do', 'ra',
+    'lu', 'ben', 'sa', 'quin', 'ma', 'ro', 'ti', 'fe', 'no', 'al', 'gu', 'pe',
+])
+WORDS = np.array([
+    'love', 'night', 'heart', 'fire', 'dream', 'blue', 'song', 'time', 'light',
+    'dance', 'rain', 'gold', 'summer', 'road', 'home', 'sky', 'river', 'wild',
+    'moon', 'city', 'baby', 'forever', 'shadow', 'sweet', 'ocean', 'young',
+])
+GENRES = np.array([f'genre-{i:03d}' for i in range(114)])
+BASE62 = np.array(list('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'))
+GRAMMY_FIELDS = np.array([
+    'Record Of The Year', 'Album Of The Year', 'Song Of The Year', 'Best New Artist',
+    'Best Pop Solo Performance', 'Best Rock Song', 'Best Rap Album', 'Best R&B Performance',
+])
+
+# Fractions of distinct values per row, close to the real Spotify dataset
+ARTIST_RATIO = 0.27
+ALBUM_RATIO = 0.41
+TRACK_RATIO = 0.64
+
+
+def _names(rng, size, parts, vocabulary, title=True):
+    # Joins `parts` random vocabulary entries per name; a numeric suffix keeps
+    # every entry of the vocabulary distinct
+    picks = rng.choice(vocabulary, size=(size, parts))
+    names = pd.Series(picks[:, 0])
+    for i in range(1, parts):
+        names = names + ' ' + picks[:, i]
+    names = names + ' ' + pd.Series(np.arange(size)).astype(str)
+    return names.str.title() if title else names
+
+
+def _track_ids(rng, size):
+    return pd.Series(rng.choice(BASE62, size=(size, 22)).view('<U22').ravel())
+
+
+def generate_spotify(n_rows, seed=0, nan_rows=1):
+    """
+    Generates a Spotify tracks frame with the columns of spotify_dataset.csv.
+
+    Args:
+        n_rows (int): Number of rows.
+        seed (int): Seed of the random generator.
+        nan_rows (int): Rows with missing text fields, as in the real dataset.
+
+    Returns:
+        pd.DataFrame: The generated frame, including the 'Unnamed: 0' id column.
+    """
+    rng = np.random.default_rng(seed)
+    artists = _names(rng, max(1, int(n_rows * ARTIST_RATIO)), 2, SYLLABLES)
+    albums = _names(rng, max(1, int(n_rows * ALBUM_RATIO)), 2, WORDS)
+    tracks = _names(rng, max(1, int(n_rows * TRACK_RATIO)), 3, WORDS)
+
+    # Skewed sampling: low vocabulary indices are drawn more often, so a few
+    # artists and titles account for many rows
+    def skewed(size):
+        return (rng.random(n_rows) ** 1.5 * size).astype(np.int64)
+
+    df = pd.DataFrame({
+        'Unnamed: 0': np.arange(n_rows),
+        'track_id': _track_ids(rng, n_rows),
+        'artists': artists.to_numpy()[skewed(len(artists))],
+        'album_name': albums.to_numpy()[skewed(len(albums))],
+        'track_name': tracks.to_numpy()[skewed(len(tracks))],
+        'popularity': rng.integers(0, 101, n_rows),
+        'duration_ms': rng.integers(30_000, 600_000, n_rows),
+        'explicit': rng.random(n_rows) < 0.09,
+        'danceability': rng.random(n_rows).round(3),
+        'energy': rng.random(n_rows).round(3),
+        'key': rng.integers(0, 12, n_rows),
+        'loudness': rng.uniform(-40, 2, n_rows).round(3),
+        'mode': rng.integers(0, 2, n_rows),
+        'speechiness': rng.random(n_rows).round(4),
+        'acousticness': rng.random(n_rows).round(4),
+        'instrumentalness': rng.random(n_rows).round(6),
+        'liveness': rng.random(n_rows).round(4),
+        'valence': rng.random(n_rows).round(3),
+        'tempo': rng.uniform(50, 220, n_rows).round(3),
+        'time_signature': rng.choice([3, 4, 5], n_rows, p=[0.1, 0.85, 0.05]),
+        'track_genre': GENRES[rng.integers(0, len(GENRES), n_rows)],
+    })
+
+    missing = rng.choice(n_rows, size=min(nan_rows, n_rows), replace=False)
+    df.loc[missing, ['artists', 'album_name', 'track_name']] = np.nan
+    return df
+
+
+def generate_grammy(n_rows, spotify_df, overlap=0.3, seed=0):
+    """
+    Generates a Grammy nominations frame with the columns of the_grammy_awards.csv.
+
+    A fraction `overlap` of the nominees is taken from spotify_df, with the
+    artist spelled in a different case or with a featured artist half of the
+    time, so the fuzzy artist matching has real work to do.
+
+    Returns:
+        pd.DataFrame: The generated frame.
+    """
+    rng = np.random.default_rng(seed)
+    n_overlap = int(n_rows * overlap)
+    known = spotify_df.dropna(subset=['track_name', 'artists'])
+    sample = known.iloc[rng.integers(0, len(known), n_overlap)]
+
+    artists = sample['artists'].to_numpy(dtype=object).copy()
+    variant = rng.random(n_overlap)
+    artists[variant < 0.25] = pd.Series(artists[variant < 0.25]).str.upper().to_numpy()
+    featured = (variant >= 0.25) & (variant < 0.5)
+    artists[featured] = pd.Series(artists[featured]).add(' Feat. Guest').to_numpy()
+
+    n_new = n_rows - n_overlap
+    nominees = np.concatenate([sample['track_name'].to_numpy(dtype=object),
+                               _names(rng, n_new, 2, WORDS).to_numpy(dtype=object)])
+    artists = np.concatenate([artists, _names(rng, n_new, 2, SYLLABLES).to_numpy(dtype=object)])
+
+    years = rng.integers(1958, 2020, n_rows)
+    # Like the real data, about 40% of nominations have the artist only in workers
+    in_workers = rng.random(n_rows) < 0.4
+    workers = np.where(in_workers, pd.Series(artists).radd('Producer (').add(')').to_numpy(), None)
+    artist_column = np.where(in_workers, None, artists)
+    published = pd.Series(years + 1).astype(str) + '-05-19T05:10:28-07:00'
+
+    return pd.DataFrame({
+        'year': years,
+        'title': pd.Series(years - 1957).astype(str) + 'th Annual GRAMMY Awards',
+        'published_at': published,
+        'updated_at': published,
+        'category': GRAMMY_FIELDS[rng.integers(0, len(GRAMMY_FIELDS), n_rows)],
+        'nominee': nominees,
+        'artist': artist_column,
+        'workers': workers,
+        'img': None,
+        'winner': True,
+    })
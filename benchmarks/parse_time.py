@@ -0,0 +1,112 @@
+"""
+This module measures what parsing dags/dag.py costs the Airflow scheduler and
+fails when it goes over budget.
+
+Usage:
+    python -m benchmarks.parse_time --budget-ms 200 --runs 5
+
+    Each run imports the DAG file in a fresh interpreter with `-X importtime`.
+    Airflow is imported first, since the scheduler has it loaded already, so
+    the time reported is the cumulative import time of dags.dag alone (median
+    over the runs). The command exits with status 1 if that time is over the
+    budget (PARSE_BUDGET_MS, default 200) or if parsing imported one of
+    HEAVY_MODULES, which only the tasks themselves should load.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from decouple import config
+
+DAG_MODULE = 'dags.dag'
+PRELOADED = ('airflow', 'airflow.operators.python')
+HEAVY_MODULES = (
+    'pandas', 'numpy', 'pyarrow', 'sqlalchemy', 'rapidfuzz', 'psycopg2', 'psutil',
+    'googleapiclient', 'google.auth', 'google.oauth2', 'opentelemetry',
+    'dags.etl', 'src', 'models', 'db',
+)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def _heavy_package(module):
+    for heavy in HEAVY_MODULES:
+        if module == heavy or module.startswith(heavy + '.'):
+            return heavy
+    return None
+
+
+def parse_importtime(stderr, module=DAG_MODULE):
+    """
+    Reads the `-X importtime` report of an interpreter that imported module.
+
+    Returns:
+        tuple: Cumulative import time of module in milliseconds, and the
+        modules first imported while importing it.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            entries.append((int(match.group(2)), len(match.group(3)), match.group(4)))
+
+    # Nested imports are reported before the import that triggered them, so the
+    # block of module runs from the previous top-level entry to its own
+    start = 0
+    for i, (cumulative, indent, name) in enumerate(entries):
+        if indent == 0 and name != module:
+            start = i + 1
+        elif indent == 0:
+            block = entries[start:i + 1]
+            return cumulative / 1000, [entry[2] for entry in block]
+    raise ValueError(f"{module} does not appear in the import time report")
+
+
+def measure(module=DAG_MODULE):
+    """
+    Imports module once in a new interpreter after the Airflow modules.
+
+    Returns:
+        tuple: Same as parse_importtime.
+    """
+    code = '; '.join(f'import {name}' for name in PRELOADED + (module,))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.getenv('PYTHONPATH')])))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr, module)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the parse time of the DAG file.')
+    parser.add_argument('--budget-ms', type=float, default=config('PARSE_BUDGET_MS', default=200, cast=float))
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    timings, heavy = [], set()
+    for _ in range(args.runs):
+        elapsed_ms, modules = measure()
+        timings.append(elapsed_ms)
+        heavy.update(filter(None, map(_heavy_package, modules)))
+
+    median_ms = statistics.median(timings)
+    print(f"{DAG_MODULE} parse time: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {min(timings):.1f}, max {max(timings):.1f}), budget {args.budget_ms:.0f} ms")
+
+    failed = False
+    if median_ms > args.budget_ms:
+        print(f"Parse time over budget by {median_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if heavy:
+        print(f"Heavy modules imported at parse time: {', '.join(sorted(heavy))}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
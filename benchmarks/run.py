@@ -0,0 +1,202 @@
+"""
+This module runs the ETL stages on synthetic data of growing size and writes
+their timings to a machine-readable JSON file.
+
+Usage:
+    python -m benchmarks.run --sizes 10000 100000 1000000 --output bench_results.json
+
+    Every stage (extract, each transform method, merge and load) is timed on its
+    own. For each one the harness reports wall time, throughput in rows/sec, and
+    peak RSS above the RSS at stage start, sampled every few milliseconds. Loads
+    go to a throwaway SQLite file unless --db-url points at a local PostgreSQL.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+# Benchmarks measure the stages themselves: no telemetry export, no match cache
+os.environ.setdefault('TELEMETRY_EXPORTER', 'none')
+os.environ.setdefault('MATCH_CACHE_PATH', '')
+
+import pandas as pd
+import psutil
+
+from benchmarks.generators import generate_grammy, generate_spotify
+from db.db_connection import get_engine
+from models.model import MergedDAta
+from src.artifacts.artifact_store import ArtifactStore
+from src.extract.read_spotify import iter_spotify_chunks, read_spotify_csv
+from src.load.bulk_loader import bulk_load
+from src.load.finalize import create_table, drop_summaries, finalize_load
+from src.load.incremental_loader import with_row_hashes
+from src.merge.merge import MergeData
+from src.transform.transform_grammy import TransformGrammy
+from src.transform.transform_spotify import TransformSpotify
+
+SPOTIFY_STEPS = ('unnamed_to_id', 'drop_nan_records', 'normalize_data', 'filter_max_popularity_tracks')
+GRAMMY_STEPS = (
+    'insert_ids', 'remove_unwanted_grammmy_columns', 'remove_na_nominees', 'extract_artists',
+    'remove_parentheses_from_artists', 'mark_winners', 'normalize_data', 'filter_winners',
+)
+SAMPLE_INTERVAL_S = 0.005
+
+
+def mark_winners_rowwise(df):
+    """
+    The per-group loop TransformGrammy.mark_winners replaced, timed next to it
+    as a baseline.
+    """
+    grouped = df.groupby(['year', 'title', 'category'], observed=True)
+    for name, group in grouped:
+        if len(group) > 2:
+            df.loc[group.index[0], 'winner'] = True
+            df.loc[group.index[1:], 'winner'] = False
+
+
+class _PeakRss:
+    # Polls the process RSS on a background thread while a stage runs
+
+    def __init__(self):
+        self.process = psutil.Process()
+        self.peak = 0
+        self.running = False
+
+    def _poll(self):
+        while self.running:
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            time.sleep(SAMPLE_INTERVAL_S)
+
+    def __enter__(self):
+        self.start = self.process.memory_info().rss
+        self.peak = self.start
+        self.running = True
+        self.thread = threading.Thread(target=self._poll, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.running = False
+        self.thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+
+def measure(stage, rows, func, *args):
+    """
+    Runs func(*args) once and returns its result with the stage measurements.
+    """
+    with _PeakRss() as rss:
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+    record = {
+        'stage': stage,
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed else None,
+        'peak_rss_delta_mb': (rss.peak - rss.start) / 2**20,
+    }
+    print(f"  {stage:<48} {elapsed:9.3f}s  {record['peak_rss_delta_mb']:9.1f} MB")
+    return result, record
+
+
+def run_size(n_rows, grammy_rows, seed, db_url, workdir):
+    spotify_df = generate_spotify(n_rows, seed=seed)
+    grammy_df = generate_grammy(grammy_rows, spotify_df, seed=seed)
+    csv_path = os.path.join(workdir, f'spotify_{n_rows}.csv')
+    # Like the real file, the id column is written as an index with an empty header
+    spotify_df.set_index('Unnamed: 0').rename_axis(None).to_csv(csv_path)
+    del spotify_df
+
+    records = []
+    spotify_df, record = measure('extract.read_spotify_csv', n_rows, read_spotify_csv, csv_path)
+    records.append(record)
+    # The DAG's extract: CSV blocks streamed into an artifact
+    _, record = measure('extract.iter_spotify_chunks', n_rows,
+                        ArtifactStore(workdir).write_chunks, iter_spotify_chunks(csv_path), 'read_spotify')
+    records.append(record)
+
+    spotify = TransformSpotify(spotify_df)
+    for step in SPOTIFY_STEPS:
+        _, record = measure(f'TransformSpotify.{step}', len(spotify.df), getattr(spotify, step))
+        records.append(record)
+
+    grammy = TransformGrammy(grammy_df)
+    for step in GRAMMY_STEPS:
+        if step == 'mark_winners':
+            _, record = measure('TransformGrammy.mark_winners (row-wise baseline)', len(grammy.df),
+                                mark_winners_rowwise, grammy.df.copy())
+            records.append(record)
+        _, record = measure(f'TransformGrammy.{step}', len(grammy.df), getattr(grammy, step))
+        records.append(record)
+
+    merger = MergeData(grammy.df, spotify.df)
+    merged_df, record = measure('MergeData.merge', len(spotify.df) + len(grammy.df), merger.merge)
+    records.append(record)
+
+    engine = get_engine(db_url)
+    with engine.begin() as connection:
+        drop_summaries(connection)
+    MergedDAta.__table__.drop(engine, checkfirst=True)
+    create_table(MergedDAta.__table__, engine)
+    merged_df = merged_df.drop_duplicates(subset='ID')
+    _, record = measure('load.bulk_load', len(merged_df), bulk_load,
+                        with_row_hashes(merged_df), MergedDAta.__table__, engine)
+    records.append(record)
+    _, record = measure('load.finalize_load', len(merged_df), finalize_load, MergedDAta.__table__, engine)
+    records.append(record)
+
+    for record in records:
+        record['size'] = n_rows
+    return records
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the ETL stages on synthetic data.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000],
+                        help='Spotify row counts to benchmark (10k up to 10M).')
+    parser.add_argument('--grammy-ratio', type=float, default=0.05,
+                        help='Grammy rows per Spotify row.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db-url', default=None,
+                        help='Database for the load stage; defaults to a temporary SQLite file.')
+    parser.add_argument('--output', default='bench_results.json')
+    args = parser.parse_args(argv)
+
+    results = {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'cpu_count': os.cpu_count(),
+        'seed': args.seed,
+        'stages': [],
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_url = args.db_url or f"sqlite:///{os.path.join(workdir, 'bench.sqlite')}"
+        for n_rows in args.sizes:
+            print(f"Benchmarking {n_rows} Spotify rows")
+            grammy_rows = max(1, int(n_rows * args.grammy_ratio))
+            results['stages'].extend(run_size(n_rows, grammy_rows, args.seed, db_url, workdir))
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -1,169 +1,407 @@
-import pandas as pd
-import json
+import functools
 import logging
-from src.extract.read_grammy import read_grammy_db
-from src.extract.read_spotify import read_spotify_csv
+from src.extract.read_grammy import GRAMMY_CSV_PATH, read_grammy_db
+from src.extract.read_spotify import SPOTIFY_CSV_PATH, iter_spotify_chunks
 from src.transform.transform_grammy import TransformGrammy
 from src.transform.transform_spotify import TransformSpotify
 from src.merge.merge import MergeData
-from src.load.load_to_database import load_data
-from src.store.store import authenticate, upload_file
-import io
+from src.load.load_to_database import load_chunks, load_data
+from src.store.export import export_chunk_rows, export_chunks, iter_artifact_chunks, iter_table_chunks
+from src.artifacts.artifact_store import ArtifactStore, file_sha256
+from src.artifacts.stage_cache import StageCache
+from src.artifacts.checkpoint import ChunkCheckpoint
+from src.merge.artist_matcher import ArtistMatcher
+from src.merge.track_matcher import TrackMatcher
+from src.merge.stream_merge import stream_merge
+from src.transform.normalize import StringNormalizer
+from src.load.bulk_loader import bulk_load
+from src.load.incremental_loader import incremental_load
+from src.load.finalize import finalize_load
+from src.load.checkpoint import completed_chunks
+from src.load.load_state import current_load
+from src.load.validation import ValidationError
+from models import summaries
+from src.telemetry.instrumentation import traced
+from models.schema import GRAMMY_SCHEMA, SPOTIFY_SCHEMA, apply_schema
+from models.model import GrammyAward, MergedDAta
+from db.db_connection import build_engine, pool_metrics
+from sqlalchemy import func, inspect, select
+from decouple import config
+from opentelemetry import trace
+import os
+import numpy as np
+import pandas as pd
+
+
+# Stage bodies shared by the Airflow callables below and src/pipeline/runner.py
+
+
+def transform_spotify_partition_df(df):
+    transformer = TransformSpotify(df)
+
+    # Row-local steps: any slice of the extracted rows can go through them alone
+    transformer.plan() \
+        .unnamed_to_id() \
+        .drop_nan_records() \
+        .normalize_data() \
+        .execute()
+    return transformer.df
+
+
+def reduce_spotify_partitions_df(frames):
+    # filter_max_popularity_tracks compares rows across partitions, so it runs
+    # once over the partitions concatenated in their original order
+    transformer = TransformSpotify(pd.concat(frames, ignore_index=True))
+    transformer.plan().filter_max_popularity_tracks().execute()
+    return apply_schema(transformer.df, SPOTIFY_SCHEMA)
+
+
+def transform_spotify_df(df):
+    return reduce_spotify_partitions_df([transform_spotify_partition_df(df)])
+
+
+def transform_grammy_df(df):
+    transformer = TransformGrammy(df)
+
+    transformer.insert_ids()
+    transformer.remove_unwanted_grammmy_columns()
+    transformer.remove_na_nominees()
+    transformer.extract_artists()
+    transformer.remove_parentheses_from_artists()
+    transformer.mark_winners()
+    transformer.normalize_data()
+    transformer.filter_winners()
+    return apply_schema(transformer.df, GRAMMY_SCHEMA)
+
+
+def export_and_upload(chunks):
+    # Writes the chunks into a compressed file, then uploads it in resumable chunks.
+    # The Google client is only imported by the store task
+    from src.store.store import upload_file
+    export_path = os.path.join(config('EXPORT_DIR', default='./exports'), 'merged_data')
+    export = export_chunks(chunks, export_path)
+    logging.info(f"Exported {export['num_rows']} rows to {export['path']}")
+    return upload_file(export['path'], mimetype=export['mimetype'])
+
+
+def _artifact_store(kwargs):
+    # One artifact directory per DAG run; only references travel through XCom
+    return ArtifactStore.for_run(kwargs.get("run_id"))
+
+
+def _table_holds_load(table, load_id, rows):
+    # Cached load results are only reused while the table still holds them:
+    # the last finished load recorded in the database must be the same input
+    engine = build_engine()
+    if not inspect(engine).has_table(table.name):
+        return False
+    state = current_load(engine, table)
+    if state is None or state['load_id'] != load_id:
+        return False
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(table)).scalar() == rows
+
+
+def _cached_stage(kwargs, stage, compute, verify=None, **inputs):
+    """
+    Returns the artifact reference of a stage, computing it only when no
+    previous run had the same inputs (see StageCache.fingerprint).
+
+    Args:
+        stage (str): Stage name, also the artifact name.
+        compute (callable): Produces the stage DataFrame, an iterator of
+            DataFrame chunks (written one by one), or None on failure.
+        verify (callable): Extra check of a cached reference, e.g. that the
+            side effects of the stage are still in place.
+        **inputs: files, refs, code and params of the fingerprint.
+    """
+    cache = StageCache.from_config()
+    key = cache.fingerprint(stage, **inputs) if cache is not None else None
+    if key is not None:
+        ref = cache.get(key)
+        if ref is not None and (verify is None or verify(ref)):
+            logging.info(f"{stage}: inputs unchanged, reusing {ref['path']}")
+            return ref
+
+    df = compute()
+    if df is None:
+        return None
+    if not isinstance(df, pd.DataFrame):
+        if key is not None:
+            return cache.put_chunks(key, df)
+        return _artifact_store(kwargs).write_chunks(df, stage)
+    if key is not None:
+        return cache.put_frame(key, df)
+    return _artifact_store(kwargs).write(df, stage)
+
+
+def _reports_pool(task):
+    """
+    Logs the connection pool usage and checkout waits of a database task and
+    puts them on its span, also when the task fails.
+    """
+    @functools.wraps(task)
+    def wrapper(**kwargs):
+        try:
+            return task(**kwargs)
+        finally:
+            report = pool_metrics()
+            if report:
+                logging.info(f"Database pool: {report}")
+                span = trace.get_current_span()
+                for name, value in report.items():
+                    span.set_attribute(f"db.pool.{name}", value)
+    return wrapper
+
+
+def _fails_on_invalid_data(task):
+    """
+    Fails the task without retries when its input does not pass validation:
+    a retry would read the same rows and fail the same way.
+    """
+    @functools.wraps(task)
+    def wrapper(**kwargs):
+        try:
+            return task(**kwargs)
+        except ValidationError as error:
+            try:
+                from airflow.exceptions import AirflowFailException
+            except ImportError:
+                # Called without Airflow installed
+                raise error
+            raise AirflowFailException(str(error)) from error
+    return wrapper
+
 
+@traced()
 def extract_spotify(**kwargs):
     logging.info("Starting data extraction for Spotify")
-    try:
-        spotify_data = read_spotify_csv()
-        if spotify_data is None:
-            logging.error("Failed to extract Spotify data.")
-            return None
-        logging.info("Spotify data extracted successfully.")
-    except Exception as e:
-        logging.error(f"Error extracting Spotify data: {e}")
+
+    def extract():
+        # The CSV is parsed block by block and written straight to the artifact
+        return iter_spotify_chunks()
+
+    ref = _cached_stage(kwargs, 'read_spotify', extract,
+                        files=[SPOTIFY_CSV_PATH], code=[iter_spotify_chunks, apply_schema])
+    logging.info(f"Spotify data extracted successfully: {ref['num_rows']} rows")
+    kwargs["ti"].xcom_push(key ='Spotify_data',value=ref)
+    return ref
+
+
+@traced()
+def split_spotify(**kwargs):
+    """
+    Splits the extracted Spotify rows into SPOTIFY_PARTITIONS (default 4) row
+    ranges; transform_spotify_partition is mapped over the returned list.
+    """
+    ti = kwargs["ti"]
+    ref = ti.xcom_pull(task_ids="read_spotify", key='Spotify_data')
+
+    if ref is None:
+        logging.error("No data to split.")
+        return []
+
+    partitions = max(1, min(config('SPOTIFY_PARTITIONS', default=4, cast=int), ref['num_rows']))
+    bounds = np.linspace(0, ref['num_rows'], partitions + 1).astype(int).tolist()
+    logging.info(f"Splitting {ref['num_rows']} Spotify rows into {partitions} partitions")
+    return [
+        {'partition': partition, 'start': bounds[partition], 'stop': bounds[partition + 1]}
+        for partition in range(partitions)
+    ]
+
+
+@traced()
+def transform_spotify_partition(partition, start, stop, **kwargs):
+    logging.info(f"Transforming Spotify partition {partition}: rows {start} to {stop}")
+    ti = kwargs["ti"]
+
+    ref = ti.xcom_pull(task_ids="read_spotify", key='Spotify_data')
+
+    if ref is None:
+        logging.error("No data to transform.")
         return None
-    kwargs["ti"].xcom_push(key ='Spotify_data',value=spotify_data.to_json(orient='records'))
-    return spotify_data.to_json(orient='records')
+
+    def transform():
+        # Only this partition's slice of the memory-mapped artifact is converted
+        table = ArtifactStore.read_table(ref).slice(start, stop - start)
+        return transform_spotify_partition_df(ArtifactStore.to_pandas(table))
+
+    return _cached_stage(kwargs, f'transform_spotify_{partition}', transform,
+                         refs=[ref], code=[transform_spotify_partition_df, TransformSpotify, StringNormalizer],
+                         params={'start': start, 'stop': stop})
 
 
+@traced()
 def transform_spotify(**kwargs):
     logging.info("Transforming Spotify data")
     ti = kwargs["ti"]
-    logging.info(kwargs)
 
-    str_data = ti.xcom_pull(task_ids="read_spotify", key='Spotify_data')
-    
-    if str_data is None:
+    # The return values of every mapped instance, in partition order
+    refs = ti.xcom_pull(task_ids="transform_spotify_partition")
+    refs = list(refs) if refs is not None else []
+
+    if not refs or any(ref is None for ref in refs):
         logging.error("No data to transform.")
         return None
 
-    json_data = json.loads(str_data)
-    transformer = TransformSpotify(pd.DataFrame(json_data))
-    
-    transformer.unnamed_to_id()
-    transformer.drop_nan_records()
-    transformer.normalize_data()
-    transformer.filter_max_popularity_tracks()
-    
-    transformed_data = transformer.df.to_json(orient='records')
-    logging.info(f"Transformed Spotify data: {transformer.df.head()}")
-    return transformed_data
+    transformed_ref = _cached_stage(kwargs, 'transform_spotify',
+                                    lambda: reduce_spotify_partitions_df([ArtifactStore.read(ref) for ref in refs]),
+                                    refs=refs, code=[reduce_spotify_partitions_df, TransformSpotify, apply_schema])
+    logging.info(f"Transformed Spotify data: {transformed_ref['num_rows']} rows")
+    return transformed_ref
 
 
+@traced()
+@_fails_on_invalid_data
+@_reports_pool
 def extract_grammy(**kwargs):
     logging.info("Starting data extraction for Grammy")
-    try:
+
+    def extract():
         grammy_data = read_grammy_db()
         if grammy_data is None:
-            logging.error("Failed to extract Grammy data.")
-            return None
+            raise RuntimeError("Failed to extract Grammy data.")
         logging.info("Grammy data extracted successfully.")
-    except Exception as e:
-        logging.error(f"Error extracting Grammy data: {e}")
-        return None
-    
-    kwargs["ti"].xcom_push(key ='Grammy_data',value=grammy_data.to_json(orient='records'))
-    return grammy_data.to_json(orient='records')
+        return grammy_data
 
+    # An unchanged CSV skips both the read and the reload of grammy_awards
+    ref = _cached_stage(kwargs, 'read_grammy', extract,
+                        verify=lambda cached: _table_holds_load(GrammyAward.__table__, file_sha256(GRAMMY_CSV_PATH),
+                                                                cached['num_rows']),
+                        files=[GRAMMY_CSV_PATH], code=[read_grammy_db, TransformGrammy, apply_schema, bulk_load, incremental_load, current_load])
+    kwargs["ti"].xcom_push(key ='Grammy_data',value=ref)
+    return ref
 
+
+@traced()
 def transform_grammy(**kwargs):
     logging.info("Transforming Grammy data")
     ti = kwargs["ti"]
-    logging.info(kwargs)
 
-    str_data = ti.xcom_pull(task_ids="read_grammy", key='Grammy_data')
-    
-    if str_data is None:
+    ref = ti.xcom_pull(task_ids="read_grammy", key='Grammy_data')
+
+    if ref is None:
         logging.error("No data to transform.")
         return None
 
-    json_data = json.loads(str_data)
-    transformer = TransformGrammy(pd.DataFrame(json_data))
-    
-    transformer.insert_ids()
-    transformer.remove_unwanted_grammmy_columns()
-    transformer.remove_na_nominees()
-    transformer.extract_artists()
-    transformer.remove_parentheses_from_artists()
-    transformer.mark_winners()
-    transformer.normalize_data()
-    transformer.filter_winners()
-    
-    transformed_data = transformer.df.to_json(orient='records')
-    logging.info(f"Transformed Grammy data: {transformer.df.head()}")
-    return transformed_data
+    transformed_ref = _cached_stage(kwargs, 'transform_grammy', lambda: transform_grammy_df(ArtifactStore.read(ref)),
+                                    refs=[ref], code=[transform_grammy_df, TransformGrammy, StringNormalizer, apply_schema])
+    logging.info(f"Transformed Grammy data: {transformed_ref['num_rows']} rows")
+    return transformed_ref
 
 
+@traced()
 def merge_data(**kwargs):
     logging.info("Starting merge process")
     ti = kwargs["ti"]
-    
-    str_data_grammy = ti.xcom_pull(task_ids="transform_grammy")
-    str_data_spotify = ti.xcom_pull(task_ids="transform_spotify")
 
-    if str_data_grammy is None or str_data_spotify is None:
+    ref_grammy = ti.xcom_pull(task_ids="transform_grammy")
+    ref_spotify = ti.xcom_pull(task_ids="transform_spotify")
+
+    if ref_grammy is None or ref_spotify is None:
         logging.error("No data to merge.")
         return None
-    
-    json_data_grammy = json.loads(str_data_grammy)
-    json_data_spotify = json.loads(str_data_spotify)
 
-    grammy_df = pd.json_normalize(data=json_data_grammy)
-    spotify_df = pd.json_normalize(data=json_data_spotify)
+    def merge():
+        # The streaming merge never loads the Spotify artifact as a whole
+        if merge_mode == 'stream':
+            return stream_merge(ArtifactStore.read(ref_grammy), lambda: iter_artifact_chunks(ref_spotify),
+                                checkpoint=checkpoint)
+        merge_data = MergeData(ArtifactStore.read(ref_grammy), ArtifactStore.read(ref_spotify))
+        return merge_data.merge(checkpoint=checkpoint)
 
-    merge_data = MergeData(grammy_df, spotify_df)
-    merged_df = merge_data.merge()
-    logging.info(f"Merged data ready: {merged_df.head()}")
-    kwargs["ti"].xcom_push(key ='Merged_data',value=merged_df.to_json(orient='records'))
-    return merged_df.to_json(orient='records')
+    merge_mode = config('MERGE_MODE', default='memory')
+    inputs = dict(refs=[ref_grammy, ref_spotify],
+                  code=[MergeData, ArtistMatcher, TrackMatcher, stream_merge, apply_schema],
+                  params={'mode': merge_mode})
+    # Parts finished by a failed attempt are reused by the retry
+    checkpoint = ChunkCheckpoint.open('merge', refs=inputs['refs'], code=inputs['code'], params={
+        **inputs['params'],
+        'workers': config('MERGE_WORKERS', default=1, cast=int),
+        'chunk_rows': export_chunk_rows(),
+        'track_match': config('TRACK_MATCH', default='fuzzy'),
+    })
+    ref = _cached_stage(kwargs, 'merge', merge, **inputs)
+    if ref is None:
+        return None
+    if checkpoint is not None:
+        checkpoint.clear()
+    logging.info(f"Merged data ready: {ref['num_rows']} rows")
+    kwargs["ti"].xcom_push(key ='Merged_data',value=ref)
+    return ref
 
+@traced()
+@_fails_on_invalid_data
+@_reports_pool
 def load_data_to_db(**kwargs):
     logging.info("Starting load process")
     ti = kwargs["ti"]
-    str_data = ti.xcom_pull(task_ids="merge")
-    
-    if str_data is None:
+    ref = ti.xcom_pull(task_ids="merge")
+
+    if ref is None:
         logging.error("No data to load.")
         return None
-    
-    json_data = json.loads(str_data)
-    data = pd.json_normalize(data=json_data)
-    
-    logging.info(f"Data to load is: {data}")
+
+    logging.info(f"Data to load has {ref['num_rows']} rows")
     logging.info("Loading data")
 
-    try:
-        loaded_data = load_data(data) 
+    def load():
+        # Full loads commit chunk by chunk; a retry on the same artifact resumes
+        # Failures propagate, so Airflow retries the task and it resumes
+        if merge_mode == 'stream':
+            return load_chunks(lambda: iter_artifact_chunks(ref), load_id=ref['sha256'])
+        loaded_data = load_data(ArtifactStore.read(ref), load_id=ref['sha256'])
         logging.info("Data loaded successfully into: merged_data")
-    except Exception as e:
-        logging.error(f"Error loading data: {e}")
-    
-    kwargs["ti"].xcom_push(key ='Loaded_data',value=loaded_data.to_json(orient='records'))
-    return loaded_data.to_json(orient='records')
+        return loaded_data
 
+    merge_mode = config('MERGE_MODE', default='memory')
+    loaded_ref = _cached_stage(kwargs, 'load', load,
+                               verify=lambda cached: _table_holds_load(MergedDAta.__table__, ref['sha256'], cached['num_rows']),
+                               refs=[ref], code=[load_data, load_chunks, bulk_load, incremental_load, finalize_load,
+                                                 summaries, completed_chunks, current_load],
+                               params={'mode': merge_mode, 'load_mode': config('LOAD_MODE', default='incremental')})
+    if loaded_ref is None:
+        raise RuntimeError("The load produced no data for merged_data.")
+    kwargs["ti"].xcom_push(key ='Loaded_data',value=loaded_ref)
+    return loaded_ref
 
+
+@traced()
+@_reports_pool
 def store_drive(**kwargs):
     logging.info("Starting store process")
     ti = kwargs["ti"]
-    str_data = ti.xcom_pull(task_ids="load")
-    
-    if str_data is None:
+    ref = ti.xcom_pull(task_ids="load")
+
+    if ref is None:
         logging.error("No data to store.")
         return None
-    
-    json_data = json.loads(str_data)
-    data = pd.json_normalize(data=json_data)
-    
-    logging.info(f"Data to store is: {data}")
+
+    logging.info(f"Data to store has {ref['num_rows']} rows")
     logging.info("Storing data")
 
-    csv_buffer = io.StringIO()
-    data.to_csv(csv_buffer, index=False)
-    csv_bytes = csv_buffer.getvalue().encode('utf-8')
+    # The upload of a load result that was already stored is skipped
+    cache = StageCache.from_config()
+    if cache is not None:
+        from src.store.store import upload_file
+        key = cache.fingerprint('store', refs=[ref], code=[export_and_upload, export_chunks, upload_file],
+                                params={'format': config('EXPORT_FORMAT', default='csv.gz'),
+                                        'source': config('EXPORT_SOURCE', default='artifact')})
+        stored_data = cache.get(key)
+        if stored_data is not None:
+            logging.info(f"store: inputs unchanged, already stored as {stored_data}")
+            return stored_data
+
+    # Rows are streamed chunk by chunk from the artifact (or the loaded table)
+    if config('EXPORT_SOURCE', default='artifact') == 'database':
+        chunks = iter_table_chunks(MergedDAta.__tablename__, build_engine())
+    else:
+        chunks = iter_artifact_chunks(ref)
 
-    try:
-        stored_data = upload_file(csv_bytes) 
-        logging.info("Data stored successfully")
-    except Exception as e:
-        logging.error(f"Error storing data: {e}")
-    
+    # Upload errors propagate, so Airflow retries the task
+    stored_data = export_and_upload(chunks)
+    logging.info(f"Data stored successfully: {stored_data}")
 
+    if cache is not None:
+        cache.put(key, stored_data)
+    return stored_data
@@ -1,31 +1,48 @@
 """
-This module provides functionality to build a SQLAlchemy engine for connecting
+This module provides functionality to build SQLAlchemy engines for connecting
 to a PostgreSQL database using configuration values from environment variables.
 
-It defines the following function:
-- build_engine: Creates and returns a SQLAlchemy engine for the database.
+It defines the following functions:
+- database_url: Builds the connection URL from environment variables.
+- get_engine: Returns the process-wide pooled engine for a connection URL.
+- build_engine: Returns the pooled engine for the configured database.
+- connection: Context manager that checks a connection out of the pool.
+- transaction: Context manager that yields a connection inside a transaction.
+- pool_metrics: Reports pool usage and checkout-wait statistics.
+- TimedQueuePool: QueuePool that records how long every checkout waited.
 
 Usage:
-    This module is used to establish a connection to a PostgreSQL database by creating an engine
-    with SQLAlchemy. The `build_engine` function retrieves connection details from environment variables
-    and handles potential errors during the connection process.
-    
+    Engines are cached per connection URL, so every task running in the same
+    worker process shares one connection pool instead of opening a new engine on
+    every call. Pool settings are read from DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT, DB_POOL_RECYCLE and DB_POOL_PRE_PING. Every checkout of
+    the pool is timed, whichever code opens the connection, so pool_metrics
+    covers the loads, reads and summaries alike.
+
+        with transaction() as conn:
+            conn.execute(...)
 """
+import os
+import threading
+import time
+from contextlib import contextmanager
+
 from decouple import config, UndefinedValueError
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool
 
-def build_engine():
-    """
-    Creates a SQLAlchemy engine for connecting to the PostgreSQL database using
-    configuration values from environment variables.
+_engines = {}
+_metrics = {}
+_lock = threading.Lock()
 
-    Returns:
-        sqlalchemy.engine.base.Engine: The SQLAlchemy engine connected to the database.
+
+def database_url():
+    """
+    Builds the database URL from the PG* environment variables.
 
     Raises:
         UndefinedValueError: If any required environment variable is missing.
-        SQLAlchemyError: If there is an error connecting to the database.
     """
     try:
         dialect = config('PGDIALECT')
@@ -38,12 +55,181 @@ def build_engine():
         print(f"Missing environment variable: {e}")
         raise
 
-    database_url = (f"{dialect}://{user}:{passwd}@{host}:{port}/{db}")
+    return f"{dialect}://{user}:{passwd}@{host}:{port}/{db}"
 
-    # Test the connection
-    try:
-        engine = create_engine(database_url)
-        print(f"Successfully connected to the database {db}!")
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool recording the time every checkout waits for a connection (a free
+    one, a new one or one released by another thread) into the engine metrics.
+    """
+    metrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics is not None:
+                _record_wait(self.metrics, time.perf_counter() - started)
+
+    def recreate(self):
+        # engine.dispose() replaces the pool; the counters carry over
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def _pool_options(url):
+    # SQLite engines use SingletonThreadPool/NullPool, which take no sizing options
+    if url.startswith('sqlite'):
+        return {}
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': config('DB_POOL_SIZE', default=5, cast=int),
+        'max_overflow': config('DB_MAX_OVERFLOW', default=10, cast=int),
+        'pool_timeout': config('DB_POOL_TIMEOUT', default=30, cast=int),
+        'pool_recycle': config('DB_POOL_RECYCLE', default=1800, cast=int),
+        'pool_pre_ping': config('DB_POOL_PRE_PING', default=True, cast=bool),
+    }
+
+
+def _track_pool_events(engine, metrics):
+    def on_connect(dbapi_connection, connection_record):
+        with _lock:
+            metrics['connections_opened'] += 1
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        with _lock:
+            metrics['checkouts'] += 1
+
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        with _lock:
+            metrics['invalidations'] += 1
+
+    event.listen(engine, 'connect', on_connect)
+    event.listen(engine, 'checkout', on_checkout)
+    event.listen(engine, 'invalidate', on_invalidate)
+
+
+def get_engine(url=None, **options):
+    """
+    Returns the engine registered for a connection URL, creating it on first use.
+
+    The registry is keyed by process id as well, so a forked worker never reuses
+    the sockets of a pool inherited from its parent.
+
+    Args:
+        url (str): Connection URL; defaults to the one built from the PG* variables.
+        **options: Extra create_engine arguments, overriding the pool settings.
+
+    Returns:
+        sqlalchemy.engine.base.Engine: The shared engine for that URL.
+
+    Raises:
+        SQLAlchemyError: If the engine cannot be created.
+    """
+    if url is None:
+        url = database_url()
+    key = (os.getpid(), url)
+
+    with _lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            return engine
+
+        try:
+            engine = create_engine(url, **{**_pool_options(url), **options})
+        except SQLAlchemyError as e:
+            print(f"Failed to connect to the database: {e}")
+            raise
+
+        metrics = {
+            'connections_opened': 0,
+            'checkouts': 0,
+            'invalidations': 0,
+            'checkout_waits': 0,
+            'checkout_wait_total_s': 0.0,
+            'checkout_wait_max_s': 0.0,
+        }
+        _track_pool_events(engine, metrics)
+        if isinstance(engine.pool, TimedQueuePool):
+            engine.pool.metrics = metrics
+        _engines[key] = engine
+        _metrics[key] = metrics
+        print(f"Successfully connected to the database {engine.url.database}!")
         return engine
-    except SQLAlchemyError as e:
-        print(f"Failed to connect to the database: {e}")
\ No newline at end of file
+
+
+def build_engine():
+    """
+    Returns the pooled SQLAlchemy engine for the PostgreSQL database configured
+    through environment variables.
+
+    Returns:
+        sqlalchemy.engine.base.Engine: The SQLAlchemy engine connected to the database.
+
+    Raises:
+        UndefinedValueError: If any required environment variable is missing.
+        SQLAlchemyError: If there is an error connecting to the database.
+    """
+    return get_engine()
+
+
+def _record_wait(metrics, waited):
+    with _lock:
+        metrics['checkout_waits'] += 1
+        metrics['checkout_wait_total_s'] += waited
+        metrics['checkout_wait_max_s'] = max(metrics['checkout_wait_max_s'], waited)
+
+
+@contextmanager
+def connection(url=None):
+    """
+    Checks a connection out of the shared pool and returns it on exit.
+    """
+    if url is None:
+        url = database_url()
+    conn = get_engine(url).connect()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+@contextmanager
+def transaction(url=None):
+    """
+    Yields a pooled connection inside a transaction that is committed on success
+    and rolled back if the block raises.
+    """
+    with connection(url) as conn:
+        with conn.begin():
+            yield conn
+
+
+def pool_metrics(url=None):
+    """
+    Reports the state of the pool behind a connection URL.
+
+    Returns:
+        dict: Pool size, checked-in/out and overflow connections, plus the
+        counters collected since the engine was created (connections opened,
+        checkouts, invalidations and the time spent waiting for a checkout).
+    """
+    if url is None:
+        url = database_url()
+    key = (os.getpid(), url)
+    engine = _engines.get(key)
+    if engine is None:
+        return {}
+
+    pool = engine.pool
+    with _lock:
+        report = dict(_metrics[key])
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        if hasattr(pool, name):
+            report[name] = getattr(pool, name)()
+    if report['checkout_waits']:
+        report['checkout_wait_avg_s'] = report['checkout_wait_total_s'] / report['checkout_waits']
+    return report
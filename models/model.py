@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer,Float, String, DateTime, Boolean
+from sqlalchemy import Column, Integer,Float, String, DateTime, Boolean, BigInteger, Index, text
 from sqlalchemy.orm import declarative_base
 
 base = declarative_base()
@@ -17,6 +17,7 @@ class GrammyAward(base):
     workers = Column(String, nullable=True)
     img = Column(String, nullable=True)
     winner = Column(Boolean, nullable=False)
+    row_hash = Column(BigInteger, nullable=True)
 
     def __str__(self):
         attributes = ", ".join(f"{key}={value}" for key, value in self.__dict__.items())
@@ -24,6 +25,16 @@ class GrammyAward(base):
 
 class MergedDAta(base):
     __tablename__ = 'merged_data'
+    # Secondary indexes for the dashboard filters; the load stage builds them
+    # after the bulk insert (see src/load/finalize.py)
+    __table_args__ = (
+        Index('ix_merged_data_artists', 'artists'),
+        Index('ix_merged_data_track_genre_winner', 'track_genre', 'grammy_winner'),
+        Index('ix_merged_data_grammy_year', 'grammy_year'),
+        # Only the few Grammy-winning tracks, by year
+        Index('ix_merged_data_winners_year', 'grammy_year',
+              postgresql_where=text('grammy_winner'), sqlite_where=text('grammy_winner')),
+    )
 
     ID = Column(Integer, primary_key=True)
     track_id = Column(String, nullable=False) 
@@ -49,7 +60,40 @@ class MergedDAta(base):
     grammy_winner = Column(Boolean, nullable=False, default=False)
     grammy_year = Column(Integer, nullable=True)
     number_wins = Column(Integer, nullable=True, default=0)
+    row_hash = Column(BigInteger, nullable=True)
 
     def __str__(self):
         attributes = ", ".join(f"{key}={value}" for key, value in self.__dict__.items())
-        return f"Grammy({attributes})"
\ No newline at end of file
+        return f"Grammy({attributes})"
+
+
+class LoadCheckpoint(base):
+    # Chunks committed by a full load that has not finished yet, so a retry
+    # continues after them (see src/load/checkpoint.py)
+    __tablename__ = 'load_checkpoints'
+
+    table_name = Column(String, primary_key=True)
+    load_id = Column(String, primary_key=True)
+    chunk = Column(Integer, primary_key=True)
+    num_rows = Column(Integer, nullable=False)
+    loaded_at = Column(DateTime, nullable=False)
+
+    def __str__(self):
+        attributes = ", ".join(f"{key}={value}" for key, value in self.__dict__.items())
+        return f"LoadCheckpoint({attributes})"
+
+
+class LoadState(base):
+    # The last finished load of every table: the load stage cache and the
+    # read-side query cache check it (see src/load/load_state.py)
+    __tablename__ = 'load_state'
+
+    table_name = Column(String, primary_key=True)
+    load_id = Column(String, nullable=True)
+    generation = Column(Integer, nullable=False)
+    num_rows = Column(Integer, nullable=False)
+    loaded_at = Column(DateTime, nullable=False)
+
+    def __str__(self):
+        attributes = ", ".join(f"{key}={value}" for key, value in self.__dict__.items())
+        return f"LoadState({attributes})"
@@ -0,0 +1,116 @@
+"""
+This module derives the compact pandas dtypes used across the pipeline from the
+SQLAlchemy models in models/model.py.
+
+It defines the following:
+- GRAMMY_SCHEMA, SPOTIFY_SCHEMA, MERGED_SCHEMA: column -> dtype mappings.
+- arrow_types: The same schema as pyarrow types, for the CSV streaming readers.
+- apply_schema: Casts the columns of a DataFrame to a schema.
+
+Usage:
+    Every model column is mapped by type: text becomes a pyarrow-backed string,
+    or a categorical for the low-cardinality columns listed in CATEGORICAL;
+    floats become float32; integers get the smallest width their domain needs
+    (SMALL_INTS), nullable columns use the pandas nullable dtypes.
+"""
+import pandas as pd
+import pyarrow as pa
+from sqlalchemy import Boolean, Float, Integer
+
+from models.model import GrammyAward, MergedDAta
+
+STRING = 'string[pyarrow]'
+
+# Text columns with few distinct values, stored as categoricals
+CATEGORICAL = {'track_genre', 'title', 'category'}
+
+# Integer columns whose values fit a narrower type than int64
+SMALL_INTS = {
+    'popularity': 'int8',
+    'key': 'int8',
+    'mode': 'int8',
+    'time_signature': 'int8',
+    'duration_ms': 'int32',
+    'year': 'int16',
+    'grammy_year': 'int16',
+    'number_wins': 'int16',
+}
+
+NUMPY_INTS = {'int8', 'int16', 'int32', 'int64'}
+
+# Columns maintained by the loader rather than the pipeline
+LOADER_COLUMNS = {'row_hash'}
+
+# Columns of merged_data that are added by the merge, not read from Spotify
+MERGE_COLUMNS = {'grammy_winner', 'grammy_year', 'number_wins'}
+
+
+def _dtype(column):
+    if column.name in CATEGORICAL:
+        return 'category'
+    if isinstance(column.type, Boolean):
+        return 'boolean' if column.nullable else 'bool'
+    if isinstance(column.type, Integer):
+        dtype = SMALL_INTS.get(column.name, 'int64')
+        return dtype.capitalize() if column.nullable else dtype
+    if isinstance(column.type, Float):
+        return 'float32'
+    # String and DateTime columns; timestamps are kept as the source text
+    return STRING
+
+
+def model_schema(model, exclude=()):
+    """
+    Maps every column of a model, except those in exclude, to its pandas dtype.
+    """
+    return {
+        column.name: _dtype(column)
+        for column in model.__table__.columns
+        if column.name not in LOADER_COLUMNS and column.name not in exclude
+    }
+
+
+GRAMMY_SCHEMA = model_schema(GrammyAward)
+MERGED_SCHEMA = model_schema(MergedDAta)
+SPOTIFY_SCHEMA = model_schema(MergedDAta, exclude=MERGE_COLUMNS)
+
+
+def arrow_types(schema):
+    """
+    Converts a schema to the pyarrow types pyarrow.csv uses to parse it.
+    """
+    types = {}
+    for name, dtype in schema.items():
+        if dtype == 'category':
+            types[name] = pa.dictionary(pa.int32(), pa.string())
+        elif dtype == STRING:
+            types[name] = pa.string()
+        elif dtype in ('bool', 'boolean'):
+            types[name] = pa.bool_()
+        else:
+            types[name] = pa.from_numpy_dtype(dtype.lower())
+    return types
+
+
+def _cast(values, name, dtype):
+    cast = values.astype(dtype)
+    # numpy wraps integers that overflow a narrower type and truncates floats,
+    # where the nullable dtypes refuse the cast
+    if dtype in NUMPY_INTS and pd.api.types.is_numeric_dtype(values) and not (cast == values).all():
+        raise ValueError(f"Column {name} has values that do not fit {dtype}")
+    return cast
+
+
+def apply_schema(df, schema):
+    """
+    Casts, in place, every column of df that appears in schema and does not
+    already have the expected dtype. Columns missing from df are ignored.
+
+    Raises:
+        ValueError: If a numeric column would lose values in a narrower
+            integer dtype.
+    """
+    for name, dtype in schema.items():
+        if name in df.columns and df[name].dtype != dtype:
+            df[name] = _cast(df[name], name, dtype)
+    return df
@@ -0,0 +1,48 @@
+"""
+This module declares the summary tables precomputed from merged_data for the
+dashboard.
+
+It defines the following:
+- SUMMARIES: summary name -> (SELECT statement, group-by columns).
+
+Usage:
+    On PostgreSQL every summary is a materialized view, elsewhere a plain table;
+    src/load/finalize.py creates and refreshes them after each load. The
+    group-by columns get a unique index, so the dashboard reads one row per
+    year, or per genre and winner status.
+"""
+from sqlalchemy import case, func, select
+
+from models.model import MergedDAta
+
+merged = MergedDAta.__table__
+
+AUDIO_FEATURES = [
+    'danceability', 'energy', 'loudness', 'speechiness', 'acousticness',
+    'instrumentalness', 'liveness', 'valence', 'tempo',
+]
+
+# Grammy wins of the Spotify tracks, per award year
+wins_by_year = select(
+    merged.c.grammy_year,
+    func.count().label('tracks'),
+    func.count(merged.c.artists.distinct()).label('artists'),
+    func.sum(case((merged.c.grammy_winner, 1), else_=0)).label('winning_tracks'),
+    func.sum(merged.c.number_wins).label('wins'),
+).where(merged.c.grammy_year.isnot(None)).group_by(merged.c.grammy_year)
+
+# Popularity and audio features per genre, for winners and the other tracks
+genre_stats = select(
+    merged.c.track_genre,
+    merged.c.grammy_winner,
+    func.count().label('tracks'),
+    func.avg(merged.c.popularity).label('avg_popularity'),
+    func.max(merged.c.popularity).label('max_popularity'),
+    func.avg(merged.c.duration_ms).label('avg_duration_ms'),
+    *(func.avg(merged.c[feature]).label(f'avg_{feature}') for feature in AUDIO_FEATURES),
+).group_by(merged.c.track_genre, merged.c.grammy_winner)
+
+SUMMARIES = {
+    'merged_wins_by_year': (wins_by_year, ['grammy_year']),
+    'merged_genre_stats': (genre_stats, ['track_genre', 'grammy_winner']),
+}
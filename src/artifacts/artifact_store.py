@@ -0,0 +1,190 @@
+"""
+This module provides a columnar artifact store used to hand DataFrames from one
+ETL task to the next without serializing them through XCom.
+
+Each stage writes its output as an Arrow IPC (or Parquet) file under a base
+directory and only a small reference is pushed to XCom:
+
+    {"path": ..., "format": ..., "schema": ..., "num_rows": ..., "sha256": ...}
+
+The consumer reads the file back with a memory map, so Arrow IPC artifacts are
+opened zero-copy and only materialized when converted to pandas.
+
+Usage:
+    store = ArtifactStore.for_run(run_id)
+    ref = store.write(df, 'transform_spotify')
+    df = store.read(ref)
+"""
+import hashlib
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from decouple import config
+
+FORMATS = ('arrow', 'parquet')
+HASH_CHUNK_SIZE = 1 << 20
+
+# Text columns come back as pyarrow-backed strings, as written by models/schema.py
+_PANDAS_TYPES = {
+    pa.string(): pd.StringDtype('pyarrow'),
+    pa.large_string(): pd.StringDtype('pyarrow'),
+}
+
+
+def file_sha256(path):
+    """
+    Computes the SHA-256 of a file, reading it in fixed-size chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+
+    def __init__(self, base_dir, fmt='arrow'):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported artifact format: {fmt}")
+        self.base_dir = base_dir
+        self.fmt = fmt
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    @classmethod
+    def for_run(cls, run_id=None):
+        """
+        Builds a store rooted at ARTIFACT_DIR (default ./artifacts), in a
+        sub-directory per DAG run so concurrent runs never share files.
+        """
+        base_dir = config('ARTIFACT_DIR', default='./artifacts')
+        fmt = config('ARTIFACT_FORMAT', default='arrow')
+        if run_id:
+            base_dir = os.path.join(base_dir, re.sub(r'[^A-Za-z0-9_.-]', '_', run_id))
+        return cls(base_dir, fmt)
+
+    def _path(self, name):
+        extension = 'arrow' if self.fmt == 'arrow' else 'parquet'
+        return os.path.join(self.base_dir, f"{name}.{extension}")
+
+    def write(self, df, name):
+        """
+        Writes a DataFrame as a columnar artifact and returns its reference.
+
+        The file is written to a temporary path and renamed into place, so a
+        reader never observes a half-written artifact.
+
+        Returns:
+            dict: JSON-serializable reference with path, format, schema,
+            row count and content hash.
+        """
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        path = self._path(name)
+        tmp_path = f"{path}.tmp"
+
+        if self.fmt == 'arrow':
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+        return {
+            'path': os.path.abspath(path),
+            'format': self.fmt,
+            'schema': {field.name: str(field.type) for field in table.schema},
+            'num_rows': table.num_rows,
+            'sha256': file_sha256(path),
+        }
+
+    def write_chunks(self, chunks, name):
+        """
+        Writes DataFrame chunks one after the other into a single artifact, so
+        only one chunk is ever held in memory. Returns the same reference as
+        write.
+
+        The schema is taken from the first chunk. Categorical columns are
+        written as plain strings, since every chunk has its own categories and
+        an IPC file holds a single dictionary per column.
+        """
+        path = self._path(name)
+        tmp_path = f"{path}.tmp"
+        schema, writer, sink, num_rows = None, None, None, 0
+
+        try:
+            for df in chunks:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    # The pandas metadata is kept, so nullable integers read back as such
+                    schema = pa.schema([
+                        field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+                        for field in table.schema
+                    ], metadata=table.schema.metadata)
+                    if self.fmt == 'arrow':
+                        sink = pa.OSFile(tmp_path, 'wb')
+                        writer = pa.ipc.new_file(sink, schema)
+                    else:
+                        writer = pq.ParquetWriter(tmp_path, schema)
+                writer.write_table(table.select(schema.names).cast(schema))
+                num_rows += table.num_rows
+            if writer is None:
+                raise ValueError(f"No chunks to write for artifact {name}")
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            if sink is not None:
+                sink.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        writer.close()
+        if sink is not None:
+            sink.close()
+        os.replace(tmp_path, path)
+
+        return {
+            'path': os.path.abspath(path),
+            'format': self.fmt,
+            'schema': {field.name: str(field.type) for field in schema},
+            'num_rows': num_rows,
+            'sha256': file_sha256(path),
+        }
+
+    @staticmethod
+    def read_table(ref, verify=False):
+        """
+        Opens the artifact behind a reference as a pyarrow Table.
+
+        Arrow IPC artifacts are memory-mapped, so their buffers are not copied
+        into the process heap.
+
+        Raises:
+            ValueError: If verify is set and the content hash does not match.
+        """
+        path = ref['path']
+        if verify and file_sha256(path) != ref['sha256']:
+            raise ValueError(f"Artifact {path} does not match its recorded hash")
+
+        if ref['format'] == 'arrow':
+            source = pa.memory_map(path, 'r')
+            return pa.ipc.open_file(source).read_all()
+        return pq.read_table(path, memory_map=True)
+
+    @classmethod
+    def read(cls, ref, verify=False):
+        """
+        Reads the artifact behind a reference back into a pandas DataFrame.
+        """
+        return cls.to_pandas(cls.read_table(ref, verify=verify))
+
+    @staticmethod
+    def to_pandas(table):
+        """
+        Converts an Arrow table or record batch read from an artifact to pandas.
+        """
+        return table.to_pandas(types_mapper=_PANDAS_TYPES.get)
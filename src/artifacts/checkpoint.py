@@ -0,0 +1,133 @@
+"""
+This module keeps the partial results of a stage on disk, so a retried task
+continues from the first unfinished chunk instead of starting over.
+
+It defines the following:
+- ChunkCheckpoint: The parts (chunks, partitions or intermediate frames) a
+  stage has finished, recorded in a manifest under CHECKPOINT_DIR.
+
+Usage:
+    checkpoint = ChunkCheckpoint.open('merge', refs=[grammy_ref, spotify_ref], code=[MergeData])
+    for index, chunk in enumerate(chunks):
+        merged = checkpoint.read(f'chunk_{index}')
+        if merged is None:
+            merged = checkpoint.write(f'chunk_{index}', enrich(chunk))
+        yield merged
+    checkpoint.clear()
+
+    A checkpoint belongs to the inputs of the stage (content hashes of the
+    upstream artifacts, source code and params, as in StageCache.fingerprint),
+    so a retry, or a later run on the same inputs, picks it up while anything
+    else starts a new one. Every part is written as an Arrow artifact and then
+    recorded in manifest.json, which is replaced atomically: a crash costs at
+    most the part being written. The stage clears its checkpoint once its
+    output is written; only the latest CHECKPOINT_KEEP checkpoints of a stage
+    left by failed runs are kept.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+from decouple import config
+
+from src.artifacts.artifact_store import ArtifactStore
+from src.artifacts.stage_cache import code_version
+
+
+class ChunkCheckpoint:
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.store = ArtifactStore(directory)
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        try:
+            with open(self.manifest_path) as f:
+                self.parts = json.load(f)
+        except (OSError, ValueError):
+            self.parts = {}
+
+    @classmethod
+    def open(cls, stage, refs=(), code=(), params=None):
+        """
+        Opens the checkpoint of a stage run under CHECKPOINT_DIR (default
+        ./cache/checkpoints); an empty value disables checkpoints and returns
+        None.
+        """
+        base_dir = config('CHECKPOINT_DIR', default='./cache/checkpoints')
+        if not base_dir:
+            return None
+        inputs = {
+            'refs': [ref['sha256'] for ref in refs],
+            'code': code_version(*code),
+            'params': params,
+        }
+        digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8'))
+        checkpoint = cls(os.path.join(base_dir, f"{stage}-{digest.hexdigest()[:32]}"))
+        _evict(base_dir, stage, config('CHECKPOINT_KEEP', default=3, cast=int))
+        if checkpoint.parts:
+            print(f"Resuming {stage} from its checkpoint: {len(checkpoint.parts)} parts already done")
+        return checkpoint
+
+    def _save(self):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.parts, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def get(self, name):
+        """
+        Returns the artifact reference of a finished part, or None. Parts whose
+        file is gone or has a different size are treated as not done.
+        """
+        entry = self.parts.get(name)
+        if entry is None:
+            return None
+        path = entry['ref']['path']
+        if not os.path.exists(path) or os.path.getsize(path) != entry['size']:
+            return None
+        return entry['ref']
+
+    def read(self, name):
+        """
+        Reads a finished part back as a DataFrame, or returns None.
+        """
+        ref = self.get(name)
+        return ArtifactStore.read(ref) if ref is not None else None
+
+    def record(self, name, ref):
+        """
+        Marks a part as done, once its artifact (ref) is written in the
+        checkpoint directory.
+        """
+        self.parts[name] = {'ref': ref, 'size': os.path.getsize(ref['path'])}
+        self._save()
+        return ref
+
+    def write(self, name, df):
+        """
+        Writes a part and marks it as done.
+
+        Returns:
+            pd.DataFrame: df, unchanged.
+        """
+        self.record(name, self.store.write(df, name))
+        return df
+
+    def clear(self):
+        """
+        Deletes the checkpoint, once the stage output is safely written.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.parts = {}
+
+
+def _evict(base_dir, stage, keep):
+    # Checkpoints of failed runs on other inputs, oldest first
+    entries = sorted(
+        (os.path.getmtime(os.path.join(base_dir, name)), name)
+        for name in os.listdir(base_dir)
+        if name.rsplit('-', 1)[0] == stage
+    )
+    for _, name in entries[:-max(1, keep)]:
+        shutil.rmtree(os.path.join(base_dir, name), ignore_errors=True)
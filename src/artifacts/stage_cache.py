@@ -0,0 +1,168 @@
+"""
+This module provides a cache of stage results keyed by a fingerprint of the
+stage inputs, so a run whose inputs did not change reuses the previous output
+instead of recomputing it.
+
+It defines the following:
+- code_version: Hashes the source code of the modules of a stage.
+- StageCache: Stores stage outputs (artifact references or small JSON results)
+  under STAGE_CACHE_DIR.
+
+Usage:
+    cache = StageCache.from_config()
+    key = cache.fingerprint('transform_spotify', refs=[upstream_ref], code=[TransformSpotify])
+    ref = cache.get(key)
+    if ref is None:
+        ref = cache.put_frame(key, transform(df))
+
+    A fingerprint covers the content hash of every input file (re-hashed only
+    when the file's size or mtime changes), the content hash of every upstream
+    artifact and the source code of the stage. Only the latest entries of every
+    stage are kept (STAGE_CACHE_KEEP).
+"""
+import hashlib
+import inspect
+import json
+import os
+
+from decouple import config
+
+from src.artifacts.artifact_store import ArtifactStore, file_sha256
+
+
+def code_version(*objects):
+    """
+    Hashes the source of the whole module of every given function, class or
+    module, so editing a helper next to a transform changes the version too.
+    """
+    digest = hashlib.sha256()
+    for module in dict.fromkeys(inspect.getmodule(obj) for obj in objects):
+        digest.update(inspect.getsource(module).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class StageCache:
+
+    def __init__(self, base_dir, keep=3):
+        self.base_dir = base_dir
+        self.keep = max(1, keep)
+        os.makedirs(self.base_dir, exist_ok=True)
+        self.hashes_path = os.path.join(self.base_dir, 'file_hashes.json')
+
+    @classmethod
+    def from_config(cls):
+        """
+        Builds the cache from STAGE_CACHE_DIR (default ./cache/stages); an empty
+        value disables it and returns None.
+        """
+        base_dir = config('STAGE_CACHE_DIR', default='./cache/stages')
+        if not base_dir:
+            return None
+        return cls(base_dir, keep=config('STAGE_CACHE_KEEP', default=3, cast=int))
+
+    def _file_hash(self, path):
+        # Content hashes are memoized by (size, mtime) so unchanged files are not re-read
+        try:
+            with open(self.hashes_path) as f:
+                hashes = json.load(f)
+        except (OSError, ValueError):
+            hashes = {}
+
+        stat = os.stat(path)
+        path = os.path.abspath(path)
+        known = hashes.get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['sha256']
+
+        sha256 = file_sha256(path)
+        hashes[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+        tmp_path = f"{self.hashes_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(hashes, f)
+        os.replace(tmp_path, self.hashes_path)
+        return sha256
+
+    def fingerprint(self, stage, files=(), refs=(), code=(), params=None):
+        """
+        Computes the cache key of a stage run.
+
+        Args:
+            stage (str): Stage name.
+            files (list): Input file paths.
+            refs (list): Upstream artifact references.
+            code (list): Functions, classes or modules implementing the stage.
+            params (dict): Any other JSON-serializable setting the output depends on.
+
+        Returns:
+            str: The fingerprint, prefixed with the stage name.
+        """
+        inputs = {
+            'files': [self._file_hash(path) for path in files],
+            'refs': [ref['sha256'] for ref in refs],
+            'code': code_version(*code),
+            'params': params,
+        }
+        digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8'))
+        return f"{stage}-{digest.hexdigest()[:32]}"
+
+    def _entry_path(self, key):
+        return os.path.join(self.base_dir, f"{key}.json")
+
+    def get(self, key):
+        """
+        Returns the stored result of a fingerprint, or None. Artifact results
+        whose file is gone or has a different size are treated as missing.
+        """
+        try:
+            with open(self._entry_path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        result = entry['result']
+        if entry.get('artifact'):
+            path = result['path']
+            if not os.path.exists(path) or os.path.getsize(path) != entry['size']:
+                return None
+        os.utime(self._entry_path(key))
+        return result
+
+    def put(self, key, result, artifact=False):
+        """
+        Stores a JSON-serializable result under key and evicts the oldest
+        entries of the same stage beyond the latest `keep`.
+        """
+        entry = {'result': result, 'artifact': artifact}
+        if artifact:
+            entry['size'] = os.path.getsize(result['path'])
+        tmp_path = f"{self._entry_path(key)}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._entry_path(key))
+        self._evict(key.rsplit('-', 1)[0])
+        return result
+
+    def put_frame(self, key, df):
+        """
+        Writes df as an artifact of the cache and stores its reference.
+        """
+        ref = ArtifactStore(self.base_dir).write(df, key)
+        return self.put(key, ref, artifact=True)
+
+    def put_chunks(self, key, chunks):
+        """
+        Same as put_frame, for a stage producing its output chunk by chunk.
+        """
+        ref = ArtifactStore(self.base_dir).write_chunks(chunks, key)
+        return self.put(key, ref, artifact=True)
+
+    def _evict(self, stage):
+        entries = sorted(
+            (os.path.getmtime(os.path.join(self.base_dir, name)), name[:-len('.json')])
+            for name in os.listdir(self.base_dir)
+            if name.endswith('.json') and name.rsplit('-', 1)[0] == stage
+        )
+        for _, key in entries[:-self.keep]:
+            for name in os.listdir(self.base_dir):
+                if name.startswith(f"{key}."):
+                    os.remove(os.path.join(self.base_dir, name))
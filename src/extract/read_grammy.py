@@ -1,60 +1,92 @@
 import sys 
 import os
 from dotenv import load_dotenv
+from decouple import config
 import pandas as pd
 from db.db_connection import build_engine
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy import inspect
 from models.model import GrammyAward
+from models.schema import GRAMMY_SCHEMA, apply_schema
 from sqlalchemy.exc import SQLAlchemyError
 from src.transform.transform_grammy import TransformGrammy
+from src.load.bulk_loader import bulk_load
+from src.load.incremental_loader import incremental_load, supports_incremental, with_row_hashes
+from src.load.validation import ValidationError, validate_frame
+from src.load.load_state import record_load
+from src.artifacts.artifact_store import file_sha256
 
 load_dotenv()
 work_dir = os.getenv('WORK_DIR')
 
 sys.path.append(work_dir)
 
+GRAMMY_CSV_PATH = './data/the_grammy_awards.csv'
+
+
+def read_grammy_db(mode=None):
+    """
+    Reads the Grammy CSV and loads it into grammy_awards.
+
+    Returns:
+        pd.DataFrame: The rows loaded, or None on failure.
+
+    Raises:
+        ValidationError: If the rows do not match the model.
+    """
+    if mode is None:
+        mode = config('LOAD_MODE', default='incremental')
+    # The CSV is read and checked against the model before the table is touched
+    try:
+        # The content hash of the CSV identifies the load (see src/load/load_state.py)
+        load_id = file_sha256(GRAMMY_CSV_PATH)
+        df = pd.read_csv(GRAMMY_CSV_PATH, sep=',', encoding='utf-8')
+        transformer = TransformGrammy(df)
+        transformer.insert_ids()
+        apply_schema(transformer.df, GRAMMY_SCHEMA)
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return None
+
+    report = validate_frame(transformer.df, GrammyAward.__table__)
+    if report:
+        raise ValidationError(GrammyAward.__tablename__, report)
 
-def read_grammy_db():
     engine = build_engine()
-    Session = sessionmaker(bind=engine)
-    session = Session()
 
     try:
         inspector = inspect(engine)
+        # Incremental runs keep the table and only write the rows that changed
+        incremental = mode == 'incremental' and supports_incremental(engine, GrammyAward.__table__)
 
-        if inspector.has_table('grammy_awards'):
+        if inspector.has_table('grammy_awards') and not incremental:
             try:
                 GrammyAward.__table__.drop(engine)
             except SQLAlchemyError as e:
                 print(f"Error dropping table: {e}")
                 raise
 
-        try:
-            GrammyAward.__table__.create(engine)
-            print("Table creation was successful.")
-        except SQLAlchemyError as e:
-            print(f"Error creating table: {e}")
-            raise
+        if not incremental:
+            try:
+                GrammyAward.__table__.create(engine)
+                print("Table creation was successful.")
+            except SQLAlchemyError as e:
+                print(f"Error creating table: {e}")
+                raise
 
     except SQLAlchemyError as error:
         print(f"An error occurred: {error}")
         return None
 
     try:
-
-        df = pd.read_csv('./data/the_grammy_awards.csv', sep=',', encoding='utf-8')
-        transformer = TransformGrammy(df)
-        transformer.insert_ids()
-        with engine.connect() as connection:
-            transformer.df.to_sql('grammy_awards', con=connection, if_exists='append', index=False)
+        if incremental:
+            incremental_load(transformer.df, GrammyAward.__table__, engine)
+        else:
+            bulk_load(with_row_hashes(transformer.df), GrammyAward.__table__, engine)
+        with engine.begin() as connection:
+            record_load(connection, GrammyAward.__table__, load_id)
         return transformer.df
 
 
     except Exception as e:
         print(f"An error occurred: {e}")
         return None
-
-    finally:
-        if session:
-            session.close()
\ No newline at end of file
@@ -1,8 +1,101 @@
+import logging
+import resource
+import time
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+
+from models.schema import SPOTIFY_SCHEMA, arrow_types
+
+SPOTIFY_CSV_PATH = './data/spotify_dataset.csv'
+
+# The CSV stores the row id in a leading column with an empty header, which
+# pandas' C parser names 'Unnamed: 0' and the pyarrow parser leaves as ''
+PANDAS_ID_COLUMN = 'Unnamed: 0'
+ARROW_ID_COLUMN = ''
+
+# pandas' default missing-value markers, so the Arrow reader finds the same nulls
+NULL_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+]
+
+
+def spotify_dtypes(id_column=PANDAS_ID_COLUMN):
+    """
+    Returns the columns to read from the Spotify CSV and their dtypes, taken
+    from the canonical schema in models/schema.py.
+    """
+    dtypes = {id_column if name == 'ID' else name: dtype for name, dtype in SPOTIFY_SCHEMA.items()}
+    return list(dtypes), dtypes
+
+
+def spotify_arrow_schema(id_column=ARROW_ID_COLUMN):
+    """
+    Returns the pyarrow column types of the Spotify CSV.
+    """
+    return arrow_types(spotify_dtypes(id_column)[1])
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _log_report(path, rows, started):
+    logging.info(
+        f"Parsed {rows} Spotify rows from {path} in {time.perf_counter() - started:.2f}s "
+        f"(peak RSS {_peak_rss_mb():.1f} MB, "
+        f"peak Arrow pool {pa.default_memory_pool().max_memory() / 2**20:.1f} MB)"
+    )
+
+
+def read_spotify_csv(path=SPOTIFY_CSV_PATH):
+    """
+    Reads the whole Spotify CSV with the pyarrow engine and an explicit schema.
+
+    Raises:
+        FileNotFoundError: If the CSV does not exist.
+        ValueError: If a column cannot be parsed with its declared type.
+    """
+    started = time.perf_counter()
+    usecols, dtypes = spotify_dtypes(ARROW_ID_COLUMN)
+    df = pd.read_csv(path, sep=',', encoding='utf-8', engine='pyarrow', usecols=usecols, dtype=dtypes)
+    df.rename(columns={ARROW_ID_COLUMN: PANDAS_ID_COLUMN}, inplace=True)
+    _log_report(path, len(df), started)
+    return df
+
+
+def iter_spotify_record_batches(path=SPOTIFY_CSV_PATH, block_size=64 << 20):
+    """
+    Yields the Spotify CSV as Arrow record batches parsed from blocks of about
+    block_size bytes, without ever materializing the whole file.
+    """
+    started = time.perf_counter()
+    column_types = spotify_arrow_schema()
+    reader = pv.open_csv(
+        path,
+        read_options=pv.ReadOptions(block_size=block_size),
+        convert_options=pv.ConvertOptions(column_types=column_types, include_columns=list(column_types),
+                                          null_values=NULL_VALUES, strings_can_be_null=True),
+    )
+    rows = 0
+    for batch in reader:
+        rows += batch.num_rows
+        yield batch
+    _log_report(path, rows, started)
+
+
+def iter_spotify_chunks(path=SPOTIFY_CSV_PATH, block_size=64 << 20):
+    """
+    Yields the Spotify CSV as DataFrames with the columns and dtypes of
+    read_spotify_csv, one parsed block of about block_size bytes at a time,
+    so the extract stage never holds the whole file.
 
-def read_spotify_csv():
-    try:
-        df = pd.read_csv('./data/spotify_dataset.csv', sep=',', encoding='utf-8')
-        return df
-    except Exception as e:
-        return None
\ No newline at end of file
+    track_genre is a categorical per chunk; ArtifactStore.write_chunks stores
+    it as text and the transform casts it back.
+    """
+    for batch in iter_spotify_record_batches(path, block_size):
+        df = batch.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
+        yield df.rename(columns={ARROW_ID_COLUMN: PANDAS_ID_COLUMN})
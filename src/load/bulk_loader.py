@@ -0,0 +1,98 @@
+"""
+This module provides a bulk loader that writes DataFrames into a database table
+much faster than DataFrame.to_sql with per-row INSERTs.
+
+It defines the following functions:
+- write_batches: Streams a DataFrame into a table on an open connection.
+- bulk_load: Runs write_batches in its own transaction.
+
+Usage:
+    On PostgreSQL through psycopg2 every batch is serialized into an in-memory
+    CSV buffer and sent with COPY FROM STDIN (copy_expert is psycopg2 API).
+    Other drivers and dialects fall back to a single executemany INSERT per
+    batch. Throughput is reported for every batch.
+"""
+import io
+import time
+
+from decouple import config
+from sqlalchemy import sql
+
+# Marker for NULL values in the COPY buffer, so empty strings stay empty strings
+COPY_NULL = '\\N'
+
+
+def _copy_batch(cursor, preparer, table, batch):
+    buffer = io.StringIO()
+    batch.to_csv(buffer, index=False, header=False, na_rep=COPY_NULL)
+    buffer.seek(0)
+    column_list = ', '.join(preparer.quote(column) for column in batch.columns)
+    cursor.copy_expert(
+        f"COPY {preparer.format_table(table)} ({column_list}) "
+        f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+        buffer,
+    )
+
+
+def _insert_batch(connection, table, batch):
+    # Untyped table clause: values are passed to the driver as they are, the
+    # same way to_sql does, instead of through the model's type processors
+    target = sql.table(table.name, *(sql.column(name) for name in batch.columns), schema=table.schema)
+    records = batch.astype(object).where(batch.notna(), None).to_dict('records')
+    connection.execute(target.insert(), records)
+
+
+def write_batches(connection, table, df, batch_size=None):
+    """
+    Writes a DataFrame into a table on an open connection, in batches of
+    batch_size rows. Committing is left to the caller.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): Connection inside a transaction.
+        table (sqlalchemy.Table): Target table, e.g. MergedDAta.__table__.
+        df (pd.DataFrame): Rows to load; its columns must exist in the table.
+        batch_size (int): Rows per batch, LOAD_BATCH_SIZE (50000) by default.
+
+    Returns:
+        int: The number of rows written.
+    """
+    if batch_size is None:
+        batch_size = config('LOAD_BATCH_SIZE', default=50000, cast=int)
+    # copy_expert only exists on psycopg2 cursors; psycopg 3, pg8000 and the
+    # other dialects use executemany
+    use_copy = connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2'
+
+    if use_copy:
+        cursor = connection.connection.cursor()
+        preparer = connection.dialect.identifier_preparer
+
+    try:
+        for start in range(0, len(df), batch_size):
+            batch = df.iloc[start:start + batch_size]
+            started = time.perf_counter()
+            if use_copy:
+                _copy_batch(cursor, preparer, table, batch)
+            else:
+                _insert_batch(connection, table, batch)
+            elapsed = time.perf_counter() - started
+            print(f"Loaded {len(batch)} rows into {table.name} "
+                  f"({len(batch) / elapsed if elapsed else float('inf'):.0f} rows/sec)")
+        return len(df)
+
+    finally:
+        if use_copy:
+            cursor.close()
+
+
+def bulk_load(df, table, engine, batch_size=None):
+    """
+    Loads a DataFrame into an existing table in batches of batch_size rows.
+
+    All batches run inside one transaction, so a failed load leaves the table
+    as it was before the call.
+
+    Returns:
+        int: The number of rows loaded.
+    """
+    with engine.begin() as connection:
+        return write_batches(connection, table, df, batch_size)
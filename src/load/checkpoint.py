@@ -0,0 +1,71 @@
+"""
+This module makes full loads resumable: every chunk is committed together with
+a row of the load_checkpoints control table, so a retried load skips the chunks
+already in the table instead of dropping it and starting over.
+
+It defines the following functions:
+- completed_chunks: The chunks of a load already committed.
+- write_chunk: Writes a chunk and its checkpoint row in one transaction.
+- clear_checkpoints: Forgets the checkpoints of a table.
+
+Usage:
+    done = completed_chunks(engine, table, load_id)
+    for index, chunk in enumerate(chunks):
+        if index not in done:
+            write_chunk(engine, table, load_id, index, chunk)
+    finalize_load(table, engine)
+
+    A load is identified by load_id, the content hash of its input artifact,
+    so only a retry of the same data resumes; a load of anything else clears
+    the checkpoints of the table and reloads it from scratch. Since the rows
+    of a chunk and its checkpoint commit at once, a failure costs at most the
+    chunk that was being written.
+"""
+from sqlalchemy import func, inspect, select
+
+from models.model import LoadCheckpoint
+from src.load.bulk_loader import write_batches
+
+CONTROL_TABLE = LoadCheckpoint.__table__
+
+
+def completed_chunks(engine, table, load_id):
+    """
+    Returns the chunks of load_id already committed into table, creating the
+    control table on first use.
+
+    Returns:
+        dict: Chunk index -> number of rows committed; empty when the load
+        has to start from scratch.
+    """
+    CONTROL_TABLE.create(engine, checkfirst=True)
+    if not inspect(engine).has_table(table.name):
+        return {}
+    query = select(CONTROL_TABLE.c.chunk, CONTROL_TABLE.c.num_rows).where(
+        CONTROL_TABLE.c.table_name == table.name,
+        CONTROL_TABLE.c.load_id == load_id,
+    )
+    with engine.connect() as connection:
+        return dict(connection.execute(query).all())
+
+
+def write_chunk(engine, table, load_id, index, df):
+    """
+    Writes the rows of a chunk and records it, in one transaction.
+
+    Returns:
+        int: The number of rows written.
+    """
+    with engine.begin() as connection:
+        rows = write_batches(connection, table, df)
+        connection.execute(CONTROL_TABLE.insert().values(
+            table_name=table.name, load_id=load_id, chunk=index, num_rows=rows, loaded_at=func.now(),
+        ))
+    return rows
+
+
+def clear_checkpoints(connection, table):
+    """
+    Deletes every checkpoint of table, on an open connection.
+    """
+    connection.execute(CONTROL_TABLE.delete().where(CONTROL_TABLE.c.table_name == table.name))
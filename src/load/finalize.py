@@ -0,0 +1,104 @@
+"""
+This module prepares a loaded table for the dashboard: it builds the secondary
+indexes declared on the model after the bulk insert and refreshes the summary
+tables of models/summaries.py.
+
+It defines the following functions:
+- create_table: Creates a table without its secondary indexes.
+- build_indexes: Creates the secondary indexes of a table that are missing.
+- drop_summaries: Drops the summaries, which depend on merged_data.
+- refresh_summaries: Creates or refreshes every summary.
+- finalize_load: build_indexes and refresh_summaries in one transaction.
+
+Usage:
+    create_table(MergedDAta.__table__, engine)
+    bulk_load(df, MergedDAta.__table__, engine)
+    finalize_load(MergedDAta.__table__, engine)
+
+    Inserting into an indexed table updates every index row by row; building
+    the indexes once the rows are in is a single sorted pass per index.
+"""
+import time
+
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateTable
+
+from models.summaries import SUMMARIES
+
+
+def create_table(table, engine):
+    """
+    Creates table with its primary key only; build_indexes adds the rest.
+    """
+    with engine.begin() as connection:
+        connection.execute(CreateTable(table))
+
+
+def build_indexes(table, connection):
+    """
+    Creates every index declared on table that does not exist yet.
+
+    Returns:
+        list: Names of the indexes created.
+    """
+    existing = {index['name'] for index in inspect(connection).get_indexes(table.name)}
+    created = []
+    for index in sorted(table.indexes, key=lambda index: index.name):
+        if index.name not in existing:
+            index.create(connection)
+            created.append(index.name)
+    return created
+
+
+def _is_postgres(connection):
+    return connection.dialect.name == 'postgresql'
+
+
+def drop_summaries(connection):
+    """
+    Drops every summary, so the table they are computed from can be dropped.
+    """
+    preparer = connection.dialect.identifier_preparer
+    kind = 'MATERIALIZED VIEW' if _is_postgres(connection) else 'TABLE'
+    for name in SUMMARIES:
+        connection.exec_driver_sql(f"DROP {kind} IF EXISTS {preparer.quote(name)}")
+
+
+def refresh_summaries(connection):
+    """
+    Recomputes every summary: REFRESH MATERIALIZED VIEW on PostgreSQL, a
+    rebuilt table elsewhere. Each summary gets a unique index on its group-by
+    columns.
+    """
+    preparer = connection.dialect.identifier_preparer
+    postgres = _is_postgres(connection)
+    views = set(inspect(connection).get_view_names(include=('materialized',))) if postgres else set()
+
+    for name, (query, keys) in SUMMARIES.items():
+        quoted = preparer.quote(name)
+        if name in views:
+            connection.exec_driver_sql(f"REFRESH MATERIALIZED VIEW {quoted}")
+            continue
+
+        sql = query.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True})
+        if postgres:
+            connection.exec_driver_sql(f"CREATE MATERIALIZED VIEW {quoted} AS {sql}")
+        else:
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {quoted}")
+            connection.exec_driver_sql(f"CREATE TABLE {quoted} AS {sql}")
+        columns = ', '.join(preparer.quote(key) for key in keys)
+        connection.exec_driver_sql(
+            f"CREATE UNIQUE INDEX {preparer.quote(f'ux_{name}')} ON {quoted} ({columns})"
+        )
+
+
+def finalize_load(table, engine):
+    """
+    Builds the missing indexes of table and refreshes the summaries.
+    """
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        created = build_indexes(table, connection)
+        refresh_summaries(connection)
+    print(f"Indexes built on {table.name}: {created or 'none missing'}; "
+          f"{len(SUMMARIES)} summaries refreshed in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,202 @@
+"""
+This module provides incremental (upsert) loading so a daily run only writes the
+rows that changed since the previous run.
+
+It defines the following functions:
+- row_hashes: Computes a 64-bit content hash per DataFrame row.
+- supports_incremental: Tells whether an existing table can be loaded incrementally.
+- incremental_load: Upserts new/changed rows and deletes rows that disappeared.
+- incremental_load_chunks: incremental_load over the content given in chunks.
+
+Usage:
+    Every loaded row stores its content hash in the row_hash column. On the next
+    run only rows whose key is new or whose hash changed are copied into a
+    temporary staging table and upserted with INSERT ... ON CONFLICT, and rows
+    whose key no longer exists are deleted. Everything runs in one transaction,
+    so readers keep seeing the previous version of the table until the commit
+    publishes the new one at once.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import inspect, select, sql, text
+
+from src.load.bulk_loader import write_batches
+
+HASH_COLUMN = 'row_hash'
+DELETE_BATCH_SIZE = 10000
+
+
+# Stands for a missing integer or boolean in the row hash
+NA_HASH_VALUE = np.iinfo('int64').min
+
+
+def _hash_values(values):
+    # hash_pandas_object hashes the representation, not the value: 0.5 as float32
+    # and as float64, or 1 as int64 and as Int16, get different hashes
+    if pd.api.types.is_bool_dtype(values.dtype) or pd.api.types.is_integer_dtype(values.dtype):
+        return values.to_numpy(dtype='int64', na_value=NA_HASH_VALUE)
+    if pd.api.types.is_float_dtype(values.dtype):
+        return values.to_numpy(dtype='float64', na_value=np.nan)
+    # Text hashes the same as object, string[pyarrow] or category
+    return values
+
+
+def row_hashes(df):
+    """
+    Computes a stable 64-bit content hash for every row of a DataFrame.
+
+    The hash depends on the values only, not on the dtypes in models/schema.py:
+    booleans and integers of any width or nullability are hashed as int64
+    (NA as NA_HASH_VALUE), floats as float64 and text as is. Narrowing floats
+    still changes the values themselves (float64 -> float32 rounds them), so
+    such a schema change rewrites the affected rows once.
+
+    Returns:
+        pd.Series: Signed int64 hashes (so they fit a BIGINT column), aligned on df.index.
+    """
+    canonical = pd.DataFrame({name: _hash_values(values) for name, values in df.items()}, index=df.index)
+    hashes = pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+    return pd.Series(hashes.view('int64'), index=df.index)
+
+
+def with_row_hashes(df):
+    """
+    Returns a copy of df with its row_hash column (re)computed.
+    """
+    data = df.drop(columns=HASH_COLUMN, errors='ignore')
+    return data.assign(**{HASH_COLUMN: row_hashes(data)})
+
+
+def supports_incremental(engine, table):
+    """
+    A table can be loaded incrementally once it exists with a row_hash column;
+    tables created before row hashes were introduced need one full reload.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return False
+    return HASH_COLUMN in {column['name'] for column in inspector.get_columns(table.name)}
+
+
+def _upsert_sql(preparer, table, stage_name, columns, key):
+    target = preparer.format_table(table)
+    column_list = ', '.join(preparer.quote(column) for column in columns)
+    updates = ', '.join(
+        f"{preparer.quote(column)} = excluded.{preparer.quote(column)}"
+        for column in columns if column != key
+    )
+    # WHERE true keeps SQLite from parsing ON CONFLICT as part of the SELECT
+    return (
+        f"INSERT INTO {target} ({column_list}) "
+        f"SELECT {column_list} FROM {preparer.quote(stage_name)} WHERE true "
+        f"ON CONFLICT ({preparer.quote(key)}) DO UPDATE SET {updates}"
+    )
+
+
+def _loaded_hashes(connection, table, key):
+    existing = pd.read_sql(select(table.c[key], table.c[HASH_COLUMN]), connection)
+    # Nullable ints keep the 64-bit hashes exact when keys are missing
+    existing[HASH_COLUMN] = existing[HASH_COLUMN].astype('Int64')
+    return existing
+
+
+def _upsert_changed(connection, table, data, existing, key):
+    # Stages and upserts the rows of data that are new or whose hash changed
+    current = data[[key, HASH_COLUMN]].merge(
+        existing, on=key, how='left', suffixes=('', '_loaded')
+    )
+    changed_mask = (
+        current[f"{HASH_COLUMN}_loaded"] != current[HASH_COLUMN]
+    ).fillna(True).to_numpy(dtype=bool)
+    changed = data[changed_mask]
+
+    if len(changed):
+        stage_name = f"{table.name}_stage"
+        preparer = connection.dialect.identifier_preparer
+        connection.execute(text(
+            f"CREATE TEMPORARY TABLE {preparer.quote(stage_name)} AS "
+            f"SELECT * FROM {preparer.format_table(table)} WHERE 1 = 0"
+        ))
+        stage = sql.table(stage_name, *(sql.column(name) for name in changed.columns))
+        write_batches(connection, stage, changed)
+        connection.execute(text(_upsert_sql(preparer, table, stage_name, list(changed.columns), key)))
+        connection.execute(text(f"DROP TABLE {preparer.quote(stage_name)}"))
+    return len(changed)
+
+
+def _delete_missing(connection, table, existing, keys, key):
+    # Deletes the loaded rows whose key is not in keys
+    removed = existing.loc[~existing[key].isin(keys), key].tolist()
+    for start in range(0, len(removed), DELETE_BATCH_SIZE):
+        batch = removed[start:start + DELETE_BATCH_SIZE]
+        connection.execute(table.delete().where(table.c[key].in_(batch)))
+    return len(removed)
+
+
+def incremental_load(df, table, engine, key='ID'):
+    """
+    Brings an existing table in line with df, writing only what changed.
+
+    Args:
+        df (pd.DataFrame): Full desired content of the table, without row_hash.
+        table (sqlalchemy.Table): Target table with a row_hash column.
+        engine (sqlalchemy.engine.Engine): Engine connected to the database.
+        key (str): Primary key column used to match rows.
+
+    Returns:
+        dict: Number of inserted/updated, deleted and unchanged rows.
+    """
+    started = time.perf_counter()
+    data = with_row_hashes(df)
+
+    with engine.begin() as connection:
+        existing = _loaded_hashes(connection, table, key)
+        upserted = _upsert_changed(connection, table, data, existing, key)
+        deleted = _delete_missing(connection, table, existing, data[key], key)
+
+    summary = {
+        'upserted': upserted,
+        'deleted': deleted,
+        'unchanged': len(data) - upserted,
+    }
+    print(f"Incremental load of {table.name} finished in {time.perf_counter() - started:.2f}s: {summary}")
+    return summary
+
+
+def incremental_load_chunks(chunks, table, engine, key='ID'):
+    """
+    Same as incremental_load, for a desired content given chunk by chunk
+    (MERGE_MODE=stream). Only one chunk is held in memory, next to the keys
+    and hashes of the table; every chunk is written in the same transaction,
+    so readers see the previous table until the last chunk commits.
+
+    Args:
+        chunks (iterable): DataFrames without row_hash; a key appears in one
+            chunk at most.
+        table (sqlalchemy.Table): Target table with a row_hash column.
+        engine (sqlalchemy.engine.Engine): Engine connected to the database.
+        key (str): Primary key column used to match rows.
+
+    Returns:
+        generator: Yields each chunk once staged.
+    """
+    started = time.perf_counter()
+    summary = {'upserted': 0, 'deleted': 0, 'unchanged': 0}
+    keys = []
+
+    with engine.begin() as connection:
+        existing = _loaded_hashes(connection, table, key)
+        for chunk in chunks:
+            data = with_row_hashes(chunk)
+            upserted = _upsert_changed(connection, table, data, existing, key)
+            summary['upserted'] += upserted
+            summary['unchanged'] += len(data) - upserted
+            keys.append(data[key].to_numpy())
+            yield chunk
+        summary['deleted'] = _delete_missing(
+            connection, table, existing, np.concatenate(keys) if keys else [], key
+        )
+
+    print(f"Incremental load of {table.name} finished in {time.perf_counter() - started:.2f}s: {summary}")
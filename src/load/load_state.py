@@ -0,0 +1,93 @@
+"""
+This module records, in the database, which input every table was last loaded
+from, so other processes can tell whether what they cached is still current.
+
+It defines the following functions:
+- record_load: Marks a finished load of a table.
+- current_load: The last finished load of a table.
+- load_generations: The load generation of several tables at once.
+
+Usage:
+    with engine.begin() as connection:
+        record_load(connection, MergedDAta.__table__, load_id)
+    state = current_load(engine, MergedDAta.__table__)
+    state['load_id'], state['generation'], state['num_rows']
+
+    Every finished load bumps the generation of its table in the load_state
+    control table, in the database everybody reads from. The load stage cache
+    (dags/etl.py) only reuses a load while the table still holds that input,
+    whichever process or run loaded something else in between, and the query
+    cache (src/read/queries.py) keys its results by generation, so a load run
+    by the DAG reaches the dashboard process too.
+"""
+from sqlalchemy import func, inspect, select
+
+from models.model import LoadState
+
+CONTROL_TABLE = LoadState.__table__
+
+
+def record_load(connection, table, load_id):
+    """
+    Records a finished load of table on an open connection, creating the
+    control table on first use.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): Connection of the load.
+        table (sqlalchemy.Table): The loaded table.
+        load_id (str): Identifies the input (e.g. its artifact hash), or None.
+
+    Returns:
+        dict: The new state of table, as returned by current_load.
+    """
+    CONTROL_TABLE.create(connection, checkfirst=True)
+    num_rows = connection.execute(select(func.count()).select_from(table)).scalar()
+    previous = connection.execute(
+        select(CONTROL_TABLE.c.generation).where(CONTROL_TABLE.c.table_name == table.name)
+    ).scalar()
+
+    values = {'load_id': load_id, 'num_rows': num_rows, 'loaded_at': func.now()}
+    if previous is None:
+        generation = 1
+        connection.execute(CONTROL_TABLE.insert().values(table_name=table.name, generation=generation, **values))
+    else:
+        generation = previous + 1
+        connection.execute(CONTROL_TABLE.update().where(
+            CONTROL_TABLE.c.table_name == table.name
+        ).values(generation=generation, **values))
+    return {'load_id': load_id, 'generation': generation, 'num_rows': num_rows}
+
+
+def current_load(engine, table):
+    """
+    Returns the last finished load of table, or None if it was never recorded.
+
+    Returns:
+        dict: load_id, generation and num_rows of the load.
+    """
+    if not inspect(engine).has_table(CONTROL_TABLE.name):
+        return None
+    query = select(CONTROL_TABLE.c.load_id, CONTROL_TABLE.c.generation, CONTROL_TABLE.c.num_rows).where(
+        CONTROL_TABLE.c.table_name == table.name
+    )
+    with engine.connect() as connection:
+        row = connection.execute(query).first()
+    return dict(row._mapping) if row is not None else None
+
+
+
+def load_generations(connection, table_names):
+    """
+    Returns the load generation of every table in table_names, on an open
+    connection; tables never loaded (or no control table yet) get 0.
+
+    Returns:
+        tuple: One generation per table, in the order of table_names.
+    """
+    if not inspect(connection).has_table(CONTROL_TABLE.name):
+        return tuple(0 for _ in table_names)
+    query = select(CONTROL_TABLE.c.table_name, CONTROL_TABLE.c.generation).where(
+        CONTROL_TABLE.c.table_name.in_(list(table_names))
+    )
+    generations = dict(connection.execute(query).all())
+    return tuple(generations.get(name, 0) for name in table_names)
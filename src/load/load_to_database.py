@@ -1,57 +1,217 @@
 import sys 
 import os
 from dotenv import load_dotenv
+from decouple import config
 import pandas as pd
 from db.db_connection import build_engine
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy import inspect
 from models.model import GrammyAward
 from models.model import MergedDAta
 from sqlalchemy.exc import SQLAlchemyError
 from src.transform.transform_grammy import TransformGrammy
+from src.load.bulk_loader import bulk_load, write_batches
+from src.load.incremental_loader import incremental_load, incremental_load_chunks, supports_incremental, with_row_hashes
+from src.load.finalize import create_table, drop_summaries, finalize_load
+from src.load.validation import ValidationError, validate_chunks, validate_frame
+from src.load.checkpoint import clear_checkpoints, completed_chunks, write_chunk
+from src.load.load_state import record_load
+from src.store.export import iter_frame_chunks
 
 load_dotenv()
 work_dir = os.getenv('WORK_DIR')
 
 sys.path.append(work_dir)
 
+# Callables run with the table name after every successful load of it
+LOAD_LISTENERS = []
+
+
+def on_load(callback):
+    """
+    Registers callback(table_name), called after load_data finishes a load.
+    """
+    LOAD_LISTENERS.append(callback)
+    return callback
+
+
+def load_data(df, mode=None, load_id=None):
+    """
+    Loads the merged data into merged_data: incrementally when the table
+    supports it (LOAD_MODE=incremental), otherwise by recreating the table.
+
+    Args:
+        df (pd.DataFrame): The merged data.
+        mode (str): incremental or full; defaults to LOAD_MODE.
+        load_id (str): Identifies the input (e.g. its artifact hash). When
+            given, a full load commits chunk by chunk with checkpoints, and
+            a retry with the same load_id resumes after the last committed
+            chunk (see src/load/checkpoint.py).
+
+    Returns:
+        pd.DataFrame: The rows loaded.
+
+    Raises:
+        ValidationError: If the rows do not match the model.
+        Exception: Any database error. Chunks committed before it stay
+            checkpointed for the retry.
+    """
+    if mode is None:
+        mode = config('LOAD_MODE', default='incremental')
+    # Check the rows against the model before the table is dropped or written
+    df.drop_duplicates(subset='ID', inplace=True)
+    report = validate_frame(df, MergedDAta.__table__)
+    if report:
+        raise ValidationError(MergedDAta.__tablename__, report)
 
-def load_data(df):
     engine = build_engine()
-    Session = sessionmaker(bind=engine)
-    session = Session()
 
     try:
         inspector = inspect(engine)
+        # A full load interrupted by a failure continues where it stopped
+        done = completed_chunks(engine, MergedDAta.__table__, load_id) if load_id is not None else {}
+        # Incremental runs keep the table and only write the rows that changed
+        incremental = not done and mode == 'incremental' and supports_incremental(engine, MergedDAta.__table__)
 
-        if inspector.has_table('merged_data'):
+        if inspector.has_table('merged_data') and not incremental and load_id is None:
             try:
+                # The summaries are computed from merged_data and depend on it
+                with engine.begin() as connection:
+                    drop_summaries(connection)
                 MergedDAta.__table__.drop(engine)
             except SQLAlchemyError as e:
                 print(f"Error dropping table: {e}")
                 raise
 
-        try:
-            MergedDAta.__table__.create(engine)
-            print("Table creation was successful.")
-        except SQLAlchemyError as e:
-            print(f"Error creating table: {e}")
-            raise
+        if not incremental and load_id is None:
+            try:
+                # Secondary indexes are built by finalize_load, after the insert
+                create_table(MergedDAta.__table__, engine)
+                print("Table creation was successful.")
+            except SQLAlchemyError as e:
+                print(f"Error creating table: {e}")
+                raise
 
     except SQLAlchemyError as error:
         print(f"An error occurred: {error}")
-        return None
+        raise
 
     try:
-        with engine.connect() as connection:
-            df.drop_duplicates(subset='ID', inplace=True)
-            df.to_sql('merged_data', engine, if_exists='append', index=False)
+        if incremental:
+            incremental_load(df, MergedDAta.__table__, engine)
+        elif load_id is not None:
+            for _ in _write_checkpointed(engine, iter_frame_chunks(df), load_id, done):
+                pass
+        else:
+            bulk_load(with_row_hashes(df), MergedDAta.__table__, engine)
+        finalize_load(MergedDAta.__table__, engine)
+        _finish_load(engine, load_id)
         return df
 
     except Exception as e:
         print(f"An error occurred: {e}")
-        return None
+        raise
+
+
+def load_chunks(open_chunks, load_id=None, mode=None):
+    """
+    Loads merged_data from merged chunks (MERGE_MODE=stream), without ever
+    holding more than one chunk in memory.
+
+    The chunks are validated in a first pass. If they are valid, a second
+    pass writes them like load_data does: incrementally when the table
+    supports it (LOAD_MODE=incremental), in one transaction that readers only
+    see once committed; otherwise the table is dropped and recreated and the
+    chunks are written in one transaction, or with a load_id one transaction
+    and checkpoint per chunk, so a retry skips the chunks already committed.
+    Indexes and summaries are built when the last chunk is in. Duplicate IDs
+    are dropped per chunk: the merge only duplicates a Spotify row next to
+    itself, within the same chunk.
+
+    Args:
+        open_chunks (callable): Returns a new iterator over the chunks; it is
+            called once per pass.
+        load_id (str): Identifies the input, as in load_data.
+        mode (str): incremental or full; defaults to LOAD_MODE.
+
+    Returns:
+        generator: Yields each chunk once written, so the caller can also
+        write it to an artifact.
+
+    Raises:
+        ValidationError: If the chunks do not match the model.
+    """
+    report = validate_chunks((chunk.drop_duplicates(subset='ID') for chunk in open_chunks()), MergedDAta.__table__)
+    if report:
+        raise ValidationError(MergedDAta.__tablename__, report)
+    if mode is None:
+        mode = config('LOAD_MODE', default='incremental')
+    return _write_chunks(open_chunks(), load_id, mode)
+
+
+def _reset_table(engine, table):
+    with engine.begin() as connection:
+        drop_summaries(connection)
+    table.drop(engine, checkfirst=True)
+    create_table(table, engine)
+    print("Table creation was successful.")
+
+
+def _finish_load(engine, load_id):
+    # Records which input the table now holds, for the caches of other processes
+    with engine.begin() as connection:
+        if load_id is not None:
+            clear_checkpoints(connection, MergedDAta.__table__)
+        record_load(connection, MergedDAta.__table__, load_id)
+    for callback in LOAD_LISTENERS:
+        callback(MergedDAta.__tablename__)
+
+
+def _write_checkpointed(engine, chunks, load_id, done):
+    # Commits every chunk with its checkpoint; the chunks in done are skipped
+    table = MergedDAta.__table__
+    if done:
+        print(f"Resuming the load of {table.name}: {len(done)} chunks already committed")
+    else:
+        with engine.begin() as connection:
+            clear_checkpoints(connection, table)
+        _reset_table(engine, table)
+
+    skipped = 0
+    for index, chunk in enumerate(chunks):
+        chunk = chunk.drop_duplicates(subset='ID')
+        if index not in done:
+            write_chunk(engine, table, load_id, index, with_row_hashes(chunk))
+        elif done[index] == len(chunk):
+            skipped += len(chunk)
+        else:
+            # Chunk boundaries changed (e.g. EXPORT_CHUNK_ROWS): the next attempt starts over
+            with engine.begin() as connection:
+                clear_checkpoints(connection, table)
+            raise ValueError(f"Checkpoint of chunk {index} does not match the input of {table.name}; "
+                             f"checkpoints cleared")
+        yield chunk
+    if skipped:
+        print(f"Skipped {skipped} rows already loaded into {table.name}")
+
+
+def _write_chunks(chunks, load_id=None, mode='full'):
+    engine = build_engine()
+    table = MergedDAta.__table__
+    done = completed_chunks(engine, table, load_id) if load_id is not None else {}
+
+    # Incremental runs keep the table and only write the rows that changed; a
+    # full load interrupted by a failure continues where it stopped
+    if not done and mode == 'incremental' and supports_incremental(engine, table):
+        yield from incremental_load_chunks((chunk.drop_duplicates(subset='ID') for chunk in chunks), table, engine)
+    elif load_id is not None:
+        yield from _write_checkpointed(engine, chunks, load_id, done)
+    else:
+        _reset_table(engine, table)
+        with engine.begin() as connection:
+            for chunk in chunks:
+                chunk = chunk.drop_duplicates(subset='ID')
+                write_batches(connection, table, with_row_hashes(chunk))
+                yield chunk
 
-    finally:
-        if session:
-            session.close()
+    finalize_load(table, engine)
+    _finish_load(engine, load_id)
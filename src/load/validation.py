@@ -0,0 +1,205 @@
+"""
+This module checks a DataFrame against the SQLAlchemy model it is loaded into,
+before any table is dropped or written.
+
+It defines the following:
+- compile_checks: Turns the columns of a table into vectorized checks.
+- validate_frame: Counts the violations of every check in a DataFrame.
+- validate_chunks: Same for a sequence of chunks, keys checked across chunks.
+- format_report: One line summary of a report.
+- ValidationError: Raised by the loaders when a report is not empty.
+
+Usage:
+    report = validate_frame(df, MergedDAta.__table__)
+    if report:
+        raise ValidationError('merged_data', report)
+
+    The checks follow the column definitions: NOT NULL columns without a
+    default must be present and have no missing value, Integer/Float/Boolean/
+    DateTime values must be coercible to the column type (and Integer within
+    its 32-bit range), String(n) values must fit in n characters and the
+    primary key must be unique. Every check is a whole-column operation, so a
+    million rows are validated in a fraction of a second instead of failing
+    halfway through the insert.
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import BigInteger, Boolean, DateTime, Float, Integer, String
+
+from models.schema import LOADER_COLUMNS
+
+INT32_RANGE = (-2**31, 2**31 - 1)
+
+_compiled = {}
+
+
+def _present(values):
+    return values.notna().to_numpy()
+
+
+def _numeric(values):
+    # Values of a non-numeric column that cannot be read as numbers become NaN
+    if pd.api.types.is_bool_dtype(values.dtype) or pd.api.types.is_numeric_dtype(values.dtype):
+        return values.astype('float64')
+    return pd.to_numeric(values.astype(object), errors='coerce').astype('float64')
+
+
+def _check_null(values):
+    return int((~_present(values)).sum())
+
+
+def _check_integer(values):
+    numbers = _numeric(values).to_numpy()
+    present = _present(values)
+    bad = present & ~(np.isfinite(numbers) & (numbers == np.floor(numbers)))
+    return int(bad.sum())
+
+
+def _check_int32_range(values):
+    if pd.api.types.is_integer_dtype(values.dtype) and values.dtype.itemsize <= 4:
+        return 0
+    numbers = _numeric(values).to_numpy()
+    with np.errstate(invalid='ignore'):
+        out = (numbers < INT32_RANGE[0]) | (numbers > INT32_RANGE[1])
+    return int(out.sum())
+
+
+def _check_float(values):
+    numbers = _numeric(values).to_numpy()
+    return int((_present(values) & np.isnan(numbers)).sum())
+
+
+def _check_boolean(values):
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return 0
+    present = values[_present(values)]
+    if pd.api.types.is_numeric_dtype(present.dtype):
+        return int((~present.isin([0, 1])).sum())
+    return int((~present.astype(object).isin([True, False])).sum())
+
+
+def _check_datetime(values):
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return 0
+    present = values[_present(values)].astype(object)
+    parsed = pd.to_datetime(present, errors='coerce', utc=True, format='ISO8601')
+    return int(parsed.isna().sum())
+
+
+def _length_check(length):
+    def check(values):
+        present = values[_present(values)].astype(str)
+        return int((present.str.len() > length).sum())
+    return check
+
+
+def compile_checks(table):
+    """
+    Builds the checks of every column of a table, once per table.
+
+    Returns:
+        dict: Column name -> {'required': bool, 'checks': {name: function}},
+        where each function returns the number of offending values.
+    """
+    if table.name in _compiled:
+        return _compiled[table.name]
+
+    columns = {}
+    for column in table.columns:
+        if column.name in LOADER_COLUMNS:
+            continue
+        checks = {}
+        if not column.nullable:
+            checks['null'] = _check_null
+        if isinstance(column.type, Boolean):
+            checks['type'] = _check_boolean
+        elif isinstance(column.type, Integer):
+            checks['type'] = _check_integer
+            if not isinstance(column.type, BigInteger):
+                checks['range'] = _check_int32_range
+        elif isinstance(column.type, Float):
+            checks['type'] = _check_float
+        elif isinstance(column.type, DateTime):
+            checks['type'] = _check_datetime
+        elif isinstance(column.type, String) and column.type.length:
+            checks['length'] = _length_check(column.type.length)
+
+        columns[column.name] = {
+            'required': not column.nullable and column.default is None and column.server_default is None,
+            'checks': checks,
+        }
+
+    _compiled[table.name] = columns
+    return columns
+
+
+def _add(report, column, check, count):
+    if count:
+        counts = report.setdefault(column, {})
+        counts[check] = counts.get(check, 0) + count
+
+
+def _validate_columns(df, table, report):
+    for name, spec in compile_checks(table).items():
+        if name not in df.columns:
+            if spec['required']:
+                _add(report, name, 'missing', len(df))
+            continue
+        for check, function in spec['checks'].items():
+            _add(report, name, check, function(df[name]))
+
+
+def _key_columns(table):
+    return [column.name for column in table.primary_key.columns]
+
+
+def validate_frame(df, table):
+    """
+    Validates a DataFrame against a table in one pass over its columns.
+
+    Returns:
+        dict: Column -> {check: number of violations}; empty when df is valid.
+    """
+    report = {}
+    _validate_columns(df, table, report)
+    keys = _key_columns(table)
+    if keys and set(keys) <= set(df.columns):
+        _add(report, ', '.join(keys), 'duplicate', int(df.duplicated(subset=keys).sum()))
+    return report
+
+
+def validate_chunks(chunks, table):
+    """
+    Same as validate_frame for an iterator of chunks; only the primary key
+    values are kept across chunks, to find duplicates between them.
+    """
+    report = {}
+    keys = _key_columns(table)
+    seen = []
+    for chunk in chunks:
+        _validate_columns(chunk, table, report)
+        if keys and set(keys) <= set(chunk.columns):
+            seen.append(chunk[keys].reset_index(drop=True))
+    if seen:
+        _add(report, ', '.join(keys), 'duplicate', int(pd.concat(seen).duplicated().sum()))
+    return report
+
+
+def format_report(report):
+    return '; '.join(
+        f"{column}: " + ', '.join(f"{count} {check}" for check, count in counts.items())
+        for column, counts in report.items()
+    )
+
+
+class ValidationError(ValueError):
+    """
+    The rows do not match the model of their table; nothing was written.
+    Retrying does not help until the input changes.
+    """
+
+    def __init__(self, table_name, report):
+        super().__init__(f"Validation failed for {table_name}, nothing was loaded: {format_report(report)}")
+        self.table_name = table_name
+        self.report = report
+
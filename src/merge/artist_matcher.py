@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process, utils
+
+# fuzzywuzzy rounded WRatio to an int before comparing it with 80, so any raw
+# score that rounds up to 80 has to count as a match as well.
+MATCH_THRESHOLD = 80
+SCORE_CUTOFF = MATCH_THRESHOLD - 0.5
+
+# Bump whenever the matching rules change, so cached decisions are discarded
+MATCHER_VERSION = 2
+
+# fuzzywuzzy's full_process(force_ascii=True) deleted the Latin-1 range before
+# scoring, so 'Sadé' was scored as 'sad'; the same names have to match here
+_FORCE_ASCII = dict.fromkeys(range(128, 256))
+
+
+def process_artist(artist):
+    """
+    Normalizes an artist name the way fuzzywuzzy's extractOne did: Latin-1
+    characters removed, then lower case alphanumerics only. Missing values
+    become ''.
+    """
+    if not isinstance(artist, str):
+        return ''
+    return utils.default_process(artist.translate(_FORCE_ASCII))
+
+
+class ArtistMatcher:
+    """
+    Resolves Grammy artists to the Spotify spelling of the same artist.
+
+    A track_name -> candidate artists index is built once from the Spotify
+    frame. Every (Grammy artist, candidate) pair is then scored in a single
+    batched RapidFuzz call, instead of one extractOne call per (Grammy row,
+    Spotify row) pair. An optional MatchCache answers the pairs that were
+    already decided on a previous run.
+    """
+
+    def __init__(self, spotify_df, scorer=fuzz.WRatio, score_cutoff=SCORE_CUTOFF, cache=None):
+        self.spotify_df = spotify_df
+        self.scorer = scorer
+        self.score_cutoff = score_cutoff
+        self.cache = cache
+        self.index = {}
+
+    @classmethod
+    def cache_version(cls, scorer=fuzz.WRatio, score_cutoff=SCORE_CUTOFF):
+        return f"{MATCHER_VERSION}:{scorer.__module__}.{scorer.__name__}:{score_cutoff}"
+
+    def build_index(self, track_names):
+        """
+        Indexes the distinct Spotify artists of every track in track_names,
+        keeping the order in which they first appear in the Spotify frame.
+        """
+        candidates = self.spotify_df.loc[
+            self.spotify_df['track_name'].isin(set(track_names)), ['track_name', 'artists']
+        ].drop_duplicates()
+        self.index = {
+            track_name: group['artists'].tolist()
+            for track_name, group in candidates.groupby('track_name', sort=False)
+        }
+        return self.index
+
+    def score_pairs(self, queries, choices):
+        """
+        Decides whether each normalized (query, choice) pair is a match.
+
+        Returns:
+            np.ndarray: One boolean per pair.
+        """
+        if not queries:
+            return np.zeros(0, dtype=bool)
+        scores = process.cpdist(queries, choices, scorer=self.scorer, score_cutoff=self.score_cutoff)
+        return scores >= self.score_cutoff
+
+    def decide_pairs(self, queries, choices):
+        """
+        Same as score_pairs, but only scores the pairs missing from the cache and
+        stores their decisions for the next run.
+        """
+        if self.cache is None:
+            return self.score_pairs(queries, choices)
+
+        pairs = list(zip(queries, choices))
+        decisions = self.cache.get_many(pairs)
+        missing = [pair for pair in dict.fromkeys(pairs) if pair not in decisions]
+        if missing:
+            scored = self.score_pairs([pair[0] for pair in missing], [pair[1] for pair in missing])
+            new_decisions = dict(zip(missing, scored.tolist()))
+            self.cache.put_many(new_decisions)
+            decisions.update(new_decisions)
+        return np.array([decisions[pair] for pair in pairs], dtype=bool)
+
+    def match(self, df):
+        """
+        Matches the 'artists' column of a Grammy frame against Spotify.
+
+        Each row gets the first Spotify candidate of its track (in frame order)
+        scoring at least the threshold, or None when no candidate does.
+
+        Returns:
+            pd.Series: The matched Spotify artist per row, aligned on df.index.
+        """
+        self.build_index(df['track_name'].unique())
+
+        positions, queries, choices, candidates = [], [], [], []
+        for position, (track_name, artist) in enumerate(zip(df['track_name'], df['artists'])):
+            query = process_artist(artist)
+            if not query:
+                continue
+            for candidate in self.index.get(track_name, ()):
+                positions.append(position)
+                queries.append(query)
+                choices.append(process_artist(candidate))
+                candidates.append(candidate)
+
+        is_match = self.decide_pairs(queries, choices)
+
+        matched = np.full(len(df), None, dtype=object)
+        for position, candidate, hit in zip(positions, candidates, is_match):
+            if hit and matched[position] is None:
+                matched[position] = candidate
+        return pd.Series(matched, index=df.index)
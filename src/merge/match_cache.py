@@ -0,0 +1,124 @@
+"""
+This module provides an on-disk cache of fuzzy match decisions, so a daily merge
+only scores artist pairs it has never seen before.
+
+It defines the following class:
+- MatchCache: SQLite-backed, size-bounded (LRU) store of pair decisions.
+
+Usage:
+    Entries are keyed by the normalized Grammy artist, the normalized Spotify
+    artist and a version string describing the scorer and threshold. Opening the
+    cache with a different version drops every entry of the previous one, so
+    changing the matching algorithm invalidates the cache automatically.
+    Several processes can use the same file at once (see sharded_join).
+"""
+import os
+import sqlite3
+import time
+
+LOOKUP_BATCH_SIZE = 400
+# Seconds a connection waits for another process's write lock before failing
+BUSY_TIMEOUT_S = 60
+
+
+class MatchCache:
+
+    def __init__(self, path, version, max_entries=1_000_000):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Every merge shard process opens the same file: with WAL, readers never
+        # block on a writer, and writers queue for the lock instead of failing
+        self.connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT_S)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS match_cache ("
+            " version TEXT NOT NULL,"
+            " query TEXT NOT NULL,"
+            " choice TEXT NOT NULL,"
+            " is_match INTEGER NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (version, query, choice))"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS match_cache_lru ON match_cache (last_used)")
+        self.connection.execute("DELETE FROM match_cache WHERE version != ?", (version,))
+        self.connection.commit()
+
+    def get_many(self, pairs):
+        """
+        Looks up (query, choice) pairs and refreshes the recency of every hit.
+
+        Returns:
+            dict: Cached decision (bool) per pair found in the cache.
+        """
+        found = {}
+        unique_pairs = list(dict.fromkeys(pairs))
+        for start in range(0, len(unique_pairs), LOOKUP_BATCH_SIZE):
+            batch = unique_pairs[start:start + LOOKUP_BATCH_SIZE]
+            placeholders = ', '.join(['(?, ?)'] * len(batch))
+            rows = self.connection.execute(
+                f"SELECT query, choice, is_match FROM match_cache "
+                f"WHERE version = ? AND (query, choice) IN (VALUES {placeholders})",
+                [self.version, *(value for pair in batch for value in pair)],
+            )
+            found.update(((query, choice), bool(is_match)) for query, choice, is_match in rows)
+
+        now = time.time()
+        self.connection.executemany(
+            "UPDATE match_cache SET last_used = ? WHERE version = ? AND query = ? AND choice = ?",
+            [(now, self.version, query, choice) for query, choice in found],
+        )
+        self.connection.commit()
+        self.hits += len(found)
+        self.misses += len(unique_pairs) - len(found)
+        return found
+
+    def put_many(self, decisions):
+        """
+        Stores a decision (bool) per (query, choice) pair, then evicts the least
+        recently used entries above max_entries.
+        """
+        now = time.time()
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO match_cache VALUES (?, ?, ?, ?, ?)",
+            [(self.version, query, choice, int(is_match), now)
+             for (query, choice), is_match in decisions.items()],
+        )
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM match_cache WHERE rowid IN "
+                "(SELECT rowid FROM match_cache ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+        self.connection.commit()
+
+    def invalidate(self):
+        """
+        Removes every cached decision.
+        """
+        self.connection.execute("DELETE FROM match_cache")
+        self.connection.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM match_cache").fetchone()[0]
@@ -1,5 +1,26 @@
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
 import pandas as pd
-from fuzzywuzzy import process
+from src.telemetry.instrumentation import traced_method
+from decouple import config
+from src.artifacts.artifact_store import ArtifactStore
+from models.schema import MERGED_SCHEMA, apply_schema
+from src.merge.artist_matcher import ArtistMatcher
+from src.merge.match_cache import MatchCache
+from src.merge.track_matcher import TrackMatcher
+
+SHARDS_PER_WORKER = 4
+# Grammy columns renamed to their merged_data names
+GRAMMY_COLUMNS = {
+    'winner': 'grammy_winner',
+    'year': 'grammy_year',
+    'nominee': 'track_name',
+    'artist': 'artists'
+}
+# Original Spotify row of each joined row, used to restore the serial order
+POSITION_COLUMN = '_spotify_position'
 
 class MergeData:
     def __init__(self, grammy_df, spotify_df):
@@ -7,62 +28,202 @@ class MergeData:
         self.df_grammy = grammy_df
         self.spotify_df = spotify_df
 
-    def merge(self):
-        # Rename columns in the Grammy dataframe for clarity
-        self.df_grammy.rename(columns={
-            'winner': 'grammy_winner',
-            'year': 'grammy_year',
-            'nominee': 'track_name',
-            'artist': 'artists'
-        }, inplace=True)
+    @staticmethod
+    def open_match_cache():
+        # Decisions persist across runs; an empty MATCH_CACHE_PATH disables the cache
+        path = config('MATCH_CACHE_PATH', default='./cache/match_cache.sqlite')
+        if not path:
+            return None
+        return MatchCache(path, ArtistMatcher.cache_version(),
+                          max_entries=config('MATCH_CACHE_MAX_ENTRIES', default=1_000_000, cast=int))
 
+    @staticmethod
+    def grammy_lookup(grammy_df, spotify_df, match_cache=None):
+        """
+        Aggregates the (renamed) Grammy nominations per track and artist and
+        replaces each artist with its Spotify spelling, giving the frame the
+        Spotify tracks are joined with.
+        """
         # Aggregate Grammy data by track and artist to get grammy_winner and year
-        df_aggregated = self.df_grammy.groupby(['track_name', 'artists']).agg({
+        df_aggregated = grammy_df.groupby(['track_name', 'artists']).agg({
             'grammy_winner': 'max',
             'grammy_year': 'max'
         }).reset_index()
 
          # Count the number of Grammy wins for each track and artist
-        grammy_count = self.df_grammy.groupby(['track_name', 'artists']).size().reset_index(name='number_wins')
+        grammy_count = grammy_df.groupby(['track_name', 'artists']).size().reset_index(name='number_wins')
 
         # Merge the aggregated Grammy data with the count of wins
-        self.df_grammy = pd.merge(df_aggregated, grammy_count, on=['track_name', 'artists'], how='left')
-
-        # Define a function to find the best matching artist using fuzzy matching
-        def find_best_match(row):
-            track_name = row['track_name']
-            artist = row['artists']
-            
-            # Get the list of artists from the Spotify dataframe that match the track name
-            spotify_artists = self.spotify_df[self.spotify_df['track_name'] == track_name]['artists'].tolist()
-            best_match = None
-            best_score = 0
-
-            # Iterate through Spotify artists to find the best match
-            for spotify_artist in spotify_artists:
-                match, score = process.extractOne(artist, [spotify_artist])
-                if score > best_score:
-                    best_score = score
-                    best_match = match
-                # If a good match is found, return it
-                if best_score >= 80:  
-                    return best_match
-            return None
+        grammy_df = pd.merge(df_aggregated, grammy_count, on=['track_name', 'artists'], how='left')
+
+        # Replace each Grammy artist with its best fuzzy match among the Spotify
+        # artists of the same track (first candidate scoring >= 80, else None)
+        grammy_df['artists'] = ArtistMatcher(spotify_df, cache=match_cache).match(grammy_df)
+        return grammy_df
 
-        # Apply the best match function to each row in the Grammy dataframe
-        self.df_grammy['artists'] = self.df_grammy.apply(find_best_match, axis=1)
+    @staticmethod
+    def join(grammy_df, spotify_df, match_cache=None):
+        """
+        Aggregates the (renamed) Grammy nominations, matches their artists and
+        left-joins them onto the Spotify tracks, in Spotify row order.
+        """
+        grammy_df = MergeData.grammy_lookup(grammy_df, spotify_df, match_cache)
 
         # Merge the Grammy dataframe with the Spotify dataframe based on track name and artist
-        merged_df = pd.merge(self.spotify_df, self.df_grammy, left_on=['track_name', 'artists'], right_on=['track_name', 'artists'], how='left')
+        return pd.merge(spotify_df, grammy_df, left_on=['track_name', 'artists'], right_on=['track_name', 'artists'], how='left')
+
+    @traced_method()
+    def merge(self, workers=None, checkpoint=None):
+        """
+        Merges the Grammy nominations into the Spotify tracks.
 
-        # Fill missing Grammy winner information and count of win
-        merged_df['grammy_winner'].fillna('False', inplace=True)
-        merged_df['number_wins'].fillna(0, inplace=True)
+        Args:
+            workers (int): Processes used to match and join; defaults to
+                MERGE_WORKERS (1, the serial path). With more than one, both
+                frames are split into shards by track_name (see sharded_join).
+            checkpoint (ChunkCheckpoint): Keeps the matched nominees and the
+                Grammy lookup (or every joined shard), so a retry does not
+                repeat the matching already done.
 
-        # Convert 'grammy_year' to nullable integer type and 'number_wins' to numeric
-        merged_df['grammy_year'] = merged_df['grammy_year'].astype('Int64')
-        merged_df['number_wins'] = pd.to_numeric(merged_df['number_wins'], downcast='integer', errors='coerce')
+        Returns:
+            pd.DataFrame: The merged data, sorted by artist and track name.
+        """
+        if workers is None:
+            workers = config('MERGE_WORKERS', default=1, cast=int)
+
+        # Rename columns in the Grammy dataframe for clarity
+        self.df_grammy.rename(columns=GRAMMY_COLUMNS, inplace=True)
+
+        # Nominees spelled differently from the Spotify track ("Song (Feat. X)")
+        # take the Spotify name, so the exact joins below find them
+        matched = checkpoint.read('grammy') if checkpoint is not None else None
+        if matched is not None:
+            self.df_grammy = matched
+        elif config('TRACK_MATCH', default='fuzzy') == 'fuzzy':
+            self.df_grammy['track_name'] = TrackMatcher(self.spotify_df).match(self.df_grammy)
+            if checkpoint is not None:
+                checkpoint.write('grammy', self.df_grammy)
+
+        if workers > 1:
+            merged_df = sharded_join(self.df_grammy, self.spotify_df, workers, checkpoint=checkpoint)
+        else:
+            grammy_df = checkpoint.read('lookup') if checkpoint is not None else None
+            if grammy_df is None:
+                match_cache = self.open_match_cache()
+                try:
+                    grammy_df = self.grammy_lookup(self.df_grammy, self.spotify_df, match_cache)
+                finally:
+                    if match_cache is not None:
+                        print(f"Match cache: {match_cache.stats()}")
+                        match_cache.close()
+                if checkpoint is not None:
+                    checkpoint.write('lookup', grammy_df)
+            merged_df = pd.merge(self.spotify_df, grammy_df, on=['track_name', 'artists'], how='left')
+
+        merged_df = fill_merged(merged_df)
 
         # Sort the merged dataframe by artist and track name, resetting the index
         merged_df = merged_df.sort_values(by=['artists', 'track_name']).reset_index(drop=True)
-        return merged_df
\ No newline at end of file
+        return merged_df
+
+
+def fill_merged(merged_df):
+    """
+    Gives the Spotify rows without a nomination their defaults and casts the
+    joined frame to the merged_data schema.
+    """
+    # Fill missing Grammy winner information and count of win
+    merged_df['grammy_winner'] = merged_df['grammy_winner'].fillna(False)
+    merged_df['number_wins'] = merged_df['number_wins'].fillna(0)
+
+    # Cast every column to the compact merged_data schema (bool winner,
+    # nullable small ints for year and wins, pyarrow strings, float32 features)
+    return apply_schema(merged_df, MERGED_SCHEMA)
+
+
+def shard_ids(track_names, shards):
+    """
+    Assigns every row to a shard by hashing its track name, so all the rows of
+    a track, on both sides of the join, land in the same shard.
+    """
+    hashes = pd.util.hash_array(np.asarray(track_names.astype(object).fillna(''), dtype=object))
+    return hashes % np.uint64(shards)
+
+
+def _join_shard(shard, grammy_ref, spotify_ref, shard_dir):
+    # Runs in a worker process: shards arrive as memory-mapped Arrow files and
+    # the joined shard goes back the same way, so no DataFrame is pickled
+    grammy_df = ArtifactStore.read(grammy_ref)
+    spotify_df = ArtifactStore.read(spotify_ref)
+    match_cache = MergeData.open_match_cache()
+    try:
+        merged_df = MergeData.join(grammy_df, spotify_df, match_cache)
+    finally:
+        if match_cache is not None:
+            match_cache.close()
+    return ArtifactStore(shard_dir).write(merged_df, f'merged_{shard}')
+
+
+def sharded_join(grammy_df, spotify_df, workers, shards=None, checkpoint=None):
+    """
+    Same result as MergeData.join, computed on several cores.
+
+    Matching only ever compares rows with the same track_name, so both frames
+    are hash-partitioned by track_name and every shard is joined independently
+    in a process pool. Shards are exchanged as Arrow IPC files under
+    MERGE_SHARD_DIR (default: the system temp dir; /dev/shm keeps them in
+    memory). The joined shards are put back in Spotify row order, so the
+    output is identical to the serial path.
+
+    Args:
+        grammy_df (pd.DataFrame): Renamed Grammy nominations.
+        spotify_df (pd.DataFrame): Transformed Spotify tracks.
+        workers (int): Size of the process pool.
+        shards (int): Number of partitions; defaults to 4 per worker so a few
+            heavy tracks do not leave the other workers idle.
+        checkpoint (ChunkCheckpoint): Joined shards are written into it and
+            recorded as they finish, and the shards it already holds are not
+            joined again.
+
+    Returns:
+        pd.DataFrame: The joined frame, before filling and sorting.
+    """
+    shards = shards or workers * SHARDS_PER_WORKER
+    spotify_df = spotify_df.assign(**{POSITION_COLUMN: np.arange(len(spotify_df))})
+    grammy_shards = shard_ids(grammy_df['track_name'], shards)
+    spotify_shards = shard_ids(spotify_df['track_name'], shards)
+
+    refs = {}
+    if checkpoint is not None:
+        refs = {shard: checkpoint.get(f'merged_{shard}') for shard in range(shards)}
+        refs = {shard: ref for shard, ref in refs.items() if ref is not None}
+
+    with tempfile.TemporaryDirectory(prefix='merge_shards_', dir=config('MERGE_SHARD_DIR', default=None)) as shard_dir:
+        store = ArtifactStore(shard_dir)
+        output_dir = checkpoint.directory if checkpoint is not None else shard_dir
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    _join_shard, shard,
+                    store.write(grammy_df[grammy_shards == shard], f'grammy_{shard}'),
+                    store.write(spotify_df[spotify_shards == shard], f'spotify_{shard}'),
+                    output_dir,
+                ): shard
+                for shard in range(shards) if shard not in refs
+            }
+            # Every shard that succeeds is recorded, even if another one fails
+            errors = []
+            for future in as_completed(futures):
+                try:
+                    refs[futures[future]] = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if checkpoint is not None:
+                    checkpoint.record(f'merged_{futures[future]}', refs[futures[future]])
+            if errors:
+                raise errors[0]
+        merged_df = pd.concat([ArtifactStore.read(refs[shard]) for shard in range(shards)], ignore_index=True)
+
+    merged_df = merged_df.sort_values(POSITION_COLUMN, kind='stable').drop(columns=POSITION_COLUMN)
+    return merged_df.reset_index(drop=True)
@@ -0,0 +1,176 @@
+"""
+This module merges the Grammy nominations into the Spotify tracks chunk by
+chunk, so the Spotify data never has to fit in memory.
+
+It defines the following:
+- GrammyLookup: The Grammy data aggregated and matched to Spotify spellings,
+  keyed by (track_name, artists).
+- stream_merge: Yields the merged Spotify chunks.
+
+Usage:
+    chunks = lambda: iter_artifact_chunks(spotify_ref)
+    ref = ArtifactStore.for_run(run_id).write_chunks(stream_merge(grammy_df, chunks), 'merge')
+
+    The Spotify chunks are read twice. The first pass only looks at
+    (track_name, artists) and keeps the pairs the matchers can ever pick: the
+    tracks named like a nominee, or sharing a token with one that is not
+    frequent (see TrackMatcher). The Grammy lookup is built from those pairs,
+    with the same matching as MergeData.merge. The second pass left-joins every
+    chunk with the lookup and hands it on, filled and cast to MERGED_SCHEMA.
+
+    With a checkpoint (see src/artifacts/checkpoint.py), the lookup and every
+    merged chunk are kept on disk as they are done, so a retry neither repeats
+    the matching nor the chunks already merged.
+
+    Memory depends on the Grammy data (nominees, their tokens and at most
+    max_postings names per token), not on the size of the Spotify input. The
+    output holds the same rows as MergeData.merge, in Spotify order instead of
+    sorted by artist and track name; readers sort in the database.
+"""
+import pandas as pd
+from decouple import config
+
+from src.merge.merge import GRAMMY_COLUMNS, MergeData, fill_merged
+from src.merge.track_matcher import TrackMatcher, key_tokens, track_keys
+
+KEYS = ['track_name', 'artists']
+
+
+class GrammyLookup:
+
+    def __init__(self, grammy_df, track_match=True, max_postings=1000):
+        self.grammy_df = grammy_df.rename(columns=GRAMMY_COLUMNS)
+        self.track_match = track_match
+        self.max_postings = max_postings
+
+        names = self.grammy_df['track_name'].dropna().astype(object).unique()
+        keys = track_keys(names)
+        self.names = set(names)
+        self.keys = set(keys) - {''}
+        self.vocabulary = key_tokens(keys)['token'].unique()
+
+        # Distinct Spotify names seen per token, until the token turns out frequent
+        self.postings = {}
+        self.stop_tokens = set()
+        self.pairs = []
+        self.table = None
+
+    def _count(self, tokens, hashes):
+        # Exact distinct-name counts, without ever keeping more than
+        # max_postings + 1 names per token
+        tokens = tokens[~tokens['token'].isin(self.stop_tokens).to_numpy()]
+        for token, keys in tokens.groupby('token', sort=False)['key']:
+            seen = self.postings.setdefault(token, set())
+            if len(keys) <= self.max_postings:
+                seen.update(hashes[keys.to_numpy()].tolist())
+            if len(keys) > self.max_postings or len(seen) > self.max_postings:
+                self.stop_tokens.add(token)
+                del self.postings[token]
+
+    def _relevant(self, names):
+        # Names the matchers may pick: a nominee's name, its normalized key, or
+        # a token shared with a nominee that is not frequent
+        relevant = names.isin(self.names).to_numpy()
+        if not self.track_match:
+            return relevant
+        keys = track_keys(names)
+        tokens = key_tokens(keys, vocabulary=self.vocabulary)
+        self._count(tokens, pd.util.hash_array(names.to_numpy()))
+        rare = tokens.loc[~tokens['token'].isin(self.stop_tokens).to_numpy(), 'key'].unique()
+        relevant |= keys.isin(self.keys).to_numpy()
+        relevant[rare] = True
+        return relevant
+
+    def observe(self, chunk):
+        """
+        First pass: keeps the (track_name, artists) pairs of a Spotify chunk
+        that matter to the nominees.
+        """
+        # Like in MergeData.merge, tracks without an artist still count as known names
+        pairs = chunk.loc[chunk['track_name'].notna().to_numpy(), KEYS].astype(object).drop_duplicates()
+        names = pd.Series(pairs['track_name'].unique(), dtype=object)
+        if len(names):
+            keep = set(names[self._relevant(names)])
+            self.pairs.append(pairs[pairs['track_name'].isin(keep).to_numpy()])
+
+    def build(self, match_cache=None):
+        """
+        Matches the nominees against the pairs observed and builds the lookup.
+
+        Returns:
+            pd.DataFrame: grammy_winner, grammy_year and number_wins per
+            (track_name, artists), with Spotify spellings.
+        """
+        spotify = pd.concat(self.pairs, ignore_index=True).drop_duplicates(ignore_index=True) \
+            if self.pairs else pd.DataFrame(columns=KEYS, dtype=object)
+        self.pairs = []
+        if self.track_match:
+            # Names kept for a token that later turned out frequent are not needed
+            names = pd.Series(spotify['track_name'].unique(), dtype=object)
+            keys = track_keys(names)
+            tokens = key_tokens(keys, vocabulary=self.vocabulary)
+            rare = tokens.loc[~tokens['token'].isin(self.stop_tokens).to_numpy(), 'key'].unique()
+            keep = names.isin(self.names).to_numpy() | keys.isin(self.keys).to_numpy()
+            keep[rare] = True
+            spotify = spotify[spotify['track_name'].isin(set(names[keep])).to_numpy()]
+            self.grammy_df['track_name'] = TrackMatcher(
+                spotify, max_postings=self.max_postings, stop_tokens=self.stop_tokens,
+            ).match(self.grammy_df)
+
+        print(f"Grammy lookup built from {len(spotify)} of the Spotify (track, artist) pairs")
+        self.table = MergeData.grammy_lookup(self.grammy_df, spotify, match_cache)
+        return self.table
+
+    def enrich(self, chunk):
+        """
+        Second pass: adds grammy_winner, grammy_year and number_wins to a
+        Spotify chunk.
+        """
+        merged = pd.merge(chunk, self.table, on=KEYS, how='left')
+        return fill_merged(merged)
+
+
+def stream_merge(grammy_df, spotify_chunks, track_match=None, checkpoint=None):
+    """
+    Merges the Grammy nominations into Spotify chunks.
+
+    Args:
+        grammy_df (pd.DataFrame): Transformed Grammy nominations.
+        spotify_chunks (callable): Returns a new iterator over the transformed
+            Spotify chunks; it is called once per pass.
+        track_match (bool): Fuzzy-match nominee names; defaults to TRACK_MATCH.
+        checkpoint (ChunkCheckpoint): Keeps the lookup and every merged chunk,
+            so a retry skips the first pass and the chunks already merged.
+
+    Yields:
+        pd.DataFrame: The merged chunks, in Spotify order.
+    """
+    if track_match is None:
+        track_match = config('TRACK_MATCH', default='fuzzy') == 'fuzzy'
+    lookup = GrammyLookup(grammy_df, track_match=track_match)
+    lookup.table = checkpoint.read('lookup') if checkpoint is not None else None
+
+    if lookup.table is None:
+        for chunk in spotify_chunks():
+            lookup.observe(chunk)
+
+        match_cache = MergeData.open_match_cache()
+        try:
+            lookup.build(match_cache)
+        finally:
+            if match_cache is not None:
+                match_cache.close()
+        if checkpoint is not None:
+            checkpoint.write('lookup', lookup.table)
+
+    rows = 0
+    for index, chunk in enumerate(spotify_chunks()):
+        name = f'chunk_{index}'
+        merged = checkpoint.read(name) if checkpoint is not None else None
+        if merged is None:
+            merged = lookup.enrich(chunk)
+            if checkpoint is not None:
+                checkpoint.write(name, merged)
+        rows += len(merged)
+        yield merged
+    print(f"Streaming merge finished: {rows} rows")
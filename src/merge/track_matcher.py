@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from rapidfuzz import fuzz, process
+
+from src.merge.artist_matcher import SCORE_CUTOFF, process_artist
+
+# Minimum fuzz.ratio between the normalized Grammy and Spotify track names
+TRACK_SCORE_CUTOFF = 90
+
+# Featured artists and version suffixes, which the two sources spell differently:
+# "Song (feat. X)", "Song [with X]", "Song Ft. X", "Song - Remastered 2011"
+DECORATIONS = (
+    r"\s*[\(\[](?:feat|ft|featuring|with)\b[^\)\]]*[\)\]]"
+    r"|\s+(?:feat|ft|featuring)\b\.?\s.*$"
+    r"|\s+-\s+[^-]*\b(?:remaster(?:ed)?|version|edit|mix|live|mono|stereo)\b.*$"
+)
+
+
+def track_keys(names):
+    """
+    Normalizes track names for comparison: lower case, without featured artists,
+    version suffixes, apostrophes and punctuation. The regular expressions run
+    in Arrow compute kernels instead of once per name in Python.
+
+    Returns:
+        pd.Series: One key per name (None for missing names), on a RangeIndex.
+    """
+    keys = pc.utf8_lower(pa.array(np.asarray(names, dtype=object), type=pa.string(), from_pandas=True))
+    keys = pc.replace_substring_regex(keys, DECORATIONS, '')
+    keys = pc.replace_substring_regex(keys, "['’]", '')
+    keys = pc.utf8_trim_whitespace(pc.replace_substring_regex(keys, r'[^\pL\pN]+', ' '))
+    return pd.Series(keys.to_numpy(zero_copy_only=False), dtype=object)
+
+
+def key_tokens(keys, vocabulary=None):
+    """
+    Splits normalized keys into one row per (key position, distinct token),
+    optionally keeping only the tokens found in vocabulary. Filtering in Arrow
+    keeps the frame small.
+    """
+    split = pc.split_pattern(pa.array(keys.to_numpy(), type=pa.string(), from_pandas=True), ' ')
+    parents = pc.list_parent_indices(split)
+    tokens = pc.list_flatten(split)
+    keep = pc.not_equal(tokens, '')
+    if vocabulary is not None:
+        keep = pc.and_(keep, pc.is_in(tokens, value_set=pa.array(vocabulary, type=pa.string())))
+    return pd.DataFrame({
+        'key': pc.filter(parents, keep).to_numpy(),
+        'token': pc.filter(tokens, keep).to_numpy(zero_copy_only=False),
+    }).drop_duplicates()
+
+
+class TrackMatcher:
+    """
+    Resolves Grammy nominees that have no Spotify track of exactly the same
+    name to the Spotify spelling of the track ("Song (Feat. X)", "Dont Stop"...).
+
+    Comparing every nominee with every Spotify track would be quadratic, so
+    candidates come from an inverted index of the Spotify track names by
+    token (blocking): a nominee is only compared with the tracks sharing most
+    of its tokens, or the same normalized name. Tokens found in more than
+    max_postings track names ("the", "love") are left out of the index. The
+    index and the candidate counts are built with Arrow kernels and pandas
+    joins, so the cost grows with the number of tokens, not with nominees x
+    tracks.
+
+    A candidate is accepted when the normalized names score at least
+    TRACK_SCORE_CUTOFF and one of the Spotify artists of the track matches the
+    Grammy artist like ArtistMatcher does; the best sum of both scores wins.
+    """
+
+    def __init__(self, spotify_df, track_cutoff=TRACK_SCORE_CUTOFF, artist_cutoff=SCORE_CUTOFF,
+                 max_postings=1000, max_candidates=20, min_overlap=0.5, stop_tokens=None):
+        self.spotify_df = spotify_df
+        self.track_cutoff = track_cutoff
+        self.artist_cutoff = artist_cutoff
+        self.max_postings = max_postings
+        self.max_candidates = max_candidates
+        self.min_overlap = min_overlap
+        # Tokens known to be frequent, when spotify_df only holds the names that
+        # matter to the nominees and its counts are partial (see stream_merge)
+        self.stop_tokens = stop_tokens or set()
+
+    def candidates(self, query_keys, track_keys):
+        """
+        Finds the candidate tracks of every query through the token index.
+
+        Args:
+            query_keys (pd.Series): Normalized nominees, on a RangeIndex.
+            track_keys (pd.Series): Normalized Spotify track names, on a RangeIndex.
+
+        Returns:
+            pd.DataFrame: Distinct (query, track) position pairs.
+        """
+        query_tokens = key_tokens(query_keys)
+        # Only the tokens the queries use are indexed; frequent ones carry no signal
+        track_tokens = key_tokens(track_keys, vocabulary=query_tokens['token'].unique())
+        postings = track_tokens['token'].value_counts()
+        frequent = set(postings.index[postings.to_numpy() > self.max_postings]) | set(self.stop_tokens)
+        track_tokens = track_tokens[~track_tokens['token'].isin(frequent).to_numpy()]
+        query_tokens = query_tokens[query_tokens['token'].isin(set(track_tokens['token']))]
+
+        shared = query_tokens.merge(track_tokens, on='token', suffixes=('_query', '_track')) \
+            .groupby(['key_query', 'key_track'], sort=False).size().rename('shared').reset_index()
+        usable = query_tokens.groupby('key')['token'].size()
+        shared = shared[shared['shared'].to_numpy() >= self.min_overlap * usable.loc[shared['key_query']].to_numpy()]
+        shared = shared.sort_values(['key_query', 'shared'], ascending=[True, False], kind='stable') \
+            .groupby('key_query', sort=False).head(self.max_candidates)
+
+        # Names left empty or made only of frequent tokens still match on the whole key
+        same_key = pd.merge(
+            pd.DataFrame({'key_query': query_keys.index, 'name': query_keys.to_numpy()}),
+            pd.DataFrame({'key_track': track_keys.index, 'name': track_keys.to_numpy()}),
+            on='name',
+        )
+        same_key = same_key[same_key['name'].to_numpy() != '']
+        pairs = pd.concat([shared[['key_query', 'key_track']], same_key[['key_query', 'key_track']]])
+        return pairs.drop_duplicates(ignore_index=True)
+
+    def match(self, df):
+        """
+        Resolves the 'track_name' of a Grammy frame to Spotify track names.
+
+        Rows whose track name exists in Spotify, or without an artist, keep it.
+
+        Returns:
+            pd.Series: The Spotify track name per row, aligned on df.index.
+        """
+        resolved = df['track_name'].astype(object).copy()
+        track_names = pd.Series(self.spotify_df['track_name'].dropna().unique(), dtype=object)
+
+        unknown = ~df['track_name'].isin(set(track_names)).to_numpy() \
+            & df['track_name'].notna().to_numpy() & df['artists'].notna().to_numpy()
+        queries = df.loc[unknown, ['track_name', 'artists']].astype(object).drop_duplicates(ignore_index=True)
+        if queries.empty or track_names.empty:
+            return resolved
+
+        query_keys = track_keys(queries['track_name'])
+        name_keys = track_keys(track_names)
+        pairs = self.candidates(query_keys, name_keys)
+        if pairs.empty:
+            return resolved
+
+        # Score the track names, then the artists of the surviving tracks
+        pairs['track_score'] = process.cpdist(
+            query_keys.to_numpy()[pairs['key_query']], name_keys.to_numpy()[pairs['key_track']],
+            scorer=fuzz.ratio, score_cutoff=self.track_cutoff,
+        )
+        pairs = pairs[pairs['track_score'].to_numpy() >= self.track_cutoff]
+        spotify_tracks = track_names.to_numpy()[pairs['key_track']]
+        spotify = self.spotify_df.loc[self.spotify_df['track_name'].isin(set(spotify_tracks)), ['track_name', 'artists']]
+        spotify = spotify.dropna().astype(object).drop_duplicates()
+        pairs = pairs.assign(
+            grammy_track=queries['track_name'].to_numpy()[pairs['key_query']],
+            grammy_artist=queries['artists'].to_numpy()[pairs['key_query']],
+            spotify_track=spotify_tracks,
+        ).merge(spotify.rename(columns={'track_name': 'spotify_track', 'artists': 'spotify_artist'}),
+                on='spotify_track')
+        if pairs.empty:
+            return resolved
+
+        pairs['artist_score'] = process.cpdist(
+            [process_artist(artist) for artist in pairs['grammy_artist']],
+            [process_artist(artist) for artist in pairs['spotify_artist']],
+            scorer=fuzz.WRatio, score_cutoff=self.artist_cutoff,
+        )
+        pairs = pairs[pairs['artist_score'].to_numpy() >= self.artist_cutoff]
+        pairs = pairs.assign(score=pairs['track_score'] + pairs['artist_score']) \
+            .sort_values('score', ascending=False, kind='stable') \
+            .drop_duplicates(['grammy_track', 'grammy_artist'])
+
+        matches = pd.MultiIndex.from_frame(pairs[['grammy_track', 'grammy_artist']])
+        lookup = pd.Series(pairs['spotify_track'].to_numpy(), index=matches)
+        rows = pd.MultiIndex.from_arrays([df['track_name'].astype(object), df['artists'].astype(object)])
+        found = lookup.reindex(rows).to_numpy()
+        hit = unknown & pd.notna(found)
+        resolved[hit] = found[hit]
+        print(f"Track names resolved by fuzzy matching: {len(pairs)} of {len(queries)} unknown nominees")
+        return resolved
@@ -0,0 +1,118 @@
+"""
+This module runs the whole ETL graph of dags/etl.py in a single process,
+without Airflow, for backfills and benchmarks.
+
+It defines the following:
+- run_pipeline: Python API; returns the frames produced by each stage.
+- main: Command line entry point.
+
+Usage:
+    python -m src.pipeline.runner --spotify-csv ./data/spotify_dataset.csv --no-store
+
+    DataFrames are passed between stages in memory instead of through artifact
+    files and XCom. The Spotify branch (read CSV, transform) and the Grammy
+    branch (load and read the database table, transform) are independent and
+    run concurrently on a thread pool. CSV parsing, the database round trips
+    and most pandas kernels release the GIL, so the two overlap well. Merge,
+    load and store then run in sequence, like in the DAG.
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dags.etl import export_and_upload, transform_grammy_df, transform_spotify_df
+from src.extract.read_grammy import read_grammy_db
+from src.extract.read_spotify import SPOTIFY_CSV_PATH, read_spotify_csv
+from src.load.load_to_database import load_data
+from src.merge.merge import MergeData
+from src.store.export import iter_frame_chunks
+from src.telemetry.instrumentation import traced
+
+
+def _timed(timings, stage, func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    timings[stage] = time.perf_counter() - started
+    logging.info(f"{stage} finished in {timings[stage]:.2f}s")
+    return result
+
+
+def _spotify_branch(path, timings):
+    spotify_df = _timed(timings, 'extract_spotify', read_spotify_csv, path)
+    return _timed(timings, 'transform_spotify', transform_spotify_df, spotify_df)
+
+
+def _grammy_branch(timings):
+    grammy_df = _timed(timings, 'extract_grammy', read_grammy_db)
+    if grammy_df is None:
+        raise RuntimeError("Failed to extract Grammy data.")
+    return _timed(timings, 'transform_grammy', transform_grammy_df, grammy_df)
+
+
+@traced('pipeline.run')
+def run_pipeline(spotify_path=SPOTIFY_CSV_PATH, load=True, store=True, merge_workers=None):
+    """
+    Runs extract, transform, merge, load and store in this process.
+
+    Args:
+        spotify_path (str): Spotify CSV to read.
+        load (bool): Load the merged data into the database.
+        store (bool): Export the loaded data and upload it to Google Drive.
+        merge_workers (int): Processes for the merge; defaults to MERGE_WORKERS.
+
+    Returns:
+        dict: The 'spotify', 'grammy', 'merged' and 'loaded' DataFrames, the
+        'stored' upload result, and the wall time of every stage in 'timings'.
+
+    Raises:
+        RuntimeError: If the Grammy extraction or the load fails.
+        ValidationError: If the Grammy or merged rows do not match their model.
+    """
+    timings = {}
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix='extract') as pool:
+        spotify_future = pool.submit(_spotify_branch, spotify_path, timings)
+        grammy_future = pool.submit(_grammy_branch, timings)
+        spotify_df = spotify_future.result()
+        grammy_df = grammy_future.result()
+    timings['branches'] = time.perf_counter() - started
+
+    result = {'spotify': spotify_df, 'grammy': grammy_df, 'loaded': None, 'stored': None, 'timings': timings}
+    merger = MergeData(grammy_df, spotify_df)
+    result['merged'] = _timed(timings, 'merge', merger.merge, workers=merge_workers)
+
+    if load:
+        result['loaded'] = _timed(timings, 'load', load_data, result['merged'])
+        if result['loaded'] is None:
+            raise RuntimeError("Failed to load the merged data.")
+
+    if store:
+        data = result['loaded'] if result['loaded'] is not None else result['merged']
+        result['stored'] = _timed(timings, 'store', export_and_upload, iter_frame_chunks(data))
+
+    timings['total'] = time.perf_counter() - started
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the Spotify/Grammy ETL in a single process.')
+    parser.add_argument('--spotify-csv', default=SPOTIFY_CSV_PATH)
+    parser.add_argument('--no-load', dest='load', action='store_false',
+                        help='Skip loading merged_data into the database.')
+    parser.add_argument('--no-store', dest='store', action='store_false',
+                        help='Skip the export and the Google Drive upload.')
+    parser.add_argument('--merge-workers', type=int, default=None,
+                        help='Processes for the merge (default: MERGE_WORKERS).')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(threadName)s %(message)s')
+    result = run_pipeline(args.spotify_csv, load=args.load, store=args.store, merge_workers=args.merge_workers)
+    for stage, seconds in result['timings'].items():
+        print(f"{stage:<20} {seconds:8.2f}s")
+    return result
+
+
+if __name__ == '__main__':
+    main()
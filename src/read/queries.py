@@ -0,0 +1,185 @@
+"""
+This module provides the read-side queries over merged_data used by the
+dashboard and the notebooks, with an in-process result cache.
+
+It defines the following functions:
+- top_tracks_by_genre: Most popular tracks of a genre.
+- wins_by_year: Grammy wins per year (merged_wins_by_year summary).
+- grammy_winners: Winning tracks of one Grammy year.
+- genre_stats: Popularity and audio features per genre and winner status
+  (merged_genre_stats summary).
+- audio_feature_distribution: Histogram of one audio feature, winners vs others.
+- invalidate: Drops the cached results read from a table.
+
+Usage:
+    from src.read.queries import top_tracks_by_genre
+    top_tracks_by_genre('Pop', limit=5)
+
+    Every function returns a DataFrame with fixed columns and dtypes. Results
+    are cached per arguments and per load generation of their tables (the
+    load_state table, see src/load/load_state.py) for QUERY_CACHE_TTL seconds
+    (default 300), at most QUERY_CACHE_MAX_ENTRIES of them (default 256). A
+    load finished by any process, e.g. the DAG, bumps the generation, so the
+    next call runs the query again; a hit costs one primary key lookup
+    instead of the query. Loads finished in this process also drop the stale
+    entries right away.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+from decouple import config
+from sqlalchemy import select, text
+
+from db.db_connection import build_engine
+from models.model import MergedDAta
+from models.summaries import AUDIO_FEATURES
+from src.load.load_state import load_generations
+from src.load.load_to_database import on_load
+from src.read.query_cache import QueryCache
+
+merged = MergedDAta.__table__
+
+query_cache = QueryCache(
+    max_entries=config('QUERY_CACHE_MAX_ENTRIES', default=256, cast=int),
+    ttl_seconds=config('QUERY_CACHE_TTL', default=300, cast=float),
+)
+
+# Entries of older generations are never hit again; a load finished in this
+# process frees them without waiting for the TTL
+on_load(query_cache.invalidate)
+
+
+def invalidate(table=None):
+    query_cache.invalidate(table)
+
+
+def cached_query(*tables):
+    """
+    Caches the DataFrame returned by a query function per call arguments and
+    load generation of tables. Callers get a copy, so changing a result never
+    changes the cache.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with build_engine().connect() as connection:
+                generations = load_generations(connection, tables)
+            key = (func.__name__, args, tuple(sorted(kwargs.items())), generations)
+            result = query_cache.get(key)
+            if result is None:
+                result = query_cache.put(key, func(*args, **kwargs), tables=tables)
+            return result.copy()
+        return wrapper
+    return decorator
+
+
+def _read(query, dtypes):
+    with build_engine().connect() as connection:
+        df = pd.read_sql(query, connection)
+    return df.astype(dtypes)
+
+
+@cached_query('merged_data')
+def top_tracks_by_genre(genre, limit=10, winners_only=False):
+    """
+    Returns the most popular tracks of a genre.
+
+    Args:
+        genre (str): track_genre value, as stored (title-cased).
+        limit (int): Number of tracks.
+        winners_only (bool): Only tracks that won a Grammy.
+
+    Returns:
+        pd.DataFrame: track_name, artists, album_name, popularity,
+        grammy_winner and grammy_year, most popular first.
+    """
+    query = select(
+        merged.c.track_name, merged.c.artists, merged.c.album_name,
+        merged.c.popularity, merged.c.grammy_winner, merged.c.grammy_year,
+    ).where(merged.c.track_genre == genre)
+    if winners_only:
+        query = query.where(merged.c.grammy_winner.is_(True))
+    query = query.order_by(merged.c.popularity.desc(), merged.c.ID).limit(int(limit))
+    return _read(query, {
+        'track_name': 'string', 'artists': 'string', 'album_name': 'string',
+        'popularity': 'int64', 'grammy_winner': 'bool', 'grammy_year': 'Int64',
+    })
+
+
+@cached_query('merged_data')
+def wins_by_year():
+    """
+    Returns, per grammy_year, the number of tracks, artists, winning tracks
+    and wins, from the merged_wins_by_year summary.
+    """
+    query = text("SELECT grammy_year, tracks, artists, winning_tracks, wins "
+                 "FROM merged_wins_by_year ORDER BY grammy_year")
+    return _read(query, {'grammy_year': 'int64', 'tracks': 'int64', 'artists': 'int64',
+                         'winning_tracks': 'int64', 'wins': 'int64'})
+
+
+@cached_query('merged_data')
+def grammy_winners(year):
+    """
+    Returns the winning tracks of a Grammy year: track_name, artists,
+    track_genre, popularity and number_wins, by number of wins.
+    """
+    query = select(
+        merged.c.track_name, merged.c.artists, merged.c.track_genre,
+        merged.c.popularity, merged.c.number_wins,
+    ).where(merged.c.grammy_winner.is_(True), merged.c.grammy_year == int(year)) \
+        .order_by(merged.c.number_wins.desc(), merged.c.track_name)
+    return _read(query, {'track_name': 'string', 'artists': 'string', 'track_genre': 'string',
+                         'popularity': 'int64', 'number_wins': 'int64'})
+
+
+@cached_query('merged_data')
+def genre_stats():
+    """
+    Returns the merged_genre_stats summary: track count, popularity and the
+    average of every audio feature, per track_genre and grammy_winner.
+    """
+    averages = ', '.join(f'avg_{feature}' for feature in AUDIO_FEATURES)
+    query = text("SELECT track_genre, grammy_winner, tracks, avg_popularity, max_popularity, "
+                 f"avg_duration_ms, {averages} FROM merged_genre_stats ORDER BY track_genre, grammy_winner")
+    dtypes = {'track_genre': 'string', 'grammy_winner': 'bool', 'tracks': 'int64',
+              'avg_popularity': 'float64', 'max_popularity': 'int64', 'avg_duration_ms': 'float64'}
+    dtypes.update({f'avg_{feature}': 'float64' for feature in AUDIO_FEATURES})
+    return _read(query, dtypes)
+
+
+@cached_query('merged_data')
+def audio_feature_distribution(feature, genre=None, bins=20):
+    """
+    Returns the histogram of an audio feature, for Grammy winners and for the
+    other tracks.
+
+    Args:
+        feature (str): One of models.summaries.AUDIO_FEATURES.
+        genre (str): Restrict to one track_genre.
+        bins (int): Number of equal-width bins between the feature's min and max.
+
+    Returns:
+        pd.DataFrame: bin_start, bin_end, tracks and winning_tracks per bin.
+
+    Raises:
+        ValueError: If feature is not an audio feature.
+    """
+    if feature not in AUDIO_FEATURES:
+        raise ValueError(f"Unknown audio feature: {feature}")
+    # Only the two columns needed are read; the histogram is computed here
+    query = select(merged.c[feature], merged.c.grammy_winner)
+    if genre is not None:
+        query = query.where(merged.c.track_genre == genre)
+    values = _read(query, {feature: 'float64', 'grammy_winner': 'bool'})
+
+    edges = np.histogram_bin_edges(values[feature], bins=int(bins))
+    tracks, _ = np.histogram(values[feature], bins=edges)
+    winning, _ = np.histogram(values.loc[values['grammy_winner'], feature], bins=edges)
+    return pd.DataFrame({
+        'bin_start': edges[:-1],
+        'bin_end': edges[1:],
+        'tracks': tracks.astype('int64'),
+        'winning_tracks': winning.astype('int64'),
+    })
@@ -0,0 +1,73 @@
+"""
+This module provides the in-process result cache of the read-side queries.
+
+It defines the following class:
+- QueryCache: Thread-safe LRU cache whose entries also expire after a TTL and
+  can be dropped per source table.
+
+Usage:
+    cache = QueryCache(max_entries=256, ttl_seconds=300)
+    result = cache.get(key)
+    if result is None:
+        result = cache.put(key, run_query(), tables=['merged_data'])
+    cache.invalidate('merged_data')
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+
+    def __init__(self, max_entries=256, ttl_seconds=300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the cached result of key, or None if it is missing or expired.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry['expires_at'] < time.monotonic():
+                self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry['result']
+
+    def put(self, key, result, tables=()):
+        """
+        Caches result under key, remembering the tables it was read from, and
+        evicts the least recently used entries above max_entries.
+        """
+        with self.lock:
+            self.entries[key] = {
+                'result': result,
+                'tables': frozenset(tables),
+                'expires_at': time.monotonic() + self.ttl_seconds,
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return result
+
+    def invalidate(self, table=None):
+        """
+        Drops every entry read from table, or all entries when table is None.
+        """
+        with self.lock:
+            if table is None:
+                self.entries.clear()
+                return
+            for key in [key for key, entry in self.entries.items() if table in entry['tables']]:
+                del self.entries[key]
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
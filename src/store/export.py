@@ -0,0 +1,141 @@
+"""
+This module streams the merged data into a compressed export file, one chunk at
+a time, so the full dataset is never held in memory as text.
+
+It defines the following functions:
+- iter_artifact_chunks: Reads an artifact back as DataFrame chunks.
+- iter_table_chunks: Reads a database table as DataFrame chunks.
+- iter_frame_chunks: Splits an in-memory DataFrame into chunks.
+- export_chunks: Writes chunks to a gzip CSV or Parquet file on disk.
+
+Usage:
+    chunks = iter_artifact_chunks(ref)
+    export = export_chunks(chunks, './exports/merged_data', fmt='csv.gz')
+    upload_file(export['path'])
+
+    Gzip files are written without a timestamp in their header, so the same
+    rows always produce the same bytes and the same SHA-256; the uploader uses
+    that hash to skip uploads of unchanged data.
+"""
+import gzip
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from decouple import config
+from sqlalchemy import text
+
+from src.artifacts.artifact_store import ArtifactStore, file_sha256
+
+FORMATS = {
+    'csv.gz': 'application/gzip',
+    'parquet': 'application/vnd.apache.parquet',
+}
+# Fastest zlib level: about 4x faster than level 6 on this data, for a
+# slightly larger file (tune with EXPORT_GZIP_LEVEL)
+GZIP_LEVEL = 1
+
+
+def export_chunk_rows():
+    return config('EXPORT_CHUNK_ROWS', default=100_000, cast=int)
+
+
+def iter_artifact_chunks(ref, chunk_rows=None):
+    """
+    Yields the rows of an artifact as DataFrames of at most chunk_rows rows.
+
+    Arrow artifacts are memory-mapped, so only the current chunk is converted
+    to pandas.
+    """
+    table = ArtifactStore.read_table(ref)
+    for batch in table.to_batches(max_chunksize=chunk_rows or export_chunk_rows()):
+        yield ArtifactStore.to_pandas(batch)
+
+
+def iter_table_chunks(table_name, engine, chunk_rows=None):
+    """
+    Yields the rows of a database table as DataFrames of at most chunk_rows
+    rows, using a server-side cursor where the driver supports one.
+    """
+    with engine.connect() as connection:
+        connection = connection.execution_options(stream_results=True)
+        quoted = engine.dialect.identifier_preparer.quote(table_name)
+        query = text(f"SELECT * FROM {quoted}")
+        yield from pd.read_sql(query, connection, chunksize=chunk_rows or export_chunk_rows())
+
+
+def iter_frame_chunks(df, chunk_rows=None):
+    """
+    Yields row slices of an in-memory DataFrame (views, not copies).
+    """
+    chunk_rows = chunk_rows or export_chunk_rows()
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _write_csv_gz(chunks, path):
+    rows = 0
+    level = config('EXPORT_GZIP_LEVEL', default=GZIP_LEVEL, cast=int)
+    # mtime=0 keeps the output byte-for-byte reproducible
+    with open(path, 'wb') as raw, gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=level, mtime=0) as gz:
+        for chunk in chunks:
+            # Only one chunk is rendered as text at a time
+            gz.write(chunk.to_csv(index=False, header=rows == 0).encode('utf-8'))
+            rows += len(chunk)
+    return rows
+
+
+def _write_parquet(chunks, path):
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(pa.table({}), path)
+    return rows
+
+
+def export_chunks(chunks, path, fmt=None):
+    """
+    Writes DataFrame chunks to a single export file.
+
+    Args:
+        chunks (iterable): DataFrames with the same columns.
+        path (str): Output path without extension; the format's is appended.
+        fmt (str): 'csv.gz' or 'parquet'; defaults to EXPORT_FORMAT (csv.gz).
+
+    Returns:
+        dict: path, format, mimetype, num_rows and sha256 of the written file.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    fmt = fmt or config('EXPORT_FORMAT', default='csv.gz')
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    path = f"{path}.{fmt}"
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+
+    writer = _write_csv_gz if fmt == 'csv.gz' else _write_parquet
+    rows = writer(chunks, tmp_path)
+    os.replace(tmp_path, path)
+
+    return {
+        'path': os.path.abspath(path),
+        'format': fmt,
+        'mimetype': FORMATS[fmt],
+        'num_rows': rows,
+        'sha256': file_sha256(path),
+    }
@@ -7,10 +7,11 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaInMemoryUpload
+from googleapiclient.http import MediaFileUpload
 from googleapiclient.discovery import build
 from google.oauth2 import service_account
 from decouple import config
+from src.artifacts.artifact_store import file_sha256
 
 load_dotenv()
 work_dir = os.getenv('WORK_DIR')
@@ -18,28 +19,71 @@ work_dir = os.getenv('WORK_DIR')
 sys.path.append(work_dir)
 
 SCOPES = ['https://www.googleapis.com/auth/drive']
+UPLOAD_RETRIES = 5
 
 def authenticate():
     creds = service_account.Credentials.from_service_account_file(config('SERVICE_ACCOUNT_FILE'), scopes=SCOPES)
     return creds
 
-def upload_file(file_path):
-    creds = authenticate()
-    service = build('drive', 'v3', credentials=creds)
-
-    file_metadata = {
-        'name': "merged_data.csv",
-        'parents': [config('PARENT_FOLDER_ID')],
-        'mimeType': 'text/csv'
-    }
-
-    media = MediaInMemoryUpload(file_path, mimetype='text/csv')
-
-    try:
-        file = service.files().create(
-            body=file_metadata,
-            media_body=media
-        ).execute()
-        print("File uploaded successful")
-    except Exception as e:
-        print("Error:", e)
+def drive_service():
+    return build('drive', 'v3', credentials=authenticate())
+
+
+def find_file(service, name, folder_id):
+    """
+    Returns the id and appProperties of the file called name in folder_id, or
+    None if the folder has no such file.
+    """
+    query = f"name = '{name}' and '{folder_id}' in parents and trashed = false"
+    response = service.files().list(q=query, fields='files(id, appProperties)', pageSize=1).execute()
+    files = response.get('files', [])
+    return files[0] if files else None
+
+
+def upload_file(file_path, name=None, mimetype='text/csv', service=None, folder_id=None):
+    """
+    Uploads a file to the Drive folder PARENT_FOLDER_ID with a chunked,
+    resumable upload, replacing the previous version of the same file.
+
+    The SHA-256 of the content is stored in the file's appProperties; when the
+    file already in Drive has the same hash the upload is skipped.
+
+    Args:
+        file_path (str): Local file to upload.
+        name (str): Name in Drive; defaults to the file's base name.
+        mimetype (str): Content type of the file.
+        service: Drive v3 service; built from the service account by default.
+            Any object with the same files() API works, e.g. the
+            FakeDriveService of the tests.
+        folder_id (str): Target folder; defaults to PARENT_FOLDER_ID.
+
+    Returns:
+        dict: The Drive file id and whether the upload was skipped.
+    """
+    service = service or drive_service()
+    folder_id = folder_id or config('PARENT_FOLDER_ID')
+    name = name or os.path.basename(file_path)
+    sha256 = file_sha256(file_path)
+
+    existing = find_file(service, name, folder_id)
+    if existing and existing.get('appProperties', {}).get('sha256') == sha256:
+        print(f"{name} is unchanged (sha256 {sha256[:12]}), upload skipped")
+        return {'id': existing['id'], 'skipped': True}
+
+    media = MediaFileUpload(file_path, mimetype=mimetype, resumable=True,
+                            chunksize=config('UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int))
+    body = {'name': name, 'mimeType': mimetype, 'appProperties': {'sha256': sha256}}
+    if existing:
+        request = service.files().update(fileId=existing['id'], body=body, media_body=media, fields='id')
+    else:
+        request = service.files().create(body={**body, 'parents': [folder_id]}, media_body=media, fields='id')
+
+    # Each next_chunk call sends one chunk; transient errors are retried from
+    # the last byte the server acknowledged instead of from the start
+    response = None
+    while response is None:
+        status, response = request.next_chunk(num_retries=UPLOAD_RETRIES)
+        if status:
+            print(f"Uploaded {int(status.progress() * 100)}% of {name}")
+    print("File uploaded successful")
+    return {'id': response['id'], 'skipped': False}
@@ -0,0 +1,257 @@
+"""
+This module provides per-stage instrumentation for the ETL pipeline, exported
+as OpenTelemetry spans and metrics.
+
+It defines the following helpers:
+- instrument_stage: Context manager that measures one block of work.
+- traced: Decorator that instruments a function, e.g. an Airflow callable.
+- traced_method: Same for a method of a class holding DataFrames.
+
+Usage:
+    Only stage-level work is instrumented: the Airflow callables and the
+    methods that make a pass over the data, not builders such as
+    TransformSpotify.plan. Every instrumented stage records wall time, CPU time, rows in and out, the
+    process RSS before/after, the peak RSS reached while the stage ran (sampled
+    every TELEMETRY_RSS_INTERVAL_MS) and how far it rose above the RSS at stage
+    start, and the memory of the DataFrame it produced. Where the data goes is
+    chosen with TELEMETRY_EXPORTER:
+
+    - none:    keep the SDK disabled and measure nothing (default)
+    - json:    append JSON lines to TELEMETRY_DIR/spans.jsonl and metrics.jsonl
+    - console: print spans and metrics to stdout (the task log under Airflow)
+    - otlp:    send them to the collector configured by the OTEL_* variables
+"""
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import psutil
+from decouple import config
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import ConsoleMetricExporter, PeriodicExportingMetricReader
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+SERVICE_NAME = 'workshop2-etl'
+
+_setup_lock = threading.Lock()
+_instruments = None
+
+
+class _JsonLinesSpanExporter(ConsoleSpanExporter):
+    # Writes one span per line to its own file, closed when the provider shuts down
+
+    def __init__(self, path):
+        super().__init__(out=open(path, 'a'), formatter=lambda span: span.to_json(indent=None) + '\n')
+
+    def shutdown(self):
+        self.out.close()
+
+
+class _JsonLinesMetricExporter(ConsoleMetricExporter):
+    # Writes one metrics snapshot per line to its own file, closed on shutdown
+
+    def __init__(self, path):
+        super().__init__(out=open(path, 'a'), formatter=lambda data: data.to_json(indent=None) + '\n')
+
+    def shutdown(self, timeout_millis=30_000, **kwargs):
+        self.out.close()
+
+
+def _exporters(kind):
+    if kind == 'json':
+        directory = config('TELEMETRY_DIR', default='./telemetry')
+        os.makedirs(directory, exist_ok=True)
+        return (
+            _JsonLinesSpanExporter(os.path.join(directory, 'spans.jsonl')),
+            _JsonLinesMetricExporter(os.path.join(directory, 'metrics.jsonl')),
+        )
+    if kind == 'otlp':
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(), OTLPMetricExporter()
+    return ConsoleSpanExporter(), ConsoleMetricExporter()
+
+
+def setup_telemetry():
+    """
+    Configures the tracer and meter providers once per process and creates the
+    stage instruments. Safe to call from several threads.
+    """
+    global _instruments
+    with _setup_lock:
+        if _instruments is not None:
+            return _instruments
+
+        kind = config('TELEMETRY_EXPORTER', default='none')
+        if kind != 'none':
+            span_exporter, metric_exporter = _exporters(kind)
+            resource_attributes = Resource.create({'service.name': SERVICE_NAME})
+
+            tracer_provider = TracerProvider(resource=resource_attributes)
+            tracer_provider.add_span_processor(BatchSpanProcessor(span_exporter))
+            trace.set_tracer_provider(tracer_provider)
+
+            reader = PeriodicExportingMetricReader(
+                metric_exporter,
+                export_interval_millis=config('TELEMETRY_EXPORT_INTERVAL_MS', default=60000, cast=int),
+            )
+            metrics.set_meter_provider(MeterProvider(resource=resource_attributes, metric_readers=[reader]))
+
+        meter = metrics.get_meter(__name__)
+        _instruments = {
+            'enabled': kind != 'none',
+            'tracer': trace.get_tracer(__name__),
+            'wall_time': meter.create_histogram('etl.stage.wall_time', unit='s'),
+            'cpu_time': meter.create_histogram('etl.stage.cpu_time', unit='s'),
+            'rows_in': meter.create_counter('etl.stage.rows_in', unit='{row}'),
+            'rows_out': meter.create_counter('etl.stage.rows_out', unit='{row}'),
+            'peak_rss': meter.create_histogram('etl.stage.peak_rss', unit='By'),
+            'peak_rss_delta': meter.create_histogram('etl.stage.peak_rss_delta', unit='By'),
+            'df_memory': meter.create_histogram('etl.stage.dataframe_memory', unit='By'),
+        }
+        return _instruments
+
+
+class _PeakRss:
+    # Polls the process RSS on a background thread while a stage runs. ru_maxrss
+    # would give the peak of the whole process, not of the stage.
+
+    def __init__(self, process):
+        self.process = process
+        self.interval = config('TELEMETRY_RSS_INTERVAL_MS', default=10, cast=int) / 1000
+        self.stopped = threading.Event()
+
+    def _poll(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def start(self):
+        self.before = self.process.memory_info().rss
+        self.peak = self.before
+        self.thread = threading.Thread(target=self._poll, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.after = self.process.memory_info().rss
+        self.peak = max(self.peak, self.after)
+
+
+def _frame_memory(df):
+    # deep=True walks every Python string, which is too slow for large frames by default
+    return int(df.memory_usage(index=True, deep=config('TELEMETRY_DEEP_MEMORY', default=False, cast=bool)).sum())
+
+
+@contextmanager
+def instrument_stage(name, rows_in=None):
+    """
+    Measures the block as one stage. The yielded dict can be filled with
+    'rows_in', 'rows_out' and 'output' (a DataFrame) before the block ends.
+    """
+    instruments = setup_telemetry()
+    stats = {'rows_in': rows_in, 'rows_out': None, 'output': None}
+    if not instruments['enabled']:
+        # No span, no RSS sampling thread
+        yield stats
+        return
+    attributes = {'stage': name}
+    process = psutil.Process()
+
+    with instruments['tracer'].start_as_current_span(name) as span:
+        rss = _PeakRss(process).start()
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield stats
+        finally:
+            wall_time = time.perf_counter() - wall_started
+            cpu_time = time.process_time() - cpu_started
+            rss.stop()
+
+            span.set_attribute('etl.wall_time_s', wall_time)
+            span.set_attribute('etl.cpu_time_s', cpu_time)
+            span.set_attribute('etl.rss_before_bytes', rss.before)
+            span.set_attribute('etl.rss_after_bytes', rss.after)
+            span.set_attribute('etl.peak_rss_bytes', rss.peak)
+            span.set_attribute('etl.peak_rss_delta_bytes', rss.peak - rss.before)
+            instruments['wall_time'].record(wall_time, attributes)
+            instruments['cpu_time'].record(cpu_time, attributes)
+            instruments['peak_rss'].record(rss.peak, attributes)
+            instruments['peak_rss_delta'].record(rss.peak - rss.before, attributes)
+
+            if stats['rows_in'] is not None:
+                span.set_attribute('etl.rows_in', stats['rows_in'])
+                instruments['rows_in'].add(stats['rows_in'], attributes)
+            if stats['rows_out'] is not None:
+                span.set_attribute('etl.rows_out', stats['rows_out'])
+                instruments['rows_out'].add(stats['rows_out'], attributes)
+            if isinstance(stats['output'], pd.DataFrame):
+                memory = _frame_memory(stats['output'])
+                span.set_attribute('etl.dataframe_memory_bytes', memory)
+                instruments['df_memory'].record(memory, attributes)
+
+
+def _rows(value):
+    # DataFrames, artifact references ({'num_rows': ...}) and None
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if isinstance(value, dict) and 'num_rows' in value:
+        return value['num_rows']
+    return None
+
+
+def _frames_of(obj):
+    return [value for value in vars(obj).values() if isinstance(value, pd.DataFrame)]
+
+
+def traced(name=None):
+    """
+    Decorates a function so every call is measured as a stage. Rows in are
+    counted from DataFrame arguments, rows out from the returned DataFrame or
+    artifact reference.
+    """
+    def decorator(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            input_rows = [_rows(arg) for arg in args if _rows(arg) is not None]
+            with instrument_stage(stage_name, sum(input_rows) if input_rows else None) as stats:
+                result = func(*args, **kwargs)
+                stats['rows_out'] = _rows(result)
+                stats['output'] = result
+                return result
+        return wrapper
+    return decorator
+
+
+def traced_method(name=None):
+    """
+    Decorates a method so every call is measured as a stage, named after the
+    class and method by default. Rows in are the rows of the DataFrames held
+    by the instance, rows out those of the returned frame or, for in-place
+    steps, of self.df.
+    """
+    def decorator(method):
+        stage_name = name or method.__qualname__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            rows_in = sum(len(frame) for frame in _frames_of(self))
+            with instrument_stage(stage_name, rows_in) as stats:
+                result = method(self, *args, **kwargs)
+                # Transform steps update self.df in place and return None
+                output = result if isinstance(result, pd.DataFrame) else getattr(self, 'df', None)
+                stats['rows_out'] = _rows(output)
+                stats['output'] = output
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+
+class StringNormalizer:
+    """
+    Title-cases and strips text columns by normalizing each distinct value once.
+
+    Every column is factorized, only its unique values go through
+    .str.title().str.strip(), and the result is mapped back through the codes.
+    Normalized values are kept in a cache shared by all columns and calls of
+    the process, so a value seen in an earlier column or partition is never
+    normalized again.
+
+    The cache is not persisted: loading a million cached values from disk takes
+    longer than normalizing them again. Across runs, the transform stages
+    themselves are skipped by StageCache when their input did not change.
+    """
+
+    def __init__(self, max_cache_entries=2_000_000, unique_ratio=0.9, sample_size=10_000):
+        self.max_cache_entries = max_cache_entries
+        self.unique_ratio = unique_ratio
+        self.sample_size = sample_size
+        self.cache = {}
+
+    def _normalize_uniques(self, uniques):
+        normalized = np.array([self.cache.get(value) for value in uniques], dtype=object)
+        missing = np.flatnonzero(normalized == None)  # noqa: E711 (elementwise comparison)
+        if len(missing):
+            raw = pd.Series(uniques[missing], dtype=object)
+            # Like .str.title() on a mixed column, values that are not strings become NaN
+            is_text = raw.map(type).eq(str).to_numpy()
+            computed = np.full(len(raw), np.nan, dtype=object)
+            if is_text.any():
+                computed[is_text] = raw[is_text].str.title().str.strip().to_numpy()
+            normalized[missing] = computed
+
+            if len(self.cache) + len(missing) > self.max_cache_entries:
+                self.cache.clear()
+            # Only string values are cached
+            self.cache.update(zip(raw.to_numpy()[is_text], computed[is_text]))
+        return normalized
+
+    def _mostly_unique(self, column):
+        # Factorizing a column of (nearly) distinct values only adds work
+        sample = column.iloc[:self.sample_size]
+        return len(sample) > 0 and sample.nunique(dropna=False) >= self.unique_ratio * len(sample)
+
+    @staticmethod
+    def _categorical(codes, normalized, column):
+        # Different raw values can normalize to the same text ('abc', 'ABC ')
+        remap, categories = pd.factorize(normalized, use_na_sentinel=True)
+        category_codes = np.where(codes >= 0, remap[codes], -1)
+        values = pd.Categorical.from_codes(category_codes, categories=pd.Index(categories, dtype=object))
+        return pd.Series(values, index=column.index, name=column.name)
+
+    def normalize(self, column, as_category=False):
+        """
+        Normalizes one text column.
+
+        Categorical columns only have their categories normalized. Pyarrow
+        string columns keep their dtype.
+
+        Args:
+            column (pd.Series): Object, string or categorical column to normalize.
+            as_category (bool): Return a categorical instead of an object column.
+
+        Returns:
+            pd.Series: Same values as column.str.title().str.strip().
+        """
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            normalized = self._normalize_uniques(np.asarray(column.cat.categories, dtype=object))
+            return self._categorical(column.cat.codes.to_numpy(), normalized, column)
+
+        if not as_category and self._mostly_unique(column):
+            return column.str.title().str.strip()
+
+        codes, uniques = pd.factorize(column, use_na_sentinel=True)
+        normalized = self._normalize_uniques(np.asarray(uniques, dtype=object))
+
+        if as_category:
+            return self._categorical(codes, normalized, column)
+
+        values = np.empty(len(codes), dtype=object)
+        values[:] = np.nan
+        present = codes >= 0
+        values[present] = normalized[codes[present]]
+        result = pd.Series(values, index=column.index, name=column.name)
+        return result.astype(column.dtype) if isinstance(column.dtype, pd.StringDtype) else result
+
+    def normalize_frame(self, df, columns=None, as_category=False):
+        """
+        Normalizes the given columns of df in place, by default every object,
+        string and categorical column.
+        """
+        if columns is None:
+            columns = df.select_dtypes(include=['object', 'string', 'category']).columns
+        for col in columns:
+            df[col] = self.normalize(df[col], as_category=as_category)
+        return df
+
+
+# Shared by TransformSpotify and TransformGrammy so values are reused across them
+default_normalizer = StringNormalizer()
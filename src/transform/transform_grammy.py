@@ -1,4 +1,6 @@
 import pandas as pd
+from src.telemetry.instrumentation import traced_method
+from src.transform.normalize import default_normalizer
 
 class TransformGrammy:
 
@@ -16,27 +18,39 @@ class TransformGrammy:
     def remove_unwanted_grammmy_columns(self):
         self.df.drop(columns=['published_at', 'updated_at', 'img'])
 
+    @traced_method()
     def remove_na_nominees(self):
         self.df = self.df.dropna(subset=['nominee'])
 
+    @traced_method()
     def extract_artists(self):
         extracted_artists = self.df['workers'].str.extract(r'\(([^)]+)\)', expand=False)
         self.df['artist'] = self.df['artist'].fillna(extracted_artists)
     
+    @traced_method()
     def remove_parentheses_from_artists(self):
         self.df['artist'] = self.df['artist'].str.replace(r'\(|\)', '', regex=True)
     
+    @traced_method()
     def mark_winners(self):
-        grouped = self.df.groupby(['year', 'title', 'category'])
-        for name, group in grouped:
-            if len(group) > 2:
-                self.df.loc[group.index[0], 'winner'] = True
-                self.df.loc[group.index[1:], 'winner'] = False
+        """
+        Marks the first nominee of every (year, title, category) group with more
+        than two nominees as the winner and the rest of that group as losers.
+
+        Groups with two or fewer nominees keep their original 'winner' value.
+        """
+        grouped = self.df.groupby(['year', 'title', 'category'], sort=False, observed=True)
+        group_size = grouped['winner'].transform('size')
+        in_large_group = (group_size > 2).to_numpy()
+        is_first = (grouped.cumcount() == 0).to_numpy()
+        self.df.loc[in_large_group, 'winner'] = is_first[in_large_group]
                 
+    @traced_method()
     def normalize_data(self):
-        for col in self.df.select_dtypes(include=['object']):
-            self.df[col] = self.df[col].str.title().str.strip()
+        # Title-case and strip every text column, one distinct value at a time
+        default_normalizer.normalize_frame(self.df)
 
+    @traced_method()
     def filter_winners(self):
         self.df = self.df[self.df['winner'] == True] #
     
@@ -1,22 +1,170 @@
+import numpy as np
 import pandas as pd
+from src.telemetry.instrumentation import traced, traced_method
+from src.transform.normalize import default_normalizer
+
+GROUP_KEYS = ['track_name', 'artists']
+
+
+def not_na_mask(df):
+    # Same rows as ~df.isna().any(axis=1), without building a boolean frame
+    keep = np.ones(len(df), dtype=bool)
+    for col in df.columns:
+        keep &= df[col].notna().to_numpy()
+    return keep
+
+
+def max_popularity_rows(df, keep=None):
+    """
+    Finds the rows kept by filter_max_popularity_tracks: for every (track_name,
+    artists) group, the rows sharing the track_id of the group's most popular
+    row (the first one in frame order on ties).
+
+    A single stable sort by (group, -popularity) finds the winning row of every
+    group, so no second frame and no self-merge are needed.
+
+    Args:
+        df (pd.DataFrame): Spotify tracks.
+        keep (np.ndarray): Boolean mask of the rows still in play; the others
+            are ignored, as if they had already been dropped.
+
+    Returns:
+        np.ndarray: Positions of the kept rows, in the order the former inner
+        merge returned them: grouped by track, tracks in order of appearance.
+    """
+    # Rows with a missing key belong to no group (ngroup gives them NaN)
+    groups = df.groupby(GROUP_KEYS, sort=False, observed=True).ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    if keep is not None:
+        groups = np.where(keep, groups, -1)
+    positions = np.flatnonzero(groups >= 0)
+    if not len(positions):
+        return positions
+
+    popularity = df['popularity'].to_numpy(dtype='float64')[positions]
+    # lexsort is stable: among equally popular rows the first one wins, like idxmax
+    order = positions[np.lexsort((-popularity, groups[positions]))]
+    sorted_groups = groups[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_groups[1:] != sorted_groups[:-1]
+
+    winners = np.zeros(groups.max() + 1, dtype=np.int64)
+    winners[sorted_groups[first]] = order[first]
+
+    # Comparing factorized codes lets missing track ids match each other, as in a merge
+    track_ids, _ = pd.factorize(df['track_id'], use_na_sentinel=True)
+    kept = positions[track_ids[positions] == track_ids[winners[groups[positions]]]]
+
+    # Each group keeps a single track_id, so grouping by track reproduces the
+    # merge order: keys in order of first appearance, rows in frame order
+    appearance, _ = pd.factorize(groups[kept])
+    return kept[np.argsort(appearance, kind='stable')]
+
+
+class TransformPlan:
+    """
+    Records TransformSpotify steps and runs them as one pass over the frame.
+
+    Row filters (drop_nan_records, filter_max_popularity_tracks) only narrow
+    an array of row positions; the rows are taken once, at the end. Column steps
+    (unnamed_to_id, normalize_data) rename labels or replace one column at a
+    time, and never copy the whole frame.
+
+    Peak memory is about twice the input frame: the input, plus the output
+    of the final take, which is never bigger than the input. On top of that
+    there are ~40 bytes per row of masks, positions, group codes and sort order, and one
+    normalized text column at a time. The eager steps also hold a boolean frame
+    (one byte per cell), the idxmax frame and a merge hash table over the
+    whole frame.
+
+    Usage:
+        transformer.plan().unnamed_to_id().drop_nan_records() \\
+            .normalize_data().filter_max_popularity_tracks().execute()
+    """
+
+    def __init__(self, transformer):
+        self.transformer = transformer
+        self.steps = []
+
+    def _record(self, step):
+        self.steps.append(step)
+        return self
+
+    def unnamed_to_id(self):
+        return self._record('unnamed_to_id')
+
+    def drop_nan_records(self):
+        return self._record('drop_nan_records')
+
+    def normalize_data(self):
+        return self._record('normalize_data')
+
+    def filter_max_popularity_tracks(self):
+        return self._record('filter_max_popularity_tracks')
+
+    @traced('TransformSpotify.plan.execute')
+    def execute(self):
+        """
+        Runs the recorded steps, in order, and stores the result in the
+        transformer's df.
+
+        Returns:
+            pd.DataFrame: The transformed frame.
+        """
+        df = self.transformer.df
+        rows = None
+        reset_index = False
+
+        for step in self.steps:
+            if step == 'unnamed_to_id':
+                df = df.rename(columns={'Unnamed: 0': 'ID'}, copy=False)
+            elif step == 'drop_nan_records':
+                mask = not_na_mask(df)
+                rows = np.flatnonzero(mask) if rows is None else rows[mask[rows]]
+            elif step == 'normalize_data':
+                if df is self.transformer.df:
+                    df = df.copy(deep=False)
+                default_normalizer.normalize_frame(df)
+            elif step == 'filter_max_popularity_tracks':
+                keep = None
+                if rows is not None:
+                    keep = np.zeros(len(df), dtype=bool)
+                    keep[rows] = True
+                rows = max_popularity_rows(df, keep)
+                reset_index = True
+
+        if rows is not None:
+            df = df.take(rows)
+        if reset_index:
+            df = df.reset_index(drop=True)
+
+        self.steps = []
+        self.transformer.df = df
+        return df
+
 
 class TransformSpotify:
 
     def __init__(self, df):
         self.df = df
 
+    def plan(self):
+        # Lazy alternative to calling the steps below one by one
+        return TransformPlan(self)
+
     def unnamed_to_id(self):
             self.df.rename(columns={'Unnamed: 0': 'ID'}, inplace=True)
-    
+
+    @traced_method()
     def drop_nan_records(self):
-        nan_record_index = self.df[self.df.isna().any(axis=1)].index
-        self.df.drop(nan_record_index, inplace=True)
+        # take() returns a new frame without flagging it as a possible view of df
+        self.df = self.df.take(np.flatnonzero(not_na_mask(self.df)))
 
+    @traced_method()
     def normalize_data(self):
-        for col in self.df.select_dtypes(include=['object']):
-            self.df[col] = self.df[col].str.title().str.strip()
-    
+        # Title-case and strip every text column, one distinct value at a time
+        default_normalizer.normalize_frame(self.df)
+
+    @traced_method()
     def filter_max_popularity_tracks(self):
-        df_max_popularity = self.df.loc[self.df.groupby(['track_name', 'artists'])['popularity'].idxmax()].reset_index(drop=True)
-        track_ids_to_keep = df_max_popularity[['track_name', 'artists', 'track_id']].drop_duplicates()
-        self.df = self.df.merge(track_ids_to_keep, on=['track_name', 'artists', 'track_id'])
+        # Keeps, per track and artist, the rows of the most popular track_id
+        self.df = self.df.take(max_popularity_rows(self.df)).reset_index(drop=True)
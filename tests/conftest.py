@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Tests import the project packages from the repository root, like the DAG does
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+# Modules such as store.py add WORK_DIR to sys.path on import
+os.environ.setdefault('WORK_DIR', ROOT_DIR)
+
+# No telemetry export from the instrumented classes under test
+os.environ.setdefault('TELEMETRY_EXPORTER', 'none')
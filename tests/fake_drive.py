@@ -0,0 +1,120 @@
+"""
+This module provides a local stand-in for the Google Drive v3 service, so the
+uploader in store.py can be exercised without credentials or network access.
+
+It defines the following class:
+- FakeDriveService: Keeps uploaded files in memory and implements the subset
+  of files() used by upload_file: list, create and update with chunked,
+  resumable media.
+
+Usage:
+    from fake_drive import FakeDriveService
+
+    service = FakeDriveService()
+    upload_file('./exports/merged_data.csv.gz', service=service, folder_id='folder')
+    service.content(file_id)
+
+    fail_chunks makes the given chunk numbers fail once with a ConnectionError,
+    to check that an interrupted upload resumes from the last sent byte.
+"""
+import itertools
+import re
+
+
+class _Status:
+
+    def __init__(self, sent, total):
+        self.resumable_progress = sent
+        self.total_size = total
+
+    def progress(self):
+        return self.resumable_progress / self.total_size if self.total_size else 1.0
+
+
+class _Request:
+
+    def __init__(self, service, file_id, body, media_body=None, result=None):
+        self.service = service
+        self.file_id = file_id
+        self.body = body
+        self.media_body = media_body
+        self.result = result
+        self.sent = b''
+
+    def execute(self):
+        if self.media_body is None:
+            return self.result
+        response = None
+        while response is None:
+            _, response = self.next_chunk()
+        return response
+
+    def next_chunk(self, num_retries=0):
+        media = self.media_body
+        offset = len(self.sent)
+        for attempt in range(num_retries + 1):
+            try:
+                self.service._send_chunk()
+                break
+            except ConnectionError:
+                if attempt == num_retries:
+                    raise
+        self.sent += media.getbytes(offset, media.chunksize())
+
+        if len(self.sent) < media.size():
+            return _Status(len(self.sent), media.size()), None
+        self.service._store(self.file_id, self.body, self.sent)
+        return None, {'id': self.file_id}
+
+
+class _Files:
+
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, q='', fields=None, pageSize=None):
+        name = re.search(r"name = '([^']*)'", q)
+        parent = re.search(r"'([^']*)' in parents", q)
+        files = [
+            {'id': file_id, 'appProperties': dict(file.get('appProperties', {}))}
+            for file_id, file in self.service.files_by_id.items()
+            if (name is None or file['name'] == name.group(1))
+            and (parent is None or parent.group(1) in file.get('parents', []))
+        ]
+        return _Request(self.service, None, None, result={'files': files[:pageSize]})
+
+    def create(self, body, media_body, fields=None):
+        file_id = f"fake-{next(self.service.ids)}"
+        return _Request(self.service, file_id, body, media_body)
+
+    def update(self, fileId, body, media_body, fields=None):
+        return _Request(self.service, fileId, body, media_body)
+
+
+class FakeDriveService:
+
+    def __init__(self, fail_chunks=()):
+        self.files_by_id = {}
+        self.ids = itertools.count(1)
+        self.fail_chunks = set(fail_chunks)
+        self.chunks_sent = 0
+        self.uploads = 0
+
+    def files(self):
+        return _Files(self)
+
+    def _send_chunk(self):
+        chunk = self.chunks_sent
+        self.chunks_sent += 1
+        if chunk in self.fail_chunks:
+            self.fail_chunks.discard(chunk)
+            raise ConnectionError(f"Simulated failure on chunk {chunk}")
+
+    def _store(self, file_id, body, content):
+        file = self.files_by_id.setdefault(file_id, {})
+        file.update(body)
+        file['content'] = content
+        self.uploads += 1
+
+    def content(self, file_id):
+        return self.files_by_id[file_id]['content']
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from src.artifacts.artifact_store import ArtifactStore
+
+
+def frame():
+    return pd.DataFrame({
+        'id': pd.array([1, 2, None, 4], dtype='Int32'),
+        'popularity': pd.array([10, None, 30, 40], dtype='Int8'),
+        'tempo': np.array([120.5, np.nan, 98.25, 0.0], dtype='float32'),
+        'duration_ms': np.array([1, 2, 3, 2**40], dtype='int64'),
+        'explicit': pd.array([True, None, False, True], dtype='boolean'),
+        'track_name': pd.array(['Bad Guy', '', None, 'Ça va'], dtype=pd.StringDtype('pyarrow')),
+        'track_genre': pd.Categorical(['pop', 'rock', None, 'pop']),
+    })
+
+
+@pytest.mark.parametrize('fmt', ['arrow', 'parquet'])
+def test_write_reads_back_identical(tmp_path, fmt):
+    df = frame()
+    ref = ArtifactStore(str(tmp_path), fmt).write(df, 'stage')
+    assert ref['num_rows'] == len(df)
+    pd.testing.assert_frame_equal(ArtifactStore.read(ref, verify=True), df)
+
+
+def test_arrow_artifact_is_memory_mapped(tmp_path):
+    df = pd.DataFrame({'tempo': np.arange(1_000_000, dtype='float64')})
+    ref = ArtifactStore(str(tmp_path)).write(df, 'stage')
+    allocated = pa.total_allocated_bytes()
+    table = ArtifactStore.read_table(ref)
+    # The 8 MB column points into the mapped file instead of a new buffer
+    assert pa.total_allocated_bytes() - allocated < 1 << 20
+    assert table.num_rows == len(df)
+
+
+@pytest.mark.parametrize('fmt', ['arrow', 'parquet'])
+def test_write_chunks_reads_back_as_concatenation(tmp_path, fmt):
+    df = frame()
+    chunks = [df.iloc[:1], df.iloc[1:3], df.iloc[3:]]
+    ref = ArtifactStore(str(tmp_path), fmt).write_chunks(iter(chunks), 'stage')
+    assert ref['num_rows'] == len(df)
+
+    expected = df.astype({'track_genre': pd.StringDtype('pyarrow')})
+    # Categories are written as plain strings, one dictionary per chunk would not fit
+    pd.testing.assert_frame_equal(ArtifactStore.read(ref), expected)
+
+
+def test_verify_rejects_changed_artifact(tmp_path):
+    ref = ArtifactStore(str(tmp_path)).write(frame(), 'stage')
+    with open(ref['path'], 'ab') as f:
+        f.write(b'\0')
+    with pytest.raises(ValueError, match='does not match its recorded hash'):
+        ArtifactStore.read_table(ref, verify=True)
+
+
+def test_write_chunks_without_chunks_leaves_no_file(tmp_path):
+    with pytest.raises(ValueError, match='No chunks'):
+        ArtifactStore(str(tmp_path)).write_chunks(iter([]), 'stage')
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,64 @@
+import warnings
+
+import pandas as pd
+import pytest
+
+from src.merge.artist_matcher import ArtistMatcher
+
+fuzzywuzzy_process = pytest.importorskip('fuzzywuzzy.process')
+
+# (Grammy artist, Spotify artist): accents, which fuzzywuzzy removed before
+# scoring, other scripts, and scores right around the threshold of 80
+PAIRS = [
+    ('Beyoncé', 'Beyonce'), ('Björk', 'Bjork'), ('Sigur Rós', 'Sigur Ros'), ('Sade', 'Sadé'),
+    ('Rosalía', 'Rosalia'), ('Michael Bublé', 'Michael Buble'), ('Ángel', 'Angel'),
+    ('BTS', '방탄소년단'), ('宇多田ヒカル', 'Hikaru Utada'), ('Łona', 'Lona'),
+    ('Adele', 'Adell'), ('Ke$ha', 'Kesha'), ('U2', 'U 2'), ('P!nk', 'Pink'),
+    ('Bon Iver', 'Bon Ivor'), ('Sam Smith', 'Samuel Smith'), ('Lady Gaga', 'Gaga'),
+    ('Taylor Swift', 'Taylor Swift;Ed Sheeran'), ('Mumford & Sons', 'Mumford and Sons'),
+    ('Jay-Z', 'JAY Z'), ('Coldplay', 'Cold Play'), ('Drake', 'Dave'), ('Muse', 'Mase'),
+    ('Eminem', 'Enya'), ('!!!', '...'), ('Sia', 'Sía'),
+]
+
+
+def extract_one(artist, spotify_artists):
+    # The per-row matching that ArtistMatcher replaced
+    best_match, best_score = None, 0
+    for spotify_artist in spotify_artists:
+        with warnings.catch_warnings():
+            # fuzzywuzzy warns about queries that are empty once processed
+            warnings.simplefilter('ignore')
+            match, score = fuzzywuzzy_process.extractOne(artist, [spotify_artist])
+        if score > best_score:
+            best_score, best_match = score, match
+        if best_score >= 80:
+            return best_match
+    return None
+
+
+def test_matches_like_fuzzywuzzy():
+    spotify_df = pd.DataFrame({
+        'track_name': [f'track {i}' for i in range(len(PAIRS))],
+        'artists': [spotify for _, spotify in PAIRS],
+    })
+    grammy_df = pd.DataFrame({
+        'track_name': spotify_df['track_name'],
+        'artists': [grammy for grammy, _ in PAIRS],
+    })
+
+    matched = ArtistMatcher(spotify_df).match(grammy_df)
+    expected = [extract_one(grammy, [spotify]) for grammy, spotify in PAIRS]
+    assert matched.tolist() == expected
+    # Both sides of the boundary are in the fixed set
+    assert None in expected and 'Sadé' in expected
+
+
+def test_first_candidate_over_threshold_wins():
+    spotify_df = pd.DataFrame({
+        'track_name': ['Halo'] * 3,
+        'artists': ['Beyonce Knowles', 'Beyoncé', 'Beyonce'],
+    })
+    grammy_df = pd.DataFrame({'track_name': ['Halo', 'Halo', 'Unknown'], 'artists': ['Beyoncé', None, 'Beyoncé']})
+    matched = ArtistMatcher(spotify_df).match(grammy_df)
+    expected = [extract_one('Beyoncé', spotify_df['artists']), None, None]
+    assert matched.tolist() == expected
@@ -0,0 +1,93 @@
+import io
+
+import pandas as pd
+import pytest
+from sqlalchemy import Boolean, Column, Float, Integer, MetaData, String, Table, create_engine, select
+
+from src.load import bulk_loader
+from src.load.bulk_loader import bulk_load
+
+metadata = MetaData()
+TRACKS = Table(
+    'tracks', metadata,
+    Column('ID', Integer, primary_key=True),
+    Column('track_name', String, nullable=True),
+    Column('explicit', Boolean, nullable=True),
+    Column('tempo', Float, nullable=True),
+)
+
+
+def tracks():
+    return pd.DataFrame({
+        'ID': [1, 2, 3, 4],
+        'track_name': pd.array(['Bad Guy', '', None, 'Ça va, "live"'], dtype=pd.StringDtype('pyarrow')),
+        'explicit': pd.array([True, False, None, True], dtype='boolean'),
+        'tempo': [120.5, None, 0.0, 98.25],
+    })
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'load.sqlite'}")
+    metadata.create_all(engine)
+    return engine
+
+
+def read_back(engine):
+    with engine.connect() as connection:
+        return [tuple(row) for row in connection.execute(select(TRACKS).order_by(TRACKS.c.ID))]
+
+
+EXPECTED = [
+    (1, 'Bad Guy', True, 120.5),
+    (2, '', False, None),
+    (3, None, None, 0.0),
+    (4, 'Ça va, "live"', True, 98.25),
+]
+
+
+@pytest.mark.parametrize('batch_size', [1, 3, 50000])
+def test_executemany_round_trips_nulls_booleans_and_empty_strings(engine, batch_size):
+    assert bulk_load(tracks(), TRACKS, engine, batch_size=batch_size) == 4
+    assert read_back(engine) == EXPECTED
+
+
+def test_failed_load_rolls_back(engine):
+    df = pd.concat([tracks(), tracks().iloc[:1]])
+    with pytest.raises(Exception):
+        bulk_load(df, TRACKS, engine, batch_size=2)
+    assert read_back(engine) == []
+
+
+def test_postgresql_without_psycopg2_uses_executemany(engine, monkeypatch):
+    # e.g. postgresql+pg8000 or postgresql+psycopg: no copy_expert on their cursors
+    monkeypatch.setattr(engine.dialect, 'name', 'postgresql')
+    monkeypatch.setattr(bulk_loader, '_copy_batch', lambda *args: pytest.fail('COPY used without psycopg2'))
+    bulk_load(tracks(), TRACKS, engine)
+    monkeypatch.undo()
+    assert read_back(engine) == EXPECTED
+
+
+def test_copy_buffer_keeps_empty_strings_apart_from_nulls():
+    class Cursor:
+        def copy_expert(self, statement, buffer):
+            self.statement, self.content = statement, buffer.read()
+
+    class Preparer:
+        def quote(self, name):
+            return f'"{name}"'
+
+        def format_table(self, table):
+            return f'"{table.name}"'
+
+    cursor = Cursor()
+    bulk_loader._copy_batch(cursor, Preparer(), TRACKS, tracks())
+    assert cursor.statement == 'COPY "tracks" ("ID", "track_name", "explicit", "tempo") ' \
+                               "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    # In CSV format an unquoted empty field is '' once NULL is '\N'
+    assert pd.read_csv(io.StringIO(cursor.content), header=None, keep_default_na=False).values.tolist() == [
+        [1, 'Bad Guy', 'True', '120.5'],
+        [2, '', 'False', '\\N'],
+        [3, '\\N', '\\N', '0.0'],
+        [4, 'Ça va, "live"', 'True', '98.25'],
+    ]
@@ -0,0 +1,20 @@
+import pytest
+
+pytest.importorskip('airflow')
+
+from decouple import config
+
+from benchmarks.parse_time import _heavy_package, measure
+
+
+def test_dag_parses_within_budget():
+    budget_ms = config('PARSE_BUDGET_MS', default=200, cast=float)
+    # Best of three, so one slow start of the interpreter does not fail the test
+    timings, heavy = [], set()
+    for _ in range(3):
+        elapsed_ms, modules = measure()
+        timings.append(elapsed_ms)
+        heavy.update(filter(None, map(_heavy_package, modules)))
+
+    assert min(timings) < budget_ms, f"dags.dag took {min(timings):.1f} ms to import, budget {budget_ms:.0f} ms"
+    assert not heavy, f"Heavy modules imported at parse time: {', '.join(sorted(heavy))}"
@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+from sqlalchemy import BigInteger, Boolean, Column, Float, Integer, MetaData, String, Table, create_engine, select
+
+from src.load.incremental_loader import incremental_load, incremental_load_chunks, row_hashes, supports_incremental
+
+metadata = MetaData()
+TRACKS = Table(
+    'tracks', metadata,
+    Column('ID', Integer, primary_key=True),
+    Column('track_name', String, nullable=True),
+    Column('explicit', Boolean, nullable=False),
+    Column('tempo', Float, nullable=True),
+    Column('row_hash', BigInteger, nullable=True),
+)
+
+
+def tracks():
+    return pd.DataFrame({
+        'ID': [1, 2, 3, 4],
+        'track_name': ['Bad Guy', '', None, 'Halo'],
+        'explicit': [True, False, False, True],
+        'tempo': [120.5, None, 0.0, 98.25],
+    })
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'load.sqlite'}")
+    metadata.create_all(engine)
+    return engine
+
+
+def table_content(engine):
+    with engine.connect() as connection:
+        rows = connection.execute(select(TRACKS).order_by(TRACKS.c.ID)).mappings().all()
+    return [{name: value for name, value in row.items() if name != 'row_hash'} for row in rows]
+
+
+def records(df):
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def test_first_load_inserts_every_row(engine):
+    assert supports_incremental(engine, TRACKS)
+    summary = incremental_load(tracks(), TRACKS, engine)
+    assert summary == {'upserted': 4, 'deleted': 0, 'unchanged': 0}
+    assert table_content(engine) == records(tracks())
+
+
+def test_rerun_upserts_nothing(engine):
+    incremental_load(tracks(), TRACKS, engine)
+    assert incremental_load(tracks(), TRACKS, engine) == {'upserted': 0, 'deleted': 0, 'unchanged': 4}
+    assert table_content(engine) == records(tracks())
+
+
+def test_insert_update_and_delete(engine):
+    incremental_load(tracks(), TRACKS, engine)
+    df = tracks()
+    df.loc[1, 'track_name'] = 'Hey, Ma'     # updated
+    df.loc[3, 'tempo'] = None                # updated to NULL
+    df = df.drop(index=2)                    # deleted
+    df.loc[9] = [5, 'Lovely', False, 80.0]   # inserted
+    df['ID'] = df['ID'].astype('int64')
+
+    summary = incremental_load(df, TRACKS, engine)
+    assert summary == {'upserted': 3, 'deleted': 1, 'unchanged': 1}
+    assert table_content(engine) == records(df)
+
+
+def test_chunked_load_matches_single_load(engine, tmp_path):
+    incremental_load(tracks(), TRACKS, engine)
+    df = tracks().drop(index=2)
+    df.loc[1, 'track_name'] = 'Hey, Ma'
+    df.loc[9] = [5, 'Lovely', False, 80.0]
+    df['ID'] = df['ID'].astype('int64')
+
+    chunks = [df.iloc[:2], df.iloc[2:]]
+    assert [len(chunk) for chunk in incremental_load_chunks(iter(chunks), TRACKS, engine)] == [2, 2]
+    assert table_content(engine) == records(df)
+
+    single = create_engine(f"sqlite:///{tmp_path / 'single.sqlite'}")
+    metadata.create_all(single)
+    incremental_load(tracks(), TRACKS, single)
+    incremental_load(df, TRACKS, single)
+    assert table_content(single) == table_content(engine)
+
+
+def test_schema_dtype_change_rewrites_nothing(engine):
+    incremental_load(tracks(), TRACKS, engine)
+    # Same values with the dtypes models/schema.py could switch to
+    df = tracks().astype({'ID': 'Int32', 'explicit': 'boolean', 'tempo': 'float32',
+                          'track_name': pd.StringDtype('pyarrow')})
+    assert incremental_load(df, TRACKS, engine)['upserted'] == 0
+
+
+def test_row_hash_ignores_dtypes_but_not_values():
+    df = tracks()
+    narrow = df.astype({'ID': 'int8', 'explicit': 'boolean', 'tempo': 'float32', 'track_name': 'category'})
+    assert row_hashes(narrow).tolist() == row_hashes(df).tolist()
+
+    changed = df.assign(tempo=df['tempo'].fillna(0.0))
+    assert (row_hashes(changed) != row_hashes(df)).tolist() == [False, True, False, False]
+    # A missing integer does not collide with zero
+    nullable = pd.DataFrame({'ID': pd.array([0, None], dtype='Int64')})
+    assert row_hashes(nullable).nunique() == 2
+
+
+def test_table_without_row_hash_needs_a_full_load(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.sqlite'}")
+    old = MetaData()
+    Table('tracks', old, Column('ID', Integer, primary_key=True))
+    old.create_all(engine)
+    assert not supports_incremental(engine, TRACKS)
+    assert not supports_incremental(create_engine('sqlite://'), TRACKS)
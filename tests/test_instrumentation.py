@@ -0,0 +1,59 @@
+import threading
+
+import pandas as pd
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from benchmarks.generators import generate_spotify
+from dags.etl import transform_spotify_df
+from src.telemetry import instrumentation
+from src.telemetry.instrumentation import instrument_stage
+from src.transform.transform_spotify import TransformSpotify
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    # Local providers, so the process-wide ones stay untouched
+    exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    meter = MeterProvider(metric_readers=[InMemoryMetricReader()]).get_meter('test')
+    monkeypatch.setattr(instrumentation, '_instruments', {
+        'enabled': True,
+        'tracer': tracer_provider.get_tracer('test'),
+        **{name: meter.create_histogram(name) for name in
+           ('wall_time', 'cpu_time', 'peak_rss', 'peak_rss_delta', 'df_memory')},
+        **{name: meter.create_counter(name) for name in ('rows_in', 'rows_out')},
+    })
+    return exporter
+
+
+def test_only_stage_level_methods_get_spans(spans, monkeypatch):
+    monkeypatch.setenv('MATCH_CACHE_PATH', '')
+    transform_spotify_df(generate_spotify(2000, seed=1))
+    names = [span.name for span in spans.get_finished_spans()]
+    # The plan builder and its chained steps are not stages of their own
+    assert names == ['TransformSpotify.plan.execute', 'TransformSpotify.plan.execute']
+    execute = spans.get_finished_spans()[0]
+    assert execute.attributes['etl.rows_out'] <= 2000
+    assert execute.attributes['etl.peak_rss_delta_bytes'] >= 0
+
+
+def test_eager_steps_are_stages(spans):
+    transformer = TransformSpotify(generate_spotify(500, seed=1))
+    transformer.unnamed_to_id()
+    transformer.drop_nan_records()
+    assert [span.name for span in spans.get_finished_spans()] == ['TransformSpotify.drop_nan_records']
+
+
+def test_disabled_telemetry_measures_nothing(monkeypatch):
+    monkeypatch.setattr(instrumentation, '_instruments', {'enabled': False})
+    monkeypatch.setattr(instrumentation, '_PeakRss', lambda process: pytest.fail('RSS sampled'))
+    threads = threading.active_count()
+    with instrument_stage('stage', rows_in=3) as stats:
+        stats['output'] = pd.DataFrame({'a': [1]})
+        assert threading.active_count() == threads
@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+from sqlalchemy import func, select
+
+import db.db_connection
+from benchmarks.generators import generate_grammy, generate_spotify
+from dags.etl import transform_grammy_df, transform_spotify_df
+from db.db_connection import build_engine
+from models.model import MergedDAta
+from src.load import checkpoint, load_to_database
+from src.merge.merge import MergeData
+
+CHUNK_ROWS = 1000
+
+
+@pytest.fixture(scope='module')
+def merged():
+    spotify_df = generate_spotify(5000, seed=1)
+    grammy_df = generate_grammy(500, spotify_df, seed=1)
+    return MergeData(transform_grammy_df(grammy_df), transform_spotify_df(spotify_df)).merge()
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setenv('MATCH_CACHE_PATH', '')
+    monkeypatch.setenv('EXPORT_CHUNK_ROWS', str(CHUNK_ROWS))
+    url = f"sqlite:///{tmp_path / 'etl.sqlite'}"
+    monkeypatch.setattr(db.db_connection, 'database_url', lambda: url)
+    return build_engine()
+
+
+def written_chunks(monkeypatch, fail_at=None):
+    # Records the chunks committed by the loader, failing at chunk fail_at
+    written = []
+
+    def write(engine, table, load_id, index, df):
+        if index == fail_at:
+            raise ConnectionError('server closed the connection')
+        written.append(index)
+        return checkpoint.write_chunk(engine, table, load_id, index, df)
+    monkeypatch.setattr(load_to_database, 'write_chunk', write)
+    return written
+
+
+def row_count(engine):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(MergedDAta.__table__)).scalar()
+
+
+def test_failed_load_raises_and_retry_resumes(merged, engine, monkeypatch):
+    chunks = -(-len(merged.drop_duplicates(subset='ID')) // CHUNK_ROWS)
+
+    written = written_chunks(monkeypatch, fail_at=2)
+    with pytest.raises(ConnectionError):
+        load_to_database.load_data(merged.copy(), mode='full', load_id='input-1')
+    assert written == [0, 1]
+
+    written = written_chunks(monkeypatch)
+    loaded = load_to_database.load_data(merged.copy(), mode='full', load_id='input-1')
+    assert written == list(range(2, chunks))
+    assert row_count(engine) == len(loaded)
+
+
+def test_failed_chunked_load_raises_and_retry_resumes(merged, engine, monkeypatch):
+    def open_chunks():
+        return (merged.iloc[start:start + CHUNK_ROWS] for start in range(0, len(merged), CHUNK_ROWS))
+    chunks = len(list(open_chunks()))
+
+    written = written_chunks(monkeypatch, fail_at=2)
+    with pytest.raises(ConnectionError):
+        for _ in load_to_database.load_chunks(open_chunks, load_id='input-1'):
+            pass
+    assert written == [0, 1]
+
+    written = written_chunks(monkeypatch)
+    loaded = pd.concat(list(load_to_database.load_chunks(open_chunks, load_id='input-1')))
+    assert written == list(range(2, chunks))
+    assert row_count(engine) == len(loaded)
+
+
+def test_chunked_incremental_load_keeps_table_readable(merged, engine, monkeypatch):
+    load_to_database.load_data(merged.copy(), mode='full')
+    before = row_count(engine)
+    changed = merged.drop_duplicates(subset='ID').iloc[100:].copy()
+    changed['popularity'] = changed['popularity'] + 1
+
+    def open_chunks():
+        return (changed.iloc[start:start + CHUNK_ROWS] for start in range(0, len(changed), CHUNK_ROWS))
+
+    def popularity():
+        with engine.connect() as connection:
+            return connection.execute(select(func.sum(MergedDAta.__table__.c.popularity))).scalar()
+    old_popularity = popularity()
+
+    # No checkpointed (drop and reload) write may happen in incremental mode
+    written = written_chunks(monkeypatch, fail_at=0)
+    for _ in load_to_database.load_chunks(open_chunks, load_id='input-2', mode='incremental'):
+        # Readers keep seeing the previous table until the last chunk commits
+        assert row_count(engine) == before and popularity() == old_popularity
+    assert written == []
+    assert row_count(engine) == len(changed)
+    assert popularity() == int(changed['popularity'].sum())
@@ -0,0 +1,36 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from src.merge.match_cache import MatchCache
+
+
+def fill(path, worker, rounds=20, pairs=500):
+    cache = MatchCache(path, 'v1')
+    try:
+        for batch in range(rounds):
+            decisions = {(f'{worker}-{batch}-{i}', f'choice-{i}'): i % 2 == 0 for i in range(pairs)}
+            cache.put_many(decisions)
+            assert cache.get_many(list(decisions)) == decisions
+    finally:
+        cache.close()
+
+
+def test_cache_uses_wal(tmp_path):
+    cache = MatchCache(str(tmp_path / 'cache.sqlite'), 'v1')
+    try:
+        assert cache.connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    finally:
+        cache.close()
+
+
+def test_processes_share_one_cache_file(tmp_path):
+    # Like the shard workers of sharded_join, every process opens the same file
+    path = str(tmp_path / 'cache.sqlite')
+    MatchCache(path, 'v1').close()
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(fill, [path] * 4, range(4)))
+
+    cache = MatchCache(path, 'v1')
+    try:
+        assert len(cache) == 4 * 20 * 500
+    finally:
+        cache.close()
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from benchmarks.generators import generate_grammy, generate_spotify
+from dags.etl import transform_grammy_df, transform_spotify_df
+from src.merge.merge import MergeData
+from src.merge.stream_merge import stream_merge
+
+
+@pytest.fixture(scope='module')
+def frames():
+    spotify_df = generate_spotify(6000, seed=4)
+    grammy_df = generate_grammy(800, spotify_df, seed=4)
+    # Nominee spellings only the fuzzy track matching resolves
+    grammy_df.loc[::7, 'nominee'] = grammy_df.loc[::7, 'nominee'] + ' (Feat. Guest)'
+    return transform_grammy_df(grammy_df), transform_spotify_df(spotify_df)
+
+
+@pytest.fixture(autouse=True)
+def no_match_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv('MATCH_CACHE_PATH', '')
+    monkeypatch.setenv('MERGE_SHARD_DIR', str(tmp_path))
+
+
+def merge(frames, **kwargs):
+    grammy_df, spotify_df = frames
+    return MergeData(grammy_df.copy(), spotify_df.copy()).merge(**kwargs)
+
+
+def test_sharded_merge_equals_serial(frames):
+    serial = merge(frames, workers=1)
+    sharded = merge(frames, workers=3)
+    pd.testing.assert_frame_equal(sharded, serial)
+
+    # The frames exercise every kind of row the join produces
+    matched = serial['number_wins'] > 0
+    assert matched.any() and (~matched).any()
+    # Tracks sharing a name across artists must only match their own artist
+    duplicated = serial.duplicated('track_name', keep=False)
+    assert (duplicated & matched).any() and (duplicated & ~matched).any()
+
+
+def test_sharded_merge_with_more_shards_than_tracks(frames):
+    grammy_df, spotify_df = frames
+    small = (grammy_df, spotify_df.iloc[:40].reset_index(drop=True))
+    pd.testing.assert_frame_equal(merge(small, workers=3), merge(small, workers=1))
+
+
+@pytest.mark.parametrize('track_match', ['fuzzy', 'exact'])
+def test_stream_merge_equals_merge(frames, monkeypatch, track_match):
+    monkeypatch.setenv('TRACK_MATCH', track_match)
+    grammy_df, spotify_df = frames
+    expected = merge(frames)
+
+    def chunks():
+        return (spotify_df.iloc[start:start + 1000] for start in range(0, len(spotify_df), 1000))
+    streamed = pd.concat(list(stream_merge(grammy_df.copy(), chunks)))
+
+    # stream_merge keeps the Spotify order; merge sorts by artist and track
+    def by_id(df):
+        return df.sort_values('ID', kind='stable').reset_index(drop=True)
+    pd.testing.assert_frame_equal(by_id(streamed), by_id(expected))
+    assert (expected['number_wins'] > 0).any()
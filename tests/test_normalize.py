@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.transform.normalize import StringNormalizer
+
+# Apostrophes, separators, surrounding whitespace, case-only duplicates,
+# characters whose title case is special, and missing values
+TRICKY = [
+    "o'neil", 'AC/DC', '  lead', 'trail  ', 'abc', 'ABC ', 'mr. x-ray', 'don’t', 'hello\tworld',
+    '123abc', 'a1b2c', 'x_y', 'ÉCOLE', 'straße', 'ǆemal', 'ΣΑΣ ΣΑΣ', 'İstanbul', 'ﬁne', 'ᾳ', '',
+    None, np.nan,
+]
+
+
+def per_row(column):
+    # The normalization StringNormalizer replaced
+    return column.astype(object).str.title().str.strip()
+
+
+def as_list(column):
+    return column.astype(object).where(column.notna(), None).tolist()
+
+
+@pytest.mark.parametrize('dtype', [object, 'string[pyarrow]', 'string', 'category'])
+@pytest.mark.parametrize('unique_ratio', [0.0, 0.9, 1.1])
+def test_matches_per_row_normalization(dtype, unique_ratio):
+    # unique_ratio 0.0 takes the plain .str path, 1.1 always factorizes
+    column = pd.Series(TRICKY * 3, dtype=dtype if dtype != 'category' else object)
+    if dtype == 'category':
+        column = column.astype('category')
+    normalized = StringNormalizer(unique_ratio=unique_ratio).normalize(column)
+    assert as_list(normalized) == as_list(per_row(pd.Series(TRICKY * 3, dtype=object)))
+    if dtype in ('string[pyarrow]', 'string'):
+        assert normalized.dtype == column.dtype
+
+
+def test_as_category_merges_values_that_normalize_alike():
+    normalized = StringNormalizer().normalize(pd.Series(['abc', 'ABC ', None, 'abc']), as_category=True)
+    assert list(normalized.cat.categories) == ['Abc']
+    assert as_list(normalized) == ['Abc', 'Abc', None, 'Abc']
+
+
+def test_values_that_are_not_strings_become_nan():
+    column = pd.Series(['pop', 1, 2.5, 'pop', 1], dtype=object)
+    assert as_list(StringNormalizer(unique_ratio=1.1).normalize(column)) == as_list(per_row(column))
+
+
+def test_cache_is_shared_across_columns_and_bounded():
+    normalizer = StringNormalizer(max_cache_entries=3, unique_ratio=1.1)
+    normalizer.normalize(pd.Series(['a', 'b', 'a']))
+    assert normalizer.cache == {'a': 'A', 'b': 'B'}
+    normalizer.normalize(pd.Series(['b', 'c', 'd']))
+    assert len(normalizer.cache) <= 3
+
+
+def test_normalize_frame_matches_per_row_on_every_text_column():
+    df = pd.DataFrame({
+        'artists': pd.Series(TRICKY, dtype=object),
+        'track_name': pd.Series(TRICKY[::-1], dtype='string[pyarrow]'),
+        'track_genre': pd.Series(TRICKY, dtype=object).astype('category'),
+        'popularity': range(len(TRICKY)),
+    })
+    expected = {name: as_list(per_row(df[name])) for name in ('artists', 'track_name', 'track_genre')}
+    StringNormalizer().normalize_frame(df)
+    assert {name: as_list(df[name]) for name in expected} == expected
+    assert df['popularity'].tolist() == list(range(len(TRICKY)))
@@ -0,0 +1,113 @@
+import pandas as pd
+import pytest
+from sqlalchemy import update
+
+import db.db_connection
+from benchmarks.generators import generate_grammy, generate_spotify
+from dags.etl import transform_grammy_df, transform_spotify_df
+from db.db_connection import build_engine
+from models.model import MergedDAta
+from src.load import load_to_database
+from src.load.load_state import current_load, record_load
+from src.merge.merge import MergeData
+from src.read import queries, query_cache
+from src.read.query_cache import QueryCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(query_cache.time, 'monotonic', clock)
+    return clock
+
+
+def test_hit_miss_and_ttl_expiry(clock):
+    cache = QueryCache(max_entries=2, ttl_seconds=10)
+    assert cache.get('a') is None
+    cache.put('a', 1, tables=['merged_data'])
+    clock.now += 9
+    assert cache.get('a') == 1
+    clock.now += 2
+    assert cache.get('a') is None
+    assert cache.stats() == {'entries': 0, 'hits': 1, 'misses': 2}
+
+
+def test_lru_eviction_and_invalidation(clock):
+    cache = QueryCache(max_entries=2, ttl_seconds=10)
+    cache.put('a', 1, tables=['merged_data'])
+    cache.put('b', 2, tables=['grammy_awards'])
+    cache.get('a')
+    cache.put('c', 3, tables=['merged_data'])
+    assert cache.get('b') is None
+
+    cache.invalidate('merged_data')
+    assert cache.get('a') is None and cache.get('c') is None
+    cache.put('b', 2, tables=['grammy_awards'])
+    cache.invalidate()
+    assert cache.get('b') is None
+
+
+@pytest.fixture(scope='module')
+def merged():
+    spotify_df = generate_spotify(2000, seed=5)
+    grammy_df = generate_grammy(200, spotify_df, seed=5)
+    return MergeData(transform_grammy_df(grammy_df), transform_spotify_df(spotify_df)).merge()
+
+
+@pytest.fixture
+def engine(merged, tmp_path, monkeypatch):
+    monkeypatch.setenv('MATCH_CACHE_PATH', '')
+    url = f"sqlite:///{tmp_path / 'etl.sqlite'}"
+    monkeypatch.setattr(db.db_connection, 'database_url', lambda: url)
+    queries.invalidate()
+    load_to_database.load_data(merged.copy(), mode='full', load_id='input-1')
+    return build_engine()
+
+
+def genre(merged):
+    return merged['track_genre'].value_counts().index[0]
+
+
+def cache_stats():
+    stats = queries.query_cache.stats()
+    return stats['hits'], stats['misses']
+
+
+def test_queries_are_cached_per_arguments(engine, merged):
+    hits, misses = cache_stats()
+    first = queries.top_tracks_by_genre(genre(merged), limit=5)
+    again = queries.top_tracks_by_genre(genre(merged), limit=5)
+    other = queries.top_tracks_by_genre(genre(merged), limit=3)
+    pd.testing.assert_frame_equal(first, again)
+    assert len(first) == 5 and len(other) == 3
+    assert cache_stats() == (hits + 1, misses + 2)
+
+
+def test_load_by_another_process_is_seen(engine, merged):
+    before = queries.top_tracks_by_genre(genre(merged), limit=5)
+
+    # Another process rewrites the table: no listener of this process runs
+    with engine.begin() as connection:
+        connection.execute(update(MergedDAta.__table__).values(popularity=MergedDAta.__table__.c.popularity + 1))
+    pd.testing.assert_frame_equal(queries.top_tracks_by_genre(genre(merged), limit=5), before)
+
+    with engine.begin() as connection:
+        record_load(connection, MergedDAta.__table__, 'input-2')
+    after = queries.top_tracks_by_genre(genre(merged), limit=5)
+    assert (after['popularity'] == before['popularity'] + 1).all()
+
+
+def test_load_in_this_process_invalidates(engine, merged):
+    queries.wins_by_year()
+    assert queries.query_cache.stats()['entries'] == 1
+    load_to_database.load_data(merged.copy(), mode='full')
+    assert queries.query_cache.stats()['entries'] == 0
+    assert current_load(engine, MergedDAta.__table__)['generation'] == 2
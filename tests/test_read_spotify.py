@@ -0,0 +1,26 @@
+import pandas as pd
+
+from benchmarks.generators import generate_spotify
+from src.extract.read_spotify import iter_spotify_chunks, read_spotify_csv
+
+
+def write_csv(tmp_path, rows=2000):
+    df = generate_spotify(rows, seed=0)
+    # Missing values spelled the ways pandas reads as null
+    df.loc[[1, 5, 9], 'artists'] = ['', 'NA', None]
+    df.loc[[2, 6], 'track_name'] = ['', 'null']
+    path = tmp_path / 'spotify.csv'
+    df.set_index('Unnamed: 0').rename_axis(None).to_csv(path)
+    return path
+
+
+def test_chunks_match_read_spotify_csv(tmp_path):
+    path = write_csv(tmp_path)
+    expected = read_spotify_csv(path)
+    chunks = list(iter_spotify_chunks(path, block_size=16 << 10))
+
+    assert len(chunks) > 1
+    result = pd.concat(chunks, ignore_index=True)
+    assert list(result.columns) == list(expected.columns)
+    result['track_genre'] = result['track_genre'].astype(expected['track_genre'].dtype)
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.schema import MERGED_SCHEMA, STRING, apply_schema
+from src.artifacts.artifact_store import ArtifactStore
+
+
+def merged_columns():
+    # Columns as they come out of the merge, before the schema is applied
+    return pd.DataFrame({
+        'ID': [1, 2, 3, 4],
+        'popularity': [0, 100, 55, 1],
+        'duration_ms': [1, 2**31 - 1, 180000, 0],
+        'grammy_year': [2019.0, np.nan, 1959.0, np.nan],
+        'number_wins': [1.0, np.nan, 0.0, 12.0],
+        'track_genre': ['pop', None, 'k-pop', 'pop'],
+        'track_name': ['Bad Guy', '', None, 'Ça va ' + 'x' * 500],
+        'explicit': [True, False, False, True],
+    })
+
+
+def test_columns_get_the_schema_dtypes():
+    df = apply_schema(merged_columns(), MERGED_SCHEMA)
+    assert df.dtypes.to_dict() == {
+        'ID': 'int64', 'popularity': 'int8', 'duration_ms': 'int32', 'grammy_year': 'Int16',
+        'number_wins': 'Int16', 'track_genre': 'category', 'track_name': STRING, 'explicit': 'bool',
+    }
+
+
+def test_values_survive_the_cast_and_an_artifact():
+    original = merged_columns()
+    df = apply_schema(merged_columns(), MERGED_SCHEMA)
+    for name in original.columns:
+        assert df[name].astype(object).where(df[name].notna(), None).tolist() == \
+            original[name].astype(object).where(original[name].notna(), None).tolist(), name
+    assert df['track_name'].iloc[1] == ''
+    assert df['grammy_year'].isna().tolist() == [False, True, False, True]
+
+
+def test_schema_survives_an_artifact(tmp_path):
+    df = apply_schema(merged_columns(), MERGED_SCHEMA)
+    ref = ArtifactStore(str(tmp_path)).write(df, 'merged')
+    pd.testing.assert_frame_equal(ArtifactStore.read(ref), df)
+
+
+def test_applying_twice_changes_nothing():
+    df = apply_schema(merged_columns(), MERGED_SCHEMA)
+    pd.testing.assert_frame_equal(apply_schema(df.copy(), MERGED_SCHEMA), df)
+
+
+@pytest.mark.parametrize('column, value', [('popularity', 300), ('duration_ms', 2**31), ('popularity', 1.5)])
+def test_narrowing_that_loses_values_raises(column, value):
+    df = merged_columns().astype({column: object})
+    df.loc[0, column] = value
+    df[column] = pd.to_numeric(df[column])
+    with pytest.raises(ValueError, match=column):
+        apply_schema(df, MERGED_SCHEMA)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generators import generate_spotify
+from dags import etl
+from src.artifacts.artifact_store import ArtifactStore
+from src.extract.read_spotify import iter_spotify_chunks
+
+
+@pytest.fixture(scope='module')
+def spotify_df():
+    df = generate_spotify(3000, seed=6, nan_rows=30)
+    # Few popularity values, so the max-popularity ties often span partitions
+    df['popularity'] = np.random.default_rng(6).integers(0, 3, len(df))
+    return df
+
+
+def partitioned(df, partitions):
+    bounds = np.linspace(0, len(df), partitions + 1).astype(int)
+    return [etl.transform_spotify_partition_df(df.iloc[start:stop]) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+@pytest.mark.parametrize('partitions', [1, 2, 4, 7])
+def test_reduced_partitions_equal_whole_frame(spotify_df, partitions):
+    expected = etl.transform_spotify_df(spotify_df.copy())
+    reduced = etl.reduce_spotify_partitions_df(partitioned(spotify_df.copy(), partitions))
+    pd.testing.assert_frame_equal(reduced, expected)
+
+
+class _TaskInstance:
+    def __init__(self):
+        self.returned = {}
+
+    def xcom_pull(self, task_ids, key=None):
+        return self.returned[task_ids]
+
+
+@pytest.mark.parametrize('partitions', [3, 5])
+def test_mapped_tasks_equal_whole_frame(spotify_df, tmp_path, monkeypatch, partitions):
+    monkeypatch.setenv('STAGE_CACHE_DIR', '')
+    monkeypatch.setenv('ARTIFACT_DIR', str(tmp_path / 'artifacts'))
+    monkeypatch.setenv('SPOTIFY_PARTITIONS', str(partitions))
+    path = tmp_path / 'spotify.csv'
+    spotify_df.set_index('Unnamed: 0').rename_axis(None).to_csv(path)
+    # Several record batches, as the extract task writes them
+    ref = ArtifactStore(str(tmp_path / 'extract')).write_chunks(iter_spotify_chunks(str(path), block_size=64 << 10),
+                                                                'read_spotify')
+
+    # What Airflow does with the mapped task: one call per element of the
+    # list split_spotify returns, then the reduce gets every return value
+    ti = _TaskInstance()
+    ti.returned['read_spotify'] = ref
+    splits = etl.split_spotify(ti=ti, run_id='test')
+    assert len(splits) == partitions
+    ti.returned['transform_spotify_partition'] = [
+        etl.transform_spotify_partition(ti=ti, run_id='test', **split) for split in splits
+    ]
+    transformed = ArtifactStore.read(etl.transform_spotify(ti=ti, run_id='test'))
+
+    # Written as the task writes it: the artifact reads categories back as text
+    expected = ArtifactStore(str(tmp_path / 'expected')).write(etl.transform_spotify_df(ArtifactStore.read(ref)), 'expected')
+    pd.testing.assert_frame_equal(transformed, ArtifactStore.read(expected))
+
+
+def test_dag_maps_the_partition_transform():
+    pytest.importorskip('airflow')
+    mappedoperator = pytest.importorskip('airflow.models.mappedoperator')
+    from dags.dag import dag
+
+    task = dag.get_task('transform_spotify_partition')
+    assert isinstance(task, mappedoperator.MappedOperator)
+    assert task.upstream_task_ids == {'split_spotify'}
+    assert task.downstream_task_ids == {'transform_spotify'}
+    assert dag.get_task('transform_spotify').downstream_task_ids == {'merge'}
+    assert dag.get_task('merge').upstream_task_ids == {'transform_spotify', 'transform_grammy'}
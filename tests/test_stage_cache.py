@@ -0,0 +1,118 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import func, select
+
+import db.db_connection
+from benchmarks.generators import generate_grammy, generate_spotify
+from dags import etl
+from db.db_connection import build_engine
+from models.model import MergedDAta
+from src.artifacts.artifact_store import ArtifactStore
+from src.artifacts.stage_cache import StageCache
+from src.merge.merge import MergeData
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StageCache(str(tmp_path / 'stages'), keep=2)
+
+
+def ref(sha256):
+    return {'sha256': sha256, 'path': 'unused'}
+
+
+def test_fingerprint_changes_with_every_input(cache, tmp_path):
+    path = tmp_path / 'input.csv'
+    path.write_text('a,b\n1,2\n')
+    base = cache.fingerprint('stage', files=[str(path)], refs=[ref('1')], code=[json], params={'mode': 'full'})
+    assert base.startswith('stage-')
+    assert cache.fingerprint('stage', files=[str(path)], refs=[ref('1')], code=[json], params={'mode': 'full'}) == base
+
+    assert cache.fingerprint('stage', files=[str(path)], refs=[ref('2')], code=[json], params={'mode': 'full'}) != base
+    assert cache.fingerprint('stage', files=[str(path)], refs=[ref('1')], code=[os], params={'mode': 'full'}) != base
+    assert cache.fingerprint('stage', files=[str(path)], refs=[ref('1')], code=[json], params={'mode': 'stream'}) != base
+
+    # Touching a file re-hashes it, but only a content change makes a new key
+    os.utime(path, ns=(1, 1))
+    assert cache.fingerprint('stage', files=[str(path)], refs=[ref('1')], code=[json], params={'mode': 'full'}) == base
+    path.write_text('a,b\n1,3\n')
+    assert cache.fingerprint('stage', files=[str(path)], refs=[ref('1')], code=[json], params={'mode': 'full'}) != base
+
+
+def test_changed_artifact_is_a_miss(cache):
+    ref_ = cache.put_frame('stage-1', pd.DataFrame({'a': range(10)}))
+    assert cache.get('stage-1') == ref_
+    with open(ref_['path'], 'ab') as f:
+        f.write(b'0')
+    assert cache.get('stage-1') is None
+
+
+def test_evict_keeps_latest_entries_per_stage(cache):
+    refs = []
+    for i in range(4):
+        refs.append(cache.put_frame(f'stage-{i}', pd.DataFrame({'a': [i]})))
+        # mtimes decide the order; make it explicit
+        for name in os.listdir(cache.base_dir):
+            if name.startswith(f'stage-{i}.'):
+                os.utime(os.path.join(cache.base_dir, name), ns=(i * 10**9, i * 10**9))
+    cache.put('other-0', {'id': 1})
+    cache._evict('stage')
+
+    assert cache.get('stage-0') is None and cache.get('stage-1') is None
+    assert not os.path.exists(refs[0]['path']) and not os.path.exists(refs[1]['path'])
+    assert cache.get('stage-2') == refs[2] and cache.get('stage-3') == refs[3]
+    assert cache.get('other-0') == {'id': 1}
+
+
+class _TaskInstance:
+    def __init__(self, ref):
+        self.ref = ref
+
+    def xcom_pull(self, task_ids, key=None):
+        return self.ref
+
+    def xcom_push(self, key, value):
+        pass
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setenv('MATCH_CACHE_PATH', '')
+    monkeypatch.setenv('STAGE_CACHE_DIR', str(tmp_path / 'stages'))
+    monkeypatch.setenv('ARTIFACT_DIR', str(tmp_path / 'artifacts'))
+    monkeypatch.setattr(etl, 'pool_metrics', lambda: {})
+    url = f"sqlite:///{tmp_path / 'etl.sqlite'}"
+    monkeypatch.setattr(db.db_connection, 'database_url', lambda: url)
+    return build_engine()
+
+
+@pytest.mark.parametrize('load_mode', ['incremental', 'full'])
+def test_load_is_redone_after_another_input_was_loaded(engine, tmp_path, monkeypatch, load_mode):
+    monkeypatch.setenv('LOAD_MODE', load_mode)
+    spotify_df = generate_spotify(2000, seed=2)
+    grammy_df = generate_grammy(200, spotify_df, seed=2)
+    merged_a = MergeData(etl.transform_grammy_df(grammy_df), etl.transform_spotify_df(spotify_df)).merge()
+    # Same rows, other values: equal row counts do not tell the loads apart
+    merged_b = merged_a.assign(popularity=merged_a['popularity'] + 1)
+    store = ArtifactStore(str(tmp_path / 'merge'))
+    ref_a, ref_b = store.write(merged_a, 'merge_a'), store.write(merged_b, 'merge_b')
+
+    def loaded_popularity():
+        with engine.connect() as connection:
+            return connection.execute(select(func.sum(MergedDAta.__table__.c.popularity))).scalar()
+
+    expected_a = int(merged_a.drop_duplicates(subset='ID')['popularity'].sum())
+    for merge_ref, expected in [(ref_a, expected_a), (ref_b, None), (ref_a, expected_a)]:
+        etl.load_data_to_db(ti=_TaskInstance(merge_ref), run_id='test')
+        if expected is not None:
+            assert loaded_popularity() == expected
+    assert loaded_popularity() == expected_a
+
+    # Loading A again right away is a cache hit: nothing is rewritten
+    state = etl.current_load(engine, MergedDAta.__table__)
+    etl.load_data_to_db(ti=_TaskInstance(ref_a), run_id='test')
+    assert etl.current_load(engine, MergedDAta.__table__) == state
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+pytest.importorskip('googleapiclient')
+pytest.importorskip('google_auth_oauthlib')
+
+from fake_drive import FakeDriveService
+from src.store.store import upload_file
+
+CHUNK_SIZE = 256 * 1024
+
+
+@pytest.fixture
+def export_file(tmp_path, monkeypatch):
+    monkeypatch.setenv('UPLOAD_CHUNK_SIZE', str(CHUNK_SIZE))
+    path = tmp_path / 'merged_data.csv.gz'
+    path.write_bytes(os.urandom(4 * CHUNK_SIZE + 1000))
+    return path
+
+
+def test_upload_creates_file(export_file):
+    service = FakeDriveService()
+    result = upload_file(str(export_file), service=service, folder_id='folder')
+    assert result['skipped'] is False
+    assert service.content(result['id']) == export_file.read_bytes()
+    assert service.chunks_sent == 5
+
+
+def test_unchanged_file_is_skipped(export_file):
+    service = FakeDriveService()
+    first = upload_file(str(export_file), service=service, folder_id='folder')
+    second = upload_file(str(export_file), service=service, folder_id='folder')
+    assert second == {'id': first['id'], 'skipped': True}
+    assert service.uploads == 1
+
+
+def test_changed_file_replaces_previous_version(export_file):
+    service = FakeDriveService()
+    first = upload_file(str(export_file), service=service, folder_id='folder')
+    export_file.write_bytes(b'new content')
+    second = upload_file(str(export_file), service=service, folder_id='folder')
+    assert second['id'] == first['id']
+    assert service.content(first['id']) == b'new content'
+
+
+def test_interrupted_upload_resumes_from_last_chunk(export_file):
+    service = FakeDriveService(fail_chunks=[2])
+    result = upload_file(str(export_file), service=service, folder_id='folder')
+    assert service.content(result['id']) == export_file.read_bytes()
+    # Only the failed chunk is sent again
+    assert service.chunks_sent == 6
+
+
+class _TaskInstance:
+    def __init__(self, ref):
+        self.ref = ref
+
+    def xcom_pull(self, task_ids):
+        return self.ref
+
+
+def test_store_task_fails_on_upload_error(tmp_path, monkeypatch):
+    pytest.importorskip('airflow')
+    import pandas as pd
+    from dags import etl
+    from src.store import store
+
+    def upload_file(path, mimetype=None):
+        raise ConnectionError('drive unavailable')
+    monkeypatch.setattr(store, 'upload_file', upload_file)
+    monkeypatch.setattr(etl, 'pool_metrics', lambda: {})
+    monkeypatch.setattr(etl, 'iter_artifact_chunks', lambda ref: iter([pd.DataFrame({'ID': [1, 2]})]))
+    monkeypatch.setenv('STAGE_CACHE_DIR', '')
+    monkeypatch.setenv('EXPORT_DIR', str(tmp_path))
+    # The error reaches Airflow so the task is retried instead of succeeding
+    with pytest.raises(ConnectionError, match='drive unavailable'):
+        etl.store_drive(ti=_TaskInstance({'num_rows': 2}), run_id='test')
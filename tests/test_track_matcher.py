@@ -0,0 +1,58 @@
+import pandas as pd
+
+from src.merge.track_matcher import TrackMatcher, track_keys
+
+SPOTIFY = pd.DataFrame({
+    'track_name': [
+        'Bad Guy', 'Lose Yourself', 'Dont Stop Believin', 'Hey Ya!', 'Yesterday - Remastered 2009',
+        'Hotel California - Live', 'Old Town Road (Feat. Billy Ray Cyrus)', 'Shallow', 'Shallow',
+    ],
+    'artists': [
+        'Billie Eilish', 'Eminem', 'Journey', 'Outkast', 'The Beatles',
+        'Eagles', 'Lil Nas X;Billy Ray Cyrus', 'Lady Gaga;Bradley Cooper', 'Kim Petras',
+    ],
+})
+
+# Grammy nominee -> Spotify track of the same artist
+RESOLVED = [
+    ('Bad Guy (Feat. Justin Bieber)', 'Billie Eilish', 'Bad Guy'),
+    ('Lose Yourself [With Dr. Dre]', 'Eminem', 'Lose Yourself'),
+    ("Don't Stop Believin'", 'Journey', 'Dont Stop Believin'),
+    ('Hey Ya', 'Outkast', 'Hey Ya!'),
+    ('Yesterday', 'The Beatles', 'Yesterday - Remastered 2009'),
+    ('Hotel California', 'Eagles', 'Hotel California - Live'),
+    ('Old Town Road', 'Lil Nas X Feat. Billy Ray Cyrus', 'Old Town Road (Feat. Billy Ray Cyrus)'),
+]
+
+
+def match(rows):
+    grammy = pd.DataFrame(rows, columns=['track_name', 'artists'])
+    return TrackMatcher(SPOTIFY).match(grammy).tolist()
+
+
+def test_track_keys_drop_decorations_and_punctuation():
+    keys = track_keys([
+        'Bad Guy (Feat. Justin Bieber)', 'Bad Guy Ft. Justin Bieber', "Don't Stop Believin'",
+        'Yesterday - Remastered 2009', 'Hotel California - Live', 'Hey Ya!', None,
+    ])
+    assert keys.tolist() == [
+        'bad guy', 'bad guy', 'dont stop believin', 'yesterday', 'hotel california', 'hey ya', None,
+    ]
+
+
+def test_variants_resolve_to_spotify_track():
+    rows = [(nominee, artist) for nominee, artist, _ in RESOLVED]
+    assert match(rows) == [spotify for _, _, spotify in RESOLVED]
+
+
+def test_similar_title_of_another_artist_stays_unmatched():
+    rows = [('Yesterday', 'Boyz Ii Men'), ('Bad Guy (Feat. Justin Bieber)', 'Justin Bieber Tribute Band'),
+            ('Hotel California', 'Gipsy Kings')]
+    assert match(rows) == [nominee for nominee, _ in rows]
+
+
+def test_exact_matches_are_unchanged():
+    # Names already in Spotify keep their spelling, whatever the artist
+    rows = [('Shallow', 'Lady Gaga'), ('Shallow', 'Someone Else'), ('Hey Ya!', 'Outkast'), (None, 'Eminem'),
+            ('Lose Yourself (Live)', None)]
+    assert match(rows) == ['Shallow', 'Shallow', 'Hey Ya!', None, 'Lose Yourself (Live)']
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.transform.transform_grammy import TransformGrammy
+
+GRAMMY_CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'the_grammy_awards.csv')
+
+
+def mark_winners_rowwise(df):
+    # The per-group loop mark_winners replaced, kept as the reference
+    grouped = df.groupby(['year', 'title', 'category'])
+    for name, group in grouped:
+        if len(group) > 2:
+            df.loc[group.index[0], 'winner'] = True
+            df.loc[group.index[1:], 'winner'] = False
+
+
+def nominees():
+    return pd.DataFrame({
+        'year': [2020, 2020, 2020, 2020, 2021, 2021, 2021, 2021, 2021, np.nan, np.nan, np.nan, 2022, 2022],
+        'title': ['Grammys', 'Grammys', 'Grammys', 'Grammys', 'Grammys', 'grammys', 'GRAMMYS', 'Grammys',
+                  'Grammys', 'Grammys', 'Grammys', 'Grammys', None, None],
+        'category': ['Record', 'Record', 'Record', 'Song', 'Album', 'Album', 'Album', 'Album',
+                     'Album', 'Record', 'Record', 'Record', 'Song', 'Song'],
+        'nominee': ['A', 'B', 'B', 'C', 'D', 'E', 'F', 'G', 'G', 'H', 'I', 'J', 'K', 'L'],
+        'winner': [False, True, True, True, False, True, False, True, True, True, False, True, True, False],
+    }, index=[10, 3, 7, 1, 20, 21, 22, 23, 24, 30, 31, 32, 40, 41])
+
+
+def check_matches_rowwise(df):
+    expected = df.copy()
+    mark_winners_rowwise(expected)
+    transformer = TransformGrammy(df.copy())
+    transformer.mark_winners()
+    pd.testing.assert_frame_equal(transformer.df, expected)
+
+
+def test_mark_winners_matches_rowwise():
+    # Ties on the nominee, groups of two or fewer, keys that only differ in
+    # case, and missing year or title
+    check_matches_rowwise(nominees())
+
+
+def test_mark_winners_matches_rowwise_on_shuffled_rows():
+    check_matches_rowwise(nominees().sample(frac=1, random_state=0))
+
+
+def test_mark_winners_keeps_small_groups():
+    df = nominees()
+    transformer = TransformGrammy(df.copy())
+    transformer.mark_winners()
+    small = df['category'].eq('Song') | df['title'].isna()
+    pd.testing.assert_series_equal(transformer.df.loc[small, 'winner'], df.loc[small, 'winner'])
+
+
+@pytest.mark.skipif(not os.path.exists(GRAMMY_CSV), reason='Grammy dataset not available')
+def test_mark_winners_matches_rowwise_on_grammy_data():
+    check_matches_rowwise(pd.read_csv(GRAMMY_CSV))
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generators import generate_spotify
+from src.transform.transform_spotify import TransformSpotify, max_popularity_rows
+
+
+def old_drop_nan_records(df):
+    # The eager steps TransformPlan and max_popularity_rows replaced
+    return df.drop(df[df.isna().any(axis=1)].index)
+
+
+def old_normalize_data(df):
+    df = df.copy()
+    for col in df.select_dtypes(include=['object']):
+        df[col] = df[col].str.title().str.strip()
+    return df
+
+
+def old_filter_max_popularity_tracks(df):
+    df_max_popularity = df.loc[df.groupby(['track_name', 'artists'])['popularity'].idxmax()].reset_index(drop=True)
+    track_ids_to_keep = df_max_popularity[['track_name', 'artists', 'track_id']].drop_duplicates()
+    return df.merge(track_ids_to_keep, on=['track_name', 'artists', 'track_id'])
+
+
+def spotify_with_ties(seed):
+    # Few popularity values make ties common; reused track ids put several
+    # rows behind the winning id of a group
+    rng = np.random.default_rng(seed)
+    df = generate_spotify(4000, seed=seed, nan_rows=40)
+    df['popularity'] = rng.integers(0, 3, len(df))
+    reused = rng.choice(len(df), 800, replace=False)
+    df.loc[reused, 'track_id'] = df['track_id'].iloc[rng.integers(0, 50, 800)].to_numpy()
+    # Shuffled rows, so the output order is not just the generator's order
+    return df.sample(frac=1, random_state=seed)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_filter_matches_groupby_idxmax(seed):
+    df = old_drop_nan_records(spotify_with_ties(seed))
+    expected = old_filter_max_popularity_tracks(df)
+
+    transformer = TransformSpotify(df.copy())
+    transformer.filter_max_popularity_tracks()
+    pd.testing.assert_frame_equal(transformer.df, expected)
+    pd.testing.assert_frame_equal(df.take(max_popularity_rows(df)).reset_index(drop=True), expected)
+
+
+def test_first_row_wins_ties_and_missing_values_match():
+    df = pd.DataFrame({
+        'track_name': ['A', 'B', 'A', 'A', None, 'B', 'C', 'C'],
+        'artists': ['x', 'y', 'x', 'x', 'x', 'y', 'z', 'z'],
+        'track_id': ['a2', 'b1', 'a1', 'a2', 'n1', None, None, 'c1'],
+        'popularity': [5, 3, 5, 1, 9, 3, 7, 2],
+    })
+    expected = old_filter_max_popularity_tracks(df)
+    # a2 wins A on the tie (first row), rows with a missing key are dropped and
+    # a missing winning track_id keeps the other rows missing it
+    assert expected['track_id'].tolist() == ['a2', 'a2', 'b1', None]
+    pd.testing.assert_frame_equal(df.take(max_popularity_rows(df)).reset_index(drop=True), expected)
+
+
+def test_keep_mask_ignores_dropped_rows():
+    df = spotify_with_ties(3)
+    keep = ~df.isna().any(axis=1).to_numpy()
+    expected = old_filter_max_popularity_tracks(old_drop_nan_records(df))
+    pd.testing.assert_frame_equal(df.take(max_popularity_rows(df, keep)).reset_index(drop=True), expected)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_plan_matches_eager_steps(seed):
+    df = spotify_with_ties(seed)
+    expected = old_drop_nan_records(df.rename(columns={'Unnamed: 0': 'ID'}))
+    expected = old_filter_max_popularity_tracks(old_normalize_data(expected))
+
+    transformer = TransformSpotify(df.copy())
+    transformer.plan() \
+        .unnamed_to_id() \
+        .drop_nan_records() \
+        .normalize_data() \
+        .filter_max_popularity_tracks() \
+        .execute()
+    pd.testing.assert_frame_equal(transformer.df, expected)
+
+    eager = TransformSpotify(df.copy())
+    eager.unnamed_to_id()
+    eager.drop_nan_records()
+    eager.normalize_data()
+    eager.filter_max_popularity_tracks()
+    pd.testing.assert_frame_equal(eager.df, expected)
+
+
+def test_drop_nan_records_keeps_index():
+    df = spotify_with_ties(4)
+    transformer = TransformSpotify(df.copy())
+    transformer.drop_nan_records()
+    pd.testing.assert_frame_equal(transformer.df, old_drop_nan_records(df))
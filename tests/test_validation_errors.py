@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from src.extract import read_grammy
+from src.load import load_to_database
+from src.load.validation import ValidationError
+
+GRAMMY_CSV = '''year,title,published_at,updated_at,category,nominee,artist,workers,img,winner
+2019,62nd Annual GRAMMY Awards  (2019),2020-05-19T05:10:28-07:00,2020-05-19T05:10:28-07:00,Record Of The Year,Bad Guy,Billie Eilish,,,True
+2019,62nd Annual GRAMMY Awards  (2019),2020-05-19T05:10:28-07:00,2020-05-19T05:10:28-07:00,,Hey Ma,Bon Iver,,,True
+'''
+
+
+@pytest.fixture(autouse=True)
+def no_database(monkeypatch):
+    # Validation runs before any connection is made
+    def build_engine():
+        raise AssertionError('the database was used after a validation failure')
+    monkeypatch.setattr(load_to_database, 'build_engine', build_engine)
+    monkeypatch.setattr(read_grammy, 'build_engine', build_engine)
+
+
+def invalid_merged():
+    return pd.DataFrame({'ID': [1, 2, None]})
+
+
+def test_load_data_raises_with_report():
+    with pytest.raises(ValidationError, match='merged_data.*ID: 1 null') as error:
+        load_to_database.load_data(invalid_merged(), mode='full')
+    assert error.value.report['ID'] == {'null': 1}
+
+
+def test_load_chunks_raises_before_writing():
+    with pytest.raises(ValidationError, match='merged_data'):
+        load_to_database.load_chunks(lambda: iter([invalid_merged()]))
+
+
+def test_read_grammy_db_raises_with_report(tmp_path, monkeypatch):
+    path = tmp_path / 'grammy.csv'
+    path.write_text(GRAMMY_CSV)
+    monkeypatch.setattr(read_grammy, 'GRAMMY_CSV_PATH', str(path))
+    with pytest.raises(ValidationError, match='grammy_awards') as error:
+        read_grammy.read_grammy_db(mode='full')
+    assert error.value.report['category'] == {'null': 1}
+
+
+def test_task_fails_without_retries(monkeypatch):
+    airflow_exceptions = pytest.importorskip('airflow.exceptions')
+    from dags import etl
+
+    def read_grammy_db():
+        raise ValidationError('grammy_awards', {'year': {'null': 1}})
+    monkeypatch.setattr(etl, 'read_grammy_db', read_grammy_db)
+    monkeypatch.setattr(etl, 'pool_metrics', lambda: {})
+    monkeypatch.setenv('STAGE_CACHE_DIR', '')
+    with pytest.raises(airflow_exceptions.AirflowFailException, match='year: 1 null'):
+        etl.extract_grammy(run_id='test')